@@ -0,0 +1,142 @@
+"""
+PDF 合并内存基准
+
+生成一批带随机灰度图（模拟扫描件、无法压缩）的 PDF，
+分别用全内存合并和 --chunk 分批合并处理不同数量的输入，
+每次合并在独立子进程中运行并记录该进程的内存峰值
+
+用法:
+    python bench_merge.py [-n 50 100 200] [--chunk 20] [--pages 2] [--dir 目录] [--keep]
+
+    -n       每轮合并的文件数（可多个），默认 50 100 200
+    --chunk  分批合并的批大小，默认 20
+    --pages  每个输入 PDF 的页数，默认 2（每页约 0.8 MB）
+    --dir    输入 PDF 存放目录，默认临时目录；已存在的输入会复用，
+             结束时只删除合并输出，目录与输入 PDF 保留
+    --keep   保留临时目录与合并输出
+
+内存峰值: Linux/macOS 用 resource，Windows 需要 pip install psutil
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import fitz
+
+from pdf import PdfMerger
+
+# 模拟扫描页的图像尺寸（灰度，每像素 1 字节）
+PAGE_IMAGE_SIZE = (800, 1000)
+
+
+def generate_inputs(folder, count, pages):
+    """生成 count 个 PDF，已存在的文件直接复用"""
+    width, height = PAGE_IMAGE_SIZE
+    for i in range(count):
+        path = os.path.join(folder, f"chapter_{i:04d}.pdf")
+        if os.path.exists(path):
+            continue
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            pixmap = fitz.Pixmap(fitz.csGRAY, width, height, os.urandom(width * height), 0)
+            page.insert_image(page.rect, pixmap=pixmap)
+        doc.set_toc([[1, f"chapter {i}", 1]])
+        doc.save(path)
+        doc.close()
+
+
+def peak_memory_mb():
+    """当前进程的内存峰值 (MB)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def run_child(folder, count, chunk_size, output_path):
+    """子进程：合并 folder 中前 count 个 PDF，输出 JSON 结果"""
+    pdf_files = sorted(glob.glob(os.path.join(folder, "chapter_*.pdf")))[:count]
+
+    # 合并过程中的逐行日志不计入结果
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    start = time.perf_counter()
+    merger = PdfMerger(chunk_size=chunk_size, work_dir=os.path.dirname(output_path))
+    for pdf_path in pdf_files:
+        merger.append(pdf_path)
+    merger.save(output_path)
+    elapsed = time.perf_counter() - start
+    sys.stdout = stdout
+
+    with fitz.open(output_path) as doc:
+        page_count = doc.page_count
+    print(json.dumps({
+        'seconds': elapsed,
+        'peak_mb': peak_memory_mb(),
+        'pages': page_count,
+        'output_mb': os.path.getsize(output_path) / 1024 / 1024,
+    }))
+
+
+def measure(folder, count, chunk_size, output_path):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', folder, str(count), str(chunk_size), output_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5])
+        return
+
+    parser = argparse.ArgumentParser(description="PDF 合并内存基准")
+    parser.add_argument("-n", "--counts", type=int, nargs='+', default=[50, 100, 200], help="每轮合并的文件数")
+    parser.add_argument("--chunk", type=int, default=20, help="分批合并的批大小 (默认: 20)")
+    parser.add_argument("--pages", type=int, default=2, help="每个输入 PDF 的图像页数 (默认: 2)")
+    parser.add_argument("--dir", help="输入 PDF 存放目录 (默认: 临时目录)")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录与合并输出")
+    args = parser.parse_args()
+
+    # 只删除本脚本创建的临时目录，--dir 指定的目录不能整个删除
+    created = not args.dir
+    folder = tempfile.mkdtemp(prefix='bench_merge_') if created else os.path.abspath(args.dir)
+    os.makedirs(folder, exist_ok=True)
+    output_path = os.path.join(folder, "merged.pdf")
+
+    print(f"生成输入 PDF: {max(args.counts)} 个 x {args.pages} 页 -> {folder}")
+    generate_inputs(folder, max(args.counts), args.pages)
+
+    print(f"\n{'文件数':>6} {'模式':>10} {'页数':>6} {'耗时(s)':>8} {'峰值(MB)':>9} {'输出(MB)':>9}")
+    try:
+        for count in args.counts:
+            for chunk_size in (0, args.chunk):
+                stats = measure(folder, count, chunk_size, output_path)
+                mode = '全内存' if chunk_size == 0 else f'chunk={chunk_size}'
+                print(f"{count:>6} {mode:>10} {stats['pages']:>6} {stats['seconds']:>8.2f} "
+                      f"{stats['peak_mb']:>9.1f} {stats['output_mb']:>9.1f}")
+    finally:
+        if not args.keep:
+            if created:
+                shutil.rmtree(folder, ignore_errors=True)
+            elif os.path.exists(output_path):
+                os.remove(output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,105 @@
 # -*- coding: utf-8 -*-
 """
-转换服务 - Markdown 到 Word 的完整转换逻辑
+转换服务 - Markdown 到 Word / PDF 的完整转换逻辑
+
+命令行用法 (在 md_to_word_app 目录下):
+    python -m core.converter docx 输入.md [-o 输出.docx] [样式选项]
+    python -m core.converter pdf 文件夹或md文件... [-o 输出.pdf] [--engine xelatex] [样式选项]
+
+    pdf 模式直接用 Pandoc + 本地 LaTeX 引擎生成 PDF，不经过 docx；
+    传入文件夹时按文件名顺序把其中所有 md 合并为一个 PDF（默认以文件夹名命名）
 """
 
 import os
 import sys
+import glob
+import shutil
+import argparse
 import subprocess
 import re
-from typing import Tuple, Dict, Any, Optional
+import time
+import signal
+import tempfile
+import threading
+from typing import Tuple, Dict, Any, Optional, List, Union
 
 # Pandoc 可执行文件路径
 PANDOC_PATH = r'S:\Tools\Miniconda\envs\pandoc\Library\bin\pandoc.exe'
 
+# 直接生成 PDF 时可用的 LaTeX 引擎（需支持 CJK 字体）
+PDF_ENGINES = ('xelatex', 'lualatex')
+DEFAULT_PDF_ENGINE = 'xelatex'
+# PDF 页边距
+PDF_MARGIN = '2.5cm'
+# 合并多个 md 时各章之间插入的分页符（raw_tex）
+PDF_CHAPTER_BREAK = '\n\n\\newpage\n\n'
+
+# 转换选项默认值，Word 与 PDF 两种输出共用
+DEFAULT_OPTIONS = {
+    'generate_toc': True,
+    'toc_depth': 3,
+    'highlight_style': 'tango',
+    'chinese_font': '宋体',
+    'code_font': 'Times New Roman',
+    'font_size': 12,
+    'line_spacing': 1.5,
+    'timeout': 0,
+    'memory_limit_mb': 0,
+    'pdf_engine': DEFAULT_PDF_ENGINE,
+}
+
+# 被取消时返回的消息
+CANCELLED_MESSAGE = "已取消"
+
+
+def kill_process_tree(process: subprocess.Popen) -> None:
+    """
+    结束子进程及其子孙进程（如 Pandoc 启动的 LaTeX 引擎），避免孙进程继续运行并占用管道
+    POSIX 下结束整个进程组，Windows 下用 taskkill /T
+    """
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+            if process.poll() is None:
+                process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+class ConversionHandle:
+    """
+    转换任务的控制句柄
+    可以在其他线程调用 cancel()：立即结束 Pandoc 子进程，并中止后续的后处理
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._process = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            if self._process is not None and self._process.poll() is None:
+                kill_process_tree(self._process)
+
+    def attach(self, process: subprocess.Popen) -> None:
+        """登记正在运行的子进程，若已被取消则立即结束"""
+        with self._lock:
+            self._process = process
+            if self._cancelled:
+                kill_process_tree(process)
+
+    def detach(self) -> None:
+        with self._lock:
+            self._process = None
+
 
 def preprocess_markdown(content: str) -> str:
     """
@@ -29,6 +117,14 @@ def preprocess_markdown(content: str) -> str:
     return '\n'.join(processed_lines)
 
 
+def find_markdown_files(folder: str) -> List[str]:
+    """按文件名排序列出文件夹中的 Markdown 文件（跳过转换时生成的临时文件）"""
+    files = []
+    for pattern in ('*.md', '*.markdown'):
+        files.extend(glob.glob(os.path.join(folder, pattern)))
+    return sorted(f for f in files if not os.path.basename(f).startswith('_temp_processed'))
+
+
 def add_table_borders(table) -> None:
     """为表格添加完整的边框"""
     from docx.oxml import parse_xml
@@ -60,7 +156,8 @@ def create_reference_docx(
     chinese_font: str = '宋体',
     code_font: str = 'Times New Roman',
     font_size: float = 12,
-    line_spacing: float = 1.5
+    line_spacing: float = 1.5,
+    base_template: Optional[str] = None
 ) -> bool:
     """
     创建自定义 Word 参考模板
@@ -71,6 +168,7 @@ def create_reference_docx(
         code_font: 代码字体名称
         font_size: 正文字体大小 (pt)
         line_spacing: 行间距倍数
+        base_template: 作为基础的模板（如 Pandoc 默认的 reference.docx），不设置时使用 python-docx 默认模板
     """
     try:
         from docx import Document
@@ -79,28 +177,8 @@ def create_reference_docx(
     except ImportError:
         return False
 
-    temp_template = output_path + '.temp'
-
-    try:
-        result = subprocess.run(
-            [PANDOC_PATH, '--print-default-data-file', 'reference.docx'],
-            capture_output=True,
-            check=False
-        )
-
-        if result.returncode == 0:
-            with open(temp_template, 'wb') as f:
-                f.write(result.stdout)
-        else:
-            doc = Document()
-            doc.save(temp_template)
-
-    except Exception:
-        doc = Document()
-        doc.save(temp_template)
-
     try:
-        doc = Document(temp_template)
+        doc = Document(base_template) if base_template else Document()
         styles = doc.styles
 
         # 正文样式
@@ -158,15 +236,9 @@ def create_reference_docx(
             pass
 
         doc.save(output_path)
-
-        if os.path.exists(temp_template):
-            os.remove(temp_template)
-
         return True
 
     except Exception:
-        if os.path.exists(temp_template):
-            os.remove(temp_template)
         return False
 
 
@@ -259,17 +331,74 @@ class ConverterService:
     def __init__(self):
         self.pandoc_path = PANDOC_PATH
 
+    @staticmethod
+    def _remove_partial_output(output_file: str) -> None:
+        """删除被中止任务留下的不完整输出"""
+        if os.path.exists(output_file):
+            try:
+                os.remove(output_file)
+            except Exception:
+                pass
+
     def check_pandoc(self) -> Tuple[bool, str]:
         """检查 Pandoc 是否可用"""
         if os.path.exists(self.pandoc_path):
             return True, f"Pandoc 路径: {self.pandoc_path}"
         return False, f"找不到 Pandoc: {self.pandoc_path}"
 
+    def _run_pandoc(
+        self,
+        cmd: List[str],
+        cwd: str,
+        output_file: str,
+        handle: ConversionHandle,
+        deadline: Optional[float],
+        timeout: Optional[float]
+    ) -> Tuple[bool, str]:
+        """
+        运行 Pandoc 子进程，处理取消与超时
+        失败时删除不完整的输出文件
+        """
+        if handle.cancelled:
+            return False, CANCELLED_MESSAGE
+
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            cwd=cwd,
+            start_new_session=(os.name == 'posix')
+        )
+        handle.attach(process)
+        try:
+            remaining = max(deadline - time.monotonic(), 0) if deadline else None
+            _, stderr = process.communicate(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process)
+            process.communicate()
+            self._remove_partial_output(output_file)
+            return False, f"转换超时 (超过 {timeout} 秒)"
+        finally:
+            handle.detach()
+
+        if handle.cancelled:
+            self._remove_partial_output(output_file)
+            return False, CANCELLED_MESSAGE
+
+        if process.returncode != 0:
+            self._remove_partial_output(output_file)
+            return False, f"Pandoc 转换失败: {stderr}"
+
+        return True, ""
+
     def convert(
         self,
         input_file: str,
         output_file: str,
-        options: Optional[Dict[str, Any]] = None
+        options: Optional[Dict[str, Any]] = None,
+        handle: Optional[ConversionHandle] = None
     ) -> Tuple[bool, str]:
         """
         转换 Markdown 文件到 Word 文档
@@ -285,17 +414,25 @@ class ConverterService:
                 - code_font: 代码字体
                 - font_size: 正文字体大小 (pt)
                 - line_spacing: 行间距倍数
+                - timeout: 整个任务的超时时间 (秒)，0 或不设置表示不限
+                - memory_limit_mb: Pandoc 堆内存上限 (MB)，0 或不设置表示不限
+            handle: 控制句柄，用于从其他线程取消
         """
-        if options is None:
-            options = {}
-
-        generate_toc = options.get('generate_toc', True)
-        toc_depth = options.get('toc_depth', 3)
-        highlight_style = options.get('highlight_style', 'tango')
-        chinese_font = options.get('chinese_font', '宋体')
-        code_font = options.get('code_font', 'Times New Roman')
-        font_size = options.get('font_size', 12)
-        line_spacing = options.get('line_spacing', 1.5)
+        options = {**DEFAULT_OPTIONS, **(options or {})}
+        if handle is None:
+            handle = ConversionHandle()
+
+        generate_toc = options['generate_toc']
+        toc_depth = options['toc_depth']
+        highlight_style = options['highlight_style']
+        chinese_font = options['chinese_font']
+        code_font = options['code_font']
+        font_size = options['font_size']
+        line_spacing = options['line_spacing']
+        timeout = options['timeout'] or None
+        memory_limit_mb = options['memory_limit_mb'] or None
+
+        deadline = time.monotonic() + timeout if timeout else None
 
         # 检查输入文件
         if not os.path.exists(input_file):
@@ -307,17 +444,26 @@ class ConverterService:
             return False, pandoc_msg
 
         try:
-            # 参考模板
+            # 参考模板（文件名唯一，允许同一目录下并发转换）
             output_dir = os.path.dirname(output_file) or '.'
-            reference_docx = os.path.join(output_dir, 'reference_template.docx')
-
-            # 创建参考模板
+            fd, reference_docx = tempfile.mkstemp(prefix='reference_template_', suffix='.docx', dir=output_dir)
+            os.close(fd)
+
+            # 以 Pandoc 默认模板为基础创建参考模板，同样受超时与取消控制；
+            # Pandoc 无法导出默认模板时改用 python-docx 默认模板
+            success, message = self._run_pandoc(
+                [self.pandoc_path, '-o', reference_docx, '--print-default-data-file', 'reference.docx'],
+                output_dir, reference_docx, handle, deadline, timeout
+            )
+            if not success and (handle.cancelled or (deadline and time.monotonic() >= deadline)):
+                return False, message
             template_created = create_reference_docx(
                 reference_docx,
                 chinese_font=chinese_font,
                 code_font=code_font,
                 font_size=font_size,
-                line_spacing=line_spacing
+                line_spacing=line_spacing,
+                base_template=reference_docx if success else None
             )
 
             # 预处理 Markdown
@@ -327,9 +473,9 @@ class ConverterService:
             processed_content = preprocess_markdown(content)
 
             input_dir = os.path.dirname(os.path.abspath(input_file))
-            temp_md = os.path.join(input_dir, '_temp_processed.md')
+            fd, temp_md = tempfile.mkstemp(prefix='_temp_processed_', suffix='.md', dir=input_dir)
 
-            with open(temp_md, 'w', encoding='utf-8') as f:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 f.write(processed_content)
 
             # 构建 Pandoc 命令
@@ -352,32 +498,31 @@ class ConverterService:
             if template_created and os.path.exists(reference_docx):
                 cmd.extend(['--reference-doc', reference_docx])
 
+            # 限制 Pandoc (GHC 运行时) 的堆内存，超出时 Pandoc 自行退出
+            if memory_limit_mb:
+                cmd.extend(['+RTS', f'-M{int(memory_limit_mb)}m', '-RTS'])
+
             # 执行转换
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                cwd=input_dir
-            )
+            success, message = self._run_pandoc(cmd, input_dir, output_file, handle, deadline, timeout)
+            if not success:
+                return False, message
 
-            success = result.returncode == 0
+            # 后处理字体
+            apply_fonts_to_docx(
+                output_file,
+                chinese_font=chinese_font,
+                code_font=code_font,
+                font_size=font_size,
+                line_spacing=line_spacing
+            )
 
-            if success:
-                # 后处理字体
-                apply_fonts_to_docx(
-                    output_file,
-                    chinese_font=chinese_font,
-                    code_font=code_font,
-                    font_size=font_size,
-                    line_spacing=line_spacing
-                )
+            if handle.cancelled:
+                self._remove_partial_output(output_file)
+                return False, CANCELLED_MESSAGE
 
-                file_size = os.path.getsize(output_file)
-                size_kb = file_size / 1024
-                return True, f"转换成功! 文件大小: {size_kb:.1f} KB"
-            else:
-                return False, f"Pandoc 转换失败: {result.stderr}"
+            file_size = os.path.getsize(output_file)
+            size_kb = file_size / 1024
+            return True, f"转换成功! 文件大小: {size_kb:.1f} KB"
 
         except Exception as e:
             return False, f"转换过程中发生错误: {str(e)}"
@@ -395,3 +540,191 @@ class ConverterService:
                     os.remove(reference_docx)
                 except Exception:
                     pass
+
+    def convert_to_pdf(
+        self,
+        input_files: Union[str, List[str]],
+        output_file: str,
+        options: Optional[Dict[str, Any]] = None,
+        handle: Optional[ConversionHandle] = None
+    ) -> Tuple[bool, str]:
+        """
+        直接把 Markdown 转为 PDF（Pandoc + 本地 LaTeX 引擎，不经过 docx）
+
+        Args:
+            input_files: 一个或多个 Markdown 文件，多个文件按顺序合并为一个 PDF，每个文件另起一页
+            output_file: 输出的 PDF 文件路径
+            options: 与 convert 相同的转换选项，另外支持
+                - pdf_engine: LaTeX 引擎，xelatex (默认) 或 lualatex
+                字体映射为 mainfont/CJKmainfont (中文字体) 与 monofont (代码字体)；
+                标准文档类只支持 10/11/12pt 字号
+            handle: 控制句柄，用于从其他线程取消
+        """
+        if isinstance(input_files, str):
+            input_files = [input_files]
+        options = {**DEFAULT_OPTIONS, **(options or {})}
+        if handle is None:
+            handle = ConversionHandle()
+
+        timeout = options['timeout'] or None
+        memory_limit_mb = options['memory_limit_mb'] or None
+        pdf_engine = options['pdf_engine']
+        deadline = time.monotonic() + timeout if timeout else None
+
+        if not input_files:
+            return False, "没有要转换的 Markdown 文件"
+        for input_file in input_files:
+            if not os.path.exists(input_file):
+                return False, f"输入文件不存在: {input_file}"
+
+        pandoc_ok, pandoc_msg = self.check_pandoc()
+        if not pandoc_ok:
+            return False, pandoc_msg
+
+        if pdf_engine not in PDF_ENGINES:
+            return False, f"不支持的 PDF 引擎: {pdf_engine} (可选: {', '.join(PDF_ENGINES)})"
+        if shutil.which(pdf_engine) is None:
+            return False, f"找不到 PDF 引擎: {pdf_engine}，请安装 TeX Live 或 MiKTeX"
+
+        try:
+            # 预处理并合并 Markdown，各文件之间插入分页
+            chapters = []
+            for input_file in input_files:
+                with open(input_file, 'r', encoding='utf-8') as f:
+                    chapters.append(preprocess_markdown(f.read()))
+
+            input_dir = os.path.dirname(os.path.abspath(input_files[0]))
+            fd, temp_md = tempfile.mkstemp(prefix='_temp_processed_', suffix='.md', dir=input_dir)
+
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(PDF_CHAPTER_BREAK.join(chapters))
+
+            # 各文件中的相对图片路径按各自所在目录查找
+            resource_dirs = []
+            for input_file in input_files:
+                directory = os.path.dirname(os.path.abspath(input_file))
+                if directory not in resource_dirs:
+                    resource_dirs.append(directory)
+
+            cmd = [
+                self.pandoc_path,
+                temp_md,
+                '-o', output_file,
+                '--from', 'markdown+tex_math_dollars+raw_tex',
+                '--to', 'latex',  # 输出 .pdf 时由 LaTeX 引擎编译
+                '--standalone',
+                '--pdf-engine', pdf_engine,
+                '--resource-path', os.pathsep.join(resource_dirs),
+                '--highlight-style', options['highlight_style'],
+                '-V', f"mainfont={options['chinese_font']}",
+                '-V', f"CJKmainfont={options['chinese_font']}",
+                '-V', f"monofont={options['code_font']}",
+                '-V', f"fontsize={options['font_size']:g}pt",
+                '-V', f"linestretch={options['line_spacing']}",
+                '-V', f"geometry:margin={PDF_MARGIN}",
+                '-V', 'colorlinks=true',
+            ]
+
+            if options['generate_toc']:
+                cmd.append('--toc')
+                cmd.append(f"--toc-depth={options['toc_depth']}")
+
+            if memory_limit_mb:
+                cmd.extend(['+RTS', f'-M{int(memory_limit_mb)}m', '-RTS'])
+
+            success, message = self._run_pandoc(cmd, input_dir, output_file, handle, deadline, timeout)
+            if not success:
+                return False, message
+
+            size_kb = os.path.getsize(output_file) / 1024
+            return True, f"转换成功! {len(input_files)} 个文件, PDF 大小: {size_kb:.1f} KB"
+
+        except Exception as e:
+            return False, f"转换过程中发生错误: {str(e)}"
+
+        finally:
+            if 'temp_md' in locals() and os.path.exists(temp_md):
+                try:
+                    os.remove(temp_md)
+                except Exception:
+                    pass
+
+    def convert_folder_to_pdf(
+        self,
+        folder: str,
+        output_file: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        handle: Optional[ConversionHandle] = None
+    ) -> Tuple[bool, str]:
+        """
+        把文件夹中的所有 Markdown 按文件名顺序合并生成一个 PDF
+        output_file 默认为 文件夹/文件夹名.pdf
+        """
+        md_files = find_markdown_files(folder)
+        if not md_files:
+            return False, f"文件夹中没有 Markdown 文件: {folder}"
+
+        if output_file is None:
+            folder_name = os.path.basename(os.path.abspath(folder).rstrip(os.sep))
+            output_file = os.path.join(folder, f"{folder_name}.pdf")
+
+        return self.convert_to_pdf(md_files, output_file, options, handle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown 转 Word / PDF")
+    subparsers = parser.add_subparsers(dest='command', help='命令')
+
+    p_docx = subparsers.add_parser('docx', help='Markdown 转 Word')
+    p_docx.add_argument('input', help='Markdown 文件')
+    p_docx.add_argument('-o', '--output', help='输出文件 (默认: 同名 .docx)')
+
+    p_pdf = subparsers.add_parser('pdf', help='Markdown 直接转 PDF（多个文件合并为一个）')
+    p_pdf.add_argument('inputs', nargs='+', help='Markdown 文件或文件夹')
+    p_pdf.add_argument('-o', '--output', help='输出文件 (默认: 文件夹名.pdf 或同名 .pdf)')
+    p_pdf.add_argument('--engine', dest='pdf_engine', choices=PDF_ENGINES, default=DEFAULT_PDF_ENGINE,
+                       help=f'LaTeX 引擎 (默认: {DEFAULT_PDF_ENGINE})')
+
+    for sub in (p_docx, p_pdf):
+        sub.add_argument('--no-toc', dest='generate_toc', action='store_false', help='不生成目录')
+        sub.add_argument('--toc-depth', type=int, default=DEFAULT_OPTIONS['toc_depth'], help='目录深度')
+        sub.add_argument('--highlight', dest='highlight_style', default=DEFAULT_OPTIONS['highlight_style'],
+                         help='代码高亮样式')
+        sub.add_argument('--chinese-font', default=DEFAULT_OPTIONS['chinese_font'], help='中文字体')
+        sub.add_argument('--code-font', default=DEFAULT_OPTIONS['code_font'], help='代码字体')
+        sub.add_argument('--font-size', type=float, default=DEFAULT_OPTIONS['font_size'], help='正文字号 (pt)')
+        sub.add_argument('--line-spacing', type=float, default=DEFAULT_OPTIONS['line_spacing'], help='行间距倍数')
+        sub.add_argument('--timeout', type=int, default=0, help='超时秒数 (默认: 0 = 不限)')
+        sub.add_argument('--memory-limit', dest='memory_limit_mb', type=int, default=0,
+                         help='Pandoc 堆内存上限 MB (默认: 0 = 不限)')
+
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        return
+
+    options = {key: getattr(args, key) for key in DEFAULT_OPTIONS if hasattr(args, key)}
+    service = ConverterService()
+    start = time.perf_counter()
+
+    if args.command == 'docx':
+        output = args.output or os.path.splitext(args.input)[0] + '.docx'
+        success, message = service.convert(args.input, output, options)
+    else:
+        if len(args.inputs) == 1 and os.path.isdir(args.inputs[0]):
+            success, message = service.convert_folder_to_pdf(args.inputs[0], args.output, options)
+        else:
+            for path in args.inputs:
+                if os.path.isdir(path):
+                    print(f"错误: 文件夹只能单独指定 - {path}")
+                    sys.exit(1)
+            output = args.output or os.path.splitext(args.inputs[0])[0] + '.pdf'
+            success, message = service.convert_to_pdf(args.inputs, output, options)
+
+    print(f"{message} ({time.perf_counter() - start:.2f}s)")
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
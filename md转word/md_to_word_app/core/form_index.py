@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+表单单元格检索索引
+把历史表单中的每个单元格 (文件, 表格, 行, 列, 文本) 存入本地 SQLite FTS5 数据库，
+按文件 mtime / 哈希增量更新，查询时无需重新打开 docx
+
+用法 (在 md_to_word_app 目录下):
+    python -m core.form_index index 表单文件夹 [--db form_index.db] [-r] [-j 4]
+    python -m core.form_index query 关键词 [--table 2] [--row 5] [--col 1] [--db form_index.db]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional, Iterator
+
+from docx import Document
+
+from core.word_md_bridge import iter_row_cells
+
+# 默认数据库文件
+DEFAULT_DB_PATH = 'form_index.db'
+# 计算文件哈希时的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+# trigram 分词对少于 3 个字符的关键词无法使用 MATCH，改用 LIKE
+MIN_MATCH_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cells (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    tbl INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cells_file ON cells(file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS cells_fts USING fts5(
+    text, content='cells', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS cells_ai AFTER INSERT ON cells BEGIN
+    INSERT INTO cells_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS cells_ad AFTER DELETE ON cells BEGIN
+    INSERT INTO cells_fts(cells_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def open_index(db_path: str) -> sqlite3.Connection:
+    """打开（必要时创建）索引数据库"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def file_sha1(path: str) -> str:
+    """计算文件内容哈希"""
+    hasher = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def extract_cells(doc_path: str) -> List[Tuple[int, int, int, str]]:
+    """
+    提取文档所有表格单元格，返回 [(表格, 行, 列, 文本), ...]
+    与 word_to_markdown 使用相同的合并单元格与编号处理
+    """
+    doc = Document(doc_path)
+    numbering_counters = {}
+    cells = []
+    for t_idx, table in enumerate(doc.tables):
+        for r_idx, row in enumerate(table.rows):
+            for c_idx, content in iter_row_cells(row, doc, numbering_counters):
+                if content:
+                    cells.append((t_idx, r_idx, c_idx, content))
+    return cells
+
+
+def find_docx_files(folder: str, recursive: bool = False) -> Iterator[str]:
+    """查找文件夹中的 docx 文件（跳过 Word 临时锁文件 ~$xxx.docx）"""
+    if recursive:
+        for root, dirs, files in os.walk(folder):
+            for filename in files:
+                if filename.lower().endswith('.docx') and not filename.startswith('~$'):
+                    yield os.path.abspath(os.path.join(root, filename))
+    else:
+        for filename in os.listdir(folder):
+            path = os.path.join(folder, filename)
+            if filename.lower().endswith('.docx') and not filename.startswith('~$') and os.path.isfile(path):
+                yield os.path.abspath(path)
+
+
+def update_index(conn: sqlite3.Connection, folder: str, recursive: bool = False,
+                 jobs: Optional[int] = None) -> dict:
+    """
+    增量更新索引
+    - mtime 与大小都未变化的文件直接跳过
+    - mtime 变化但内容哈希相同的文件只更新记录
+    - 其余文件重新解析（多进程），已删除的文件从索引中移除
+
+    Returns:
+        {'indexed': n, 'unchanged': n, 'removed': n, 'failed': [(path, error), ...]}
+    """
+    known = {path: (file_id, mtime_ns, size, sha1)
+             for file_id, path, mtime_ns, size, sha1
+             in conn.execute('SELECT id, path, mtime_ns, size, sha1 FROM files')}
+    stats = {'indexed': 0, 'unchanged': 0, 'removed': 0, 'failed': []}
+
+    folder = os.path.abspath(folder)
+    seen = set()
+    pending = []  # [(path, mtime_ns, size, sha1)]
+
+    for path in find_docx_files(folder, recursive):
+        seen.add(path)
+        st = os.stat(path)
+        record = known.get(path)
+        if record and record[1] == st.st_mtime_ns and record[2] == st.st_size:
+            stats['unchanged'] += 1
+            continue
+
+        sha1 = file_sha1(path)
+        if record and record[3] == sha1:
+            conn.execute('UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?',
+                         (st.st_mtime_ns, st.st_size, record[0]))
+            stats['unchanged'] += 1
+            continue
+
+        pending.append((path, st.st_mtime_ns, st.st_size, sha1))
+
+    # 删除已不存在的文件（仅限本次索引的文件夹）
+    prefix = folder.rstrip(os.sep) + os.sep
+    for path, (file_id, _, _, _) in known.items():
+        if path.startswith(prefix) and path not in seen:
+            if not recursive and os.path.dirname(path) != folder:
+                continue
+            conn.execute('DELETE FROM cells WHERE file_id = ?', (file_id,))
+            conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+            stats['removed'] += 1
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [(item, executor.submit(extract_cells, item[0])) for item in pending]
+            for (path, mtime_ns, size, sha1), future in futures:
+                try:
+                    cells = future.result()
+                except Exception as e:
+                    stats['failed'].append((path, str(e)))
+                    continue
+
+                record = known.get(path)
+                if record:
+                    file_id = record[0]
+                    conn.execute('DELETE FROM cells WHERE file_id = ?', (file_id,))
+                    conn.execute('UPDATE files SET mtime_ns = ?, size = ?, sha1 = ? WHERE id = ?',
+                                 (mtime_ns, size, sha1, file_id))
+                else:
+                    file_id = conn.execute(
+                        'INSERT INTO files (path, mtime_ns, size, sha1) VALUES (?, ?, ?, ?)',
+                        (path, mtime_ns, size, sha1)).lastrowid
+
+                conn.executemany(
+                    'INSERT INTO cells (file_id, tbl, row, col, text) VALUES (?, ?, ?, ?, ?)',
+                    [(file_id, t, r, c, text) for t, r, c, text in cells])
+                stats['indexed'] += 1
+
+    conn.commit()
+    return stats
+
+
+def search(conn: sqlite3.Connection, keyword: str, table: Optional[int] = None,
+           row: Optional[int] = None, col: Optional[int] = None,
+           limit: int = 50) -> List[Tuple[str, int, int, int, str]]:
+    """
+    检索单元格，返回 [(文件, 表格, 行, 列, 文本), ...]
+    可按表格 / 行 / 列位置过滤
+    """
+    conditions = []
+    params = []
+
+    if len(keyword) >= MIN_MATCH_LENGTH:
+        # 整体作为短语匹配，避免关键词中的 FTS 语法字符被解析
+        conditions.append('cells.id IN (SELECT rowid FROM cells_fts WHERE cells_fts MATCH ?)')
+        params.append('"' + keyword.replace('"', '""') + '"')
+    else:
+        # 转义 LIKE 通配符，关键词中的 % 和 _ 按字面匹配
+        escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        conditions.append("cells.text LIKE ? ESCAPE '\\'")
+        params.append(f'%{escaped}%')
+
+    for column, value in (('tbl', table), ('row', row), ('col', col)):
+        if value is not None:
+            conditions.append(f'cells.{column} = ?')
+            params.append(value)
+
+    sql = ('SELECT files.path, cells.tbl, cells.row, cells.col, cells.text '
+           'FROM cells JOIN files ON files.id = cells.file_id '
+           f'WHERE {" AND ".join(conditions)} '
+           'ORDER BY files.path, cells.tbl, cells.row, cells.col LIMIT ?')
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表单单元格检索索引")
+    subparsers = parser.add_subparsers(dest='command', help='命令')
+
+    p_index = subparsers.add_parser('index', help='建立/增量更新索引')
+    p_index.add_argument('folder', help='表单文件夹')
+    p_index.add_argument('--db', default=DEFAULT_DB_PATH, help=f'索引数据库 (默认: {DEFAULT_DB_PATH})')
+    p_index.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
+    p_index.add_argument('-j', '--jobs', type=int, default=None, help='解析进程数 (默认: CPU 核数)')
+
+    p_query = subparsers.add_parser('query', help='检索单元格')
+    p_query.add_argument('keyword', help='关键词')
+    p_query.add_argument('--db', default=DEFAULT_DB_PATH, help=f'索引数据库 (默认: {DEFAULT_DB_PATH})')
+    p_query.add_argument('--table', type=int, help='表格序号')
+    p_query.add_argument('--row', type=int, help='行号')
+    p_query.add_argument('--col', type=int, help='列号')
+    p_query.add_argument('--limit', type=int, default=50, help='最多返回条数 (默认: 50)')
+
+    args = parser.parse_args()
+
+    if args.command == 'index':
+        if not os.path.isdir(args.folder):
+            print(f"错误: 文件夹不存在 - {args.folder}")
+            sys.exit(1)
+
+        start = time.perf_counter()
+        # sqlite3 连接的 with 只提交/回滚事务，不会关闭连接
+        with closing(open_index(args.db)) as conn:
+            stats = update_index(conn, args.folder, args.recursive, args.jobs)
+        elapsed = time.perf_counter() - start
+
+        print(f"索引完成 ({elapsed:.2f}s): 更新 {stats['indexed']} 个, "
+              f"未变化 {stats['unchanged']} 个, 移除 {stats['removed']} 个")
+        for path, error in stats['failed']:
+            print(f"  失败: {os.path.basename(path)} - {error}")
+        if stats['failed']:
+            sys.exit(1)
+
+    elif args.command == 'query':
+        if not os.path.exists(args.db):
+            print(f"错误: 索引不存在 - {args.db}")
+            sys.exit(1)
+
+        start = time.perf_counter()
+        with closing(open_index(args.db)) as conn:
+            rows = search(conn, args.keyword, args.table, args.row, args.col, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        for path, t_idx, r_idx, c_idx, text in rows:
+            preview = text.replace('\n', ' ')
+            if len(preview) > 60:
+                preview = preview[:60] + '...'
+            print(f"{path}  表格 {t_idx} 第 {r_idx} 行 第 {c_idx} 列: {preview}")
+        print(f"\n共 {len(rows)} 条结果 ({elapsed:.1f} ms)")
+
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
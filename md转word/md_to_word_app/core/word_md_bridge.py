@@ -4,12 +4,18 @@ Word <-> Markdown 双向转换模块
 完全转换模式：保留格式（粗体、斜体、换行、缩进、列表序号）
 """
 
+import os
 import re
+import hashlib
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
 
 from docx import Document
-from docx.shared import Pt, Twips
+from docx.shared import Pt, Twips, Cm, Emu
 from docx.oxml.ns import qn
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
@@ -141,7 +147,7 @@ def get_cell_grid_position(table, row_idx: int, col_idx: int) -> Tuple[int, int]
         return row_idx, col_idx
 
 
-def extract_cell_content_with_format(cell, doc=None, numbering_counters=None) -> str:
+def extract_cell_content_with_format(cell, doc=None, numbering_counters=None, media_refs=None) -> str:
     """
     提取单元格内容，保留格式信息
     - 粗体用 **text**
@@ -149,11 +155,13 @@ def extract_cell_content_with_format(cell, doc=None, numbering_counters=None) ->
     - 段落之间用换行分隔
     - 保留段落开头的空格（记录实际缩进值）
     - 提取真实的列表编号文本
+    - 嵌入图片输出为单独一行的 ![](<path>)
 
     Args:
         cell: 单元格对象
         doc: Document 对象，用于获取编号格式
         numbering_counters: 编号计数器字典，格式为 {(numId, level): count}
+        media_refs: 图片映射，格式为 {压缩包内路径: Markdown 中的相对路径}
     """
     if numbering_counters is None:
         numbering_counters = {}
@@ -162,6 +170,7 @@ def extract_cell_content_with_format(cell, doc=None, numbering_counters=None) ->
 
     for para in cell.paragraphs:
         para_content = []
+        para_images = []
 
         # 获取段落开头的缩进（首行缩进 + 左缩进）
         indent_chars = 0
@@ -223,6 +232,11 @@ def extract_cell_content_with_format(cell, doc=None, numbering_counters=None) ->
             pass
 
         for run in para.runs:
+            if media_refs and doc is not None:
+                for member, width in get_run_images(run, doc):
+                    if member in media_refs:
+                        para_images.append(format_image_ref(media_refs[member], width))
+
             text = run.text
             if not text:
                 continue
@@ -250,9 +264,12 @@ def extract_cell_content_with_format(cell, doc=None, numbering_counters=None) ->
         if list_text:
             # 直接使用真实的编号文本
             paragraphs_text.append(f'{indent}{list_text}{full_para}')
-        else:
+        elif full_para or not para_images:
             paragraphs_text.append(indent + full_para)
 
+        # 图片单独成行，回填时重新插入
+        paragraphs_text.extend(para_images)
+
     # 用换行符连接段落
     return '\n'.join(paragraphs_text)
 
@@ -335,7 +352,152 @@ def is_vmerge_continue(tc) -> bool:
     return False
 
 
-def word_to_markdown(doc_path: str, md_path: Optional[str] = None) -> Tuple[bool, str]:
+# 进度回调: (已完成数, 总数, 描述)
+ProgressCallback = Callable[[int, int, str], None]
+# 取消检查: 返回 True 表示需要中止
+CancelCheck = Callable[[], bool]
+# 被取消时返回的消息
+CANCELLED_MESSAGE = "已取消"
+
+
+# docx 压缩包中的媒体目录
+MEDIA_PREFIX = 'word/media/'
+# 从压缩包流式拷贝图片时的块大小
+MEDIA_CHUNK_SIZE = 1024 * 1024
+# 单元格中的图片引用：![alt](<path>){width=5.00cm}
+IMAGE_LINE_PATTERN = re.compile(r'^\s*!\[[^\]]*\]\(<?([^<>]+?)>?\)(?:\{width=([\d.]+)cm\})?\s*$')
+
+
+def _extract_media_member(doc_path: str, member: str, assets_dir: str) -> str:
+    """
+    把压缩包中的单个媒体文件流式写入 assets 目录
+    边读边计算内容哈希，写完后按哈希重命名，相同内容只保留一份
+    返回最终文件名
+    """
+    ext = os.path.splitext(member)[1].lower()
+    hasher = hashlib.sha1()
+
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=assets_dir)
+    try:
+        # 每个线程单独打开压缩包，避免共享文件句柄
+        with os.fdopen(fd, 'wb') as dst, zipfile.ZipFile(doc_path) as zf, zf.open(member) as src:
+            while True:
+                chunk = src.read(MEDIA_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                dst.write(chunk)
+
+        filename = hasher.hexdigest()[:16] + ext
+        final_path = os.path.join(assets_dir, filename)
+        if os.path.exists(final_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, final_path)
+        return filename
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def extract_media(doc_path: str, assets_dir: str, max_workers: Optional[int] = None) -> Dict[str, str]:
+    """
+    提取 Word 文档 word/media/ 下的所有图片到 assets 目录
+    图片按内容哈希去重，使用线程池直接从压缩流写出，不做解码
+
+    Returns:
+        {压缩包内路径: assets 目录下的文件名}
+    """
+    with zipfile.ZipFile(doc_path) as zf:
+        members = [name for name in zf.namelist()
+                   if name.startswith(MEDIA_PREFIX) and not name.endswith('/')]
+
+    if not members:
+        return {}
+
+    os.makedirs(assets_dir, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        filenames = executor.map(lambda m: _extract_media_member(doc_path, m, assets_dir), members)
+        return dict(zip(members, filenames))
+
+
+def discard_new_media(assets_dir: str, existing: Optional[set]) -> None:
+    """
+    撤销本次提取的图片（转换取消或失败时调用）
+    existing 为提取前目录中已有的文件名，None 表示目录是本次新建的，整个删除
+    """
+    if not os.path.isdir(assets_dir):
+        return
+    if existing is None:
+        shutil.rmtree(assets_dir, ignore_errors=True)
+        return
+    for name in os.listdir(assets_dir):
+        if name not in existing:
+            try:
+                os.remove(os.path.join(assets_dir, name))
+            except OSError:
+                pass
+
+
+def get_run_images(run, doc) -> List[Tuple[str, Optional[int]]]:
+    """
+    获取 run 中嵌入的图片
+    返回 [(压缩包内路径, 显示宽度 EMU), ...]
+    """
+    images = []
+    try:
+        for drawing in run._element.xpath('.//w:drawing'):
+            widths = drawing.xpath('.//wp:extent/@cx')
+            width = int(widths[0]) if widths else None
+            for r_id in drawing.xpath('.//a:blip/@r:embed'):
+                part = doc.part.related_parts.get(r_id)
+                if part is not None:
+                    images.append((str(part.partname).lstrip('/'), width))
+    except Exception:
+        pass
+    return images
+
+
+def format_image_ref(path: str, width: Optional[int] = None) -> str:
+    """生成 Markdown 图片引用，宽度以厘米记录以便回填"""
+    ref = f'![](<{path}>)'
+    if width:
+        ref += f'{{width={Emu(width).cm:.2f}cm}}'
+    return ref
+
+
+def iter_row_cells(row, doc=None, numbering_counters=None, media_refs=None) -> Iterator[Tuple[int, str]]:
+    """
+    遍历一行中的真实单元格，返回 (列号, 带格式内容)
+    水平合并只返回起始单元格，垂直合并的延续单元格跳过
+    """
+    # 在同一行内跟踪已处理的单元格（用于检测水平合并）
+    processed_in_row = set()
+
+    for c_idx, cell in enumerate(row.cells):
+        tc = cell._tc
+        tc_id = id(tc)
+
+        # 检查水平合并：同一行内是否已经处理过这个 tc
+        if tc_id in processed_in_row:
+            continue
+        processed_in_row.add(tc_id)
+
+        # 检查垂直合并：是否是延续单元格
+        if is_vmerge_continue(tc):
+            # 是垂直合并的延续，跳过
+            continue
+
+        # 提取带格式的内容（传入 doc 和计数器）
+        yield c_idx, extract_cell_content_with_format(cell, doc, numbering_counters, media_refs)
+
+
+def word_to_markdown(doc_path: str, md_path: Optional[str] = None,
+                     extract_images: bool = True,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     should_cancel: Optional[CancelCheck] = None) -> Tuple[bool, str]:
     """
     将 Word 文档的所有表格内容转换为 Markdown 格式
     保留格式：粗体、斜体、换行、缩进、合并单元格位置、真实列表编号
@@ -343,6 +505,12 @@ def word_to_markdown(doc_path: str, md_path: Optional[str] = None) -> Tuple[bool
     处理合并单元格的策略：
     1. 水平合并：在同一行内，通过比较相邻单元格的 tc 对象来检测
     2. 垂直合并：通过检查 vMerge 属性来判断是否是延续单元格
+
+    图片（照片、签名扫描件等）提取到 Markdown 同级的 <名称>_assets 目录
+
+    Args:
+        progress_callback: 每处理一个表格回调一次 (已完成表格数, 表格总数, 描述)
+        should_cancel: 每行检查一次，返回 True 时中止并返回 (False, CANCELLED_MESSAGE)
     """
     try:
         doc = Document(doc_path)
@@ -352,6 +520,22 @@ def word_to_markdown(doc_path: str, md_path: Optional[str] = None) -> Tuple[bool
     if md_path is None:
         md_path = str(Path(doc_path).with_suffix('.md'))
 
+    # 提取图片；取消或失败时删除本次新增的图片，已有的图片（上次导出的 Markdown 仍在引用）保留
+    media_refs = {}
+    assets_dir = None
+    existing_media = None
+    if extract_images:
+        assets_name = f"{Path(md_path).stem}_assets"
+        assets_dir = os.path.join(os.path.dirname(os.path.abspath(md_path)), assets_name)
+        if os.path.isdir(assets_dir):
+            existing_media = set(os.listdir(assets_dir))
+        try:
+            media_files = extract_media(doc_path, assets_dir)
+        except Exception as e:
+            discard_new_media(assets_dir, existing_media)
+            return False, f"无法提取图片: {e}"
+        media_refs = {member: f"{assets_name}/{filename}" for member, filename in media_files.items()}
+
     lines = []
     lines.append(f"# {Path(doc_path).stem}\n")
     lines.append(f"<!-- source: {doc_path} -->\n")
@@ -359,38 +543,35 @@ def word_to_markdown(doc_path: str, md_path: Optional[str] = None) -> Tuple[bool
     # 文档级别的编号计数器
     numbering_counters = {}
 
-    for t_idx, table in enumerate(doc.tables):
+    tables = doc.tables
+    for t_idx, table in enumerate(tables):
+        if progress_callback:
+            progress_callback(t_idx, len(tables), f"表格 {t_idx + 1}/{len(tables)}")
         lines.append(f"\n## 表格 {t_idx}\n")
 
         for r_idx, row in enumerate(table.rows):
+            if should_cancel and should_cancel():
+                if assets_dir:
+                    discard_new_media(assets_dir, existing_media)
+                return False, CANCELLED_MESSAGE
             lines.append(f"\n### 第 {r_idx} 行\n")
 
-            # 在同一行内跟踪已处理的单元格（用于检测水平合并）
-            processed_in_row = set()
-
-            for c_idx, cell in enumerate(row.cells):
-                tc = cell._tc
-                tc_id = id(tc)
-
-                # 检查水平合并：同一行内是否已经处理过这个 tc
-                if tc_id in processed_in_row:
-                    continue
-                processed_in_row.add(tc_id)
-
-                # 检查垂直合并：是否是延续单元格
-                if is_vmerge_continue(tc):
-                    # 是垂直合并的延续，跳过
-                    continue
-
-                # 提取带格式的内容（传入 doc 和计数器）
-                content = extract_cell_content_with_format(cell, doc, numbering_counters)
-
+            for c_idx, content in iter_row_cells(row, doc, numbering_counters, media_refs):
                 # 记录单元格位置和内容
                 lines.append(f"<!-- cell:{t_idx},{r_idx},{c_idx} -->\n")
                 if content:
                     lines.append(f"{content}\n")
                 lines.append(f"<!-- /cell -->\n")
 
+    if progress_callback:
+        progress_callback(len(tables), len(tables), "写入 Markdown")
+
+    # 文档中的全部图片（含表格外的图片），去重后列出
+    if media_refs:
+        lines.append("\n## 图片\n\n")
+        for ref in sorted(set(media_refs.values())):
+            lines.append(f"{format_image_ref(ref)}\n")
+
     result = ''.join(lines)
 
     try:
@@ -398,6 +579,8 @@ def word_to_markdown(doc_path: str, md_path: Optional[str] = None) -> Tuple[bool
             f.write(result)
         return True, md_path
     except Exception as e:
+        if assets_dir:
+            discard_new_media(assets_dir, existing_media)
         return False, f"无法写入 Markdown 文件: {e}"
 
 
@@ -456,10 +639,16 @@ def parse_formatted_text(text: str) -> Tuple[str, List[Dict]]:
     return indent, runs
 
 
-def markdown_to_word(md_path: str, template_path: str, output_path: str) -> Tuple[bool, str]:
+def markdown_to_word(md_path: str, template_path: str, output_path: str,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     should_cancel: Optional[CancelCheck] = None) -> Tuple[bool, str]:
     """
     根据 Markdown 内容生成 Word 文档
     解析格式标记（**bold**, *italic*）并恢复格式
+
+    Args:
+        progress_callback: 每填充一个单元格回调一次 (已完成单元格数, 单元格总数, 描述)
+        should_cancel: 每个单元格检查一次，返回 True 时中止并返回 (False, CANCELLED_MESSAGE)
     """
     try:
         with open(md_path, 'r', encoding='utf-8') as f:
@@ -477,9 +666,17 @@ def markdown_to_word(md_path: str, template_path: str, output_path: str) -> Tupl
     if not cells:
         return False, "未找到可填充的单元格"
 
+    # 图片引用相对于 Markdown 文件所在目录
+    base_dir = os.path.dirname(os.path.abspath(md_path))
+
     filled_count = 0
-    for cell_data in cells:
+    for i, cell_data in enumerate(cells):
+        if should_cancel and should_cancel():
+            return False, CANCELLED_MESSAGE
+
         t_idx, r_idx, c_idx = cell_data['pos']
+        if progress_callback:
+            progress_callback(i, len(cells), f"单元格 {t_idx},{r_idx},{c_idx}")
         value = cell_data['value']
 
         if t_idx < len(doc.tables):
@@ -488,9 +685,12 @@ def markdown_to_word(md_path: str, template_path: str, output_path: str) -> Tupl
                 row = table.rows[r_idx]
                 if c_idx < len(row.cells):
                     cell = row.cells[c_idx]
-                    fill_cell_with_format(cell, value)
+                    fill_cell_with_format(cell, value, base_dir)
                     filled_count += 1
 
+    if progress_callback:
+        progress_callback(len(cells), len(cells), "保存 Word")
+
     try:
         doc.save(output_path)
         return True, f"成功填充 {filled_count} 个单元格"
@@ -537,11 +737,12 @@ def clear_paragraph_numbering(para) -> None:
         pass
 
 
-def fill_cell_with_format(cell, value: str) -> None:
+def fill_cell_with_format(cell, value: str, base_dir: Optional[str] = None) -> None:
     """
     填充单元格，解析并恢复格式
     支持 **bold**, *italic*, ***bold+italic***
     支持缩进（编号文本已经是普通文本的一部分）
+    支持单独成行的图片引用 ![](<path>)，路径相对于 base_dir
     """
     if not cell.paragraphs:
         return
@@ -597,6 +798,18 @@ def fill_cell_with_format(cell, value: str) -> None:
         if para_format['line_spacing']:
             para.paragraph_format.line_spacing = para_format['line_spacing']
 
+        # 图片行：重新插入图片
+        image_match = IMAGE_LINE_PATTERN.match(para_text) if base_dir else None
+        if image_match:
+            image_path = os.path.join(base_dir, image_match.group(1))
+            if os.path.exists(image_path):
+                width = Cm(float(image_match.group(2))) if image_match.group(2) else None
+                try:
+                    para.add_run().add_picture(image_path, width=width)
+                    continue
+                except Exception:
+                    pass
+
         # 解析格式标记
         if para_text:
             indent, runs_data = parse_formatted_text(para_text)
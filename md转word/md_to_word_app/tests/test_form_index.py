@@ -0,0 +1,102 @@
+"""form_index 增量索引的单元测试"""
+
+import os
+
+import pytest
+
+docx = pytest.importorskip('docx')
+
+from core import form_index
+
+
+def make_form(path, rows):
+    doc = docx.Document()
+    table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+    for r_idx, row in enumerate(rows):
+        for c_idx, text in enumerate(row):
+            table.cell(r_idx, c_idx).text = text
+    doc.save(str(path))
+
+
+def cell_ids(conn, name):
+    return [row[0] for row in conn.execute(
+        'SELECT cells.id FROM cells JOIN files ON files.id = cells.file_id WHERE files.path LIKE ? '
+        'ORDER BY cells.id', ('%' + name,))]
+
+
+@pytest.fixture
+def index(tmp_path):
+    folder = tmp_path / 'forms'
+    folder.mkdir()
+    make_form(folder / 'a.docx', [['姓名', '张三'], ['部门', '研发中心']])
+    make_form(folder / 'b.docx', [['姓名', '李四'], ['部门', '市场部门']])
+    conn = form_index.open_index(str(tmp_path / 'index.db'))
+    yield conn, folder
+    conn.close()
+
+
+def test_update_index_initial(index):
+    conn, folder = index
+    stats = form_index.update_index(conn, str(folder), jobs=1)
+    assert stats == {'indexed': 2, 'unchanged': 0, 'removed': 0, 'failed': []}
+    rows = form_index.search(conn, '研发中心')
+    assert [(os.path.basename(path), t, r, c, text) for path, t, r, c, text in rows] == \
+        [('a.docx', 0, 1, 1, '研发中心')]
+    # 少于 3 个字符的关键词走 LIKE
+    assert len(form_index.search(conn, '姓名', col=0)) == 2
+
+
+def test_update_index_skips_unchanged(index):
+    conn, folder = index
+    form_index.update_index(conn, str(folder), jobs=1)
+    before = cell_ids(conn, 'b.docx')
+
+    stats = form_index.update_index(conn, str(folder), jobs=1)
+    assert stats == {'indexed': 0, 'unchanged': 2, 'removed': 0, 'failed': []}
+
+    # 只有 mtime 变化: 比较哈希后不重新解析
+    st = os.stat(folder / 'b.docx')
+    os.utime(folder / 'b.docx', ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    stats = form_index.update_index(conn, str(folder), jobs=1)
+    assert stats['indexed'] == 0 and stats['unchanged'] == 2
+    assert cell_ids(conn, 'b.docx') == before
+
+
+def test_update_index_reindexes_changed_only(index):
+    conn, folder = index
+    form_index.update_index(conn, str(folder), jobs=1)
+    before = cell_ids(conn, 'b.docx')
+
+    make_form(folder / 'a.docx', [['姓名', '张三'], ['部门', '质量管理部']])
+    os.remove(folder / 'b.docx')
+    make_form(folder / 'c.docx', [['项目', '检索索引']])
+    stats = form_index.update_index(conn, str(folder), jobs=1)
+    assert stats == {'indexed': 2, 'unchanged': 0, 'removed': 1, 'failed': []}
+    assert before and cell_ids(conn, 'b.docx') == []
+    assert form_index.search(conn, '研发中心') == []
+    assert len(form_index.search(conn, '质量管理')) == 1
+    assert len(form_index.search(conn, '检索索引')) == 1
+
+
+def test_update_index_reports_broken_file(index):
+    conn, folder = index
+    (folder / 'broken.docx').write_bytes(b'not a docx')
+    (folder / '~$a.docx').write_bytes(b'lock file')
+    stats = form_index.update_index(conn, str(folder), jobs=1)
+    assert stats['indexed'] == 2
+    assert [os.path.basename(path) for path, _ in stats['failed']] == ['broken.docx']
+
+
+def test_search_short_keyword_escapes_like_wildcards(tmp_path):
+    folder = tmp_path / 'forms'
+    folder.mkdir()
+    make_form(folder / 'a.docx', [['完成率', '50%'], ['编号', 'a_b']])
+    make_form(folder / 'b.docx', [['完成率', '500'], ['编号', 'axb']])
+    conn = form_index.open_index(str(tmp_path / 'index.db'))
+    try:
+        form_index.update_index(conn, str(folder), jobs=1)
+        assert [row[4] for row in form_index.search(conn, '0%')] == ['50%']
+        assert [row[4] for row in form_index.search(conn, 'a_')] == ['a_b']
+        assert form_index.search(conn, '\\') == []
+    finally:
+        conn.close()
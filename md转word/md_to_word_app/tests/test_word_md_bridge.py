@@ -0,0 +1,104 @@
+"""Word <-> Markdown 图片提取与回填的单元测试"""
+
+import os
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+docx = pytest.importorskip('docx')
+
+from docx.shared import Cm
+
+from core import word_md_bridge
+
+
+def make_png(color):
+    """生成 2x2 的纯色 PNG"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    raw = b''.join(b'\x00' + bytes(color) * 2 for _ in range(2))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', 2, 2, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+def make_doc_with_images(path, tmp_path):
+    red = tmp_path / 'red.png'
+    red.write_bytes(make_png((255, 0, 0)))
+    blue = tmp_path / 'blue.png'
+    blue.write_bytes(make_png((0, 0, 255)))
+    doc = docx.Document()
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = '照片'
+    table.cell(0, 1).paragraphs[0].add_run().add_picture(str(red), width=Cm(2))
+    table.cell(1, 0).text = '签名'
+    table.cell(1, 1).paragraphs[0].add_run().add_picture(str(blue), width=Cm(3))
+    doc.save(str(path))
+
+
+def test_extract_media_deduplicates_by_content(tmp_path):
+    doc_path = tmp_path / 'a.docx'
+    with zipfile.ZipFile(doc_path, 'w') as zf:
+        zf.writestr('word/document.xml', '<w:document/>')
+        zf.writestr('word/media/image1.png', make_png((255, 0, 0)))
+        zf.writestr('word/media/image2.png', make_png((255, 0, 0)))
+        zf.writestr('word/media/image3.png', make_png((0, 255, 0)))
+    assets = tmp_path / 'a_assets'
+    media = word_md_bridge.extract_media(str(doc_path), str(assets), max_workers=2)
+    assert set(media) == {'word/media/image1.png', 'word/media/image2.png', 'word/media/image3.png'}
+    assert media['word/media/image1.png'] == media['word/media/image2.png']
+    assert media['word/media/image1.png'] != media['word/media/image3.png']
+    assert sorted(os.listdir(assets)) == sorted(set(media.values()))
+
+
+def test_extract_media_without_images(tmp_path):
+    doc_path = tmp_path / 'a.docx'
+    docx.Document().save(str(doc_path))
+    assert word_md_bridge.extract_media(str(doc_path), str(tmp_path / 'a_assets')) == {}
+    assert not (tmp_path / 'a_assets').exists()
+
+
+def test_image_round_trip(tmp_path):
+    doc_path = tmp_path / 'form.docx'
+    make_doc_with_images(doc_path, tmp_path)
+    md_path = tmp_path / 'form.md'
+    ok, message = word_md_bridge.word_to_markdown(str(doc_path), str(md_path))
+    assert ok, message
+    content = md_path.read_text(encoding='utf-8')
+    refs = [match.groups() for match in map(word_md_bridge.IMAGE_LINE_PATTERN.match, content.splitlines())
+            if match]
+    assert {width for _, width in refs} >= {'2.00', '3.00'}
+    assert all((tmp_path / path).exists() for path, _ in refs)
+
+    # 回填到空白模板: 图片按原宽度重新插入
+    template = tmp_path / 'template.docx'
+    blank = docx.Document()
+    blank.add_table(rows=2, cols=2)
+    blank.save(str(template))
+    output = tmp_path / 'filled.docx'
+    ok, message = word_md_bridge.markdown_to_word(str(md_path), str(template), str(output))
+    assert ok, message
+    filled = docx.Document(str(output))
+    assert filled.tables[0].cell(0, 0).text.replace('\u200b', '') == '照片'
+    shapes = filled.inline_shapes
+    assert len(shapes) == 2
+    assert [round(shape.width.cm, 2) for shape in shapes] == [2.0, 3.0]
+
+
+def test_cancel_removes_new_assets(tmp_path):
+    doc_path = tmp_path / 'form.docx'
+    make_doc_with_images(doc_path, tmp_path)
+    md_path = tmp_path / 'form.md'
+    ok, message = word_md_bridge.word_to_markdown(str(doc_path), str(md_path), should_cancel=lambda: True)
+    assert not ok and message == word_md_bridge.CANCELLED_MESSAGE
+    assert not (tmp_path / 'form_assets').exists()
+    assert not md_path.exists()
+
+    # 已有的 assets 目录只删除本次新增的文件
+    assets = tmp_path / 'form_assets'
+    assets.mkdir()
+    (assets / 'old.png').write_bytes(b'old')
+    word_md_bridge.word_to_markdown(str(doc_path), str(md_path), should_cancel=lambda: True)
+    assert os.listdir(assets) == ['old.png']
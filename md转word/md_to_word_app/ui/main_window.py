@@ -6,17 +6,21 @@
 import os
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QCheckBox, QComboBox, QSpinBox,
-    QGroupBox, QFileDialog, QMessageBox, QFrame, QTabWidget
+    QGroupBox, QFileDialog, QMessageBox, QFrame, QTabWidget, QProgressBar,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QScrollArea
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings
-from PyQt5.QtGui import QDragEnterEvent, QDropEvent, QFont, QPixmap
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings, QObject, QRunnable, QThreadPool
+from PyQt5.QtGui import QDragEnterEvent, QDropEvent, QFont, QPixmap, QColor
 
 # 导入转换服务
-from core.converter import ConverterService
-from core.word_md_bridge import word_to_markdown, markdown_to_word, get_template_source
+from core.converter import ConverterService, ConversionHandle, CANCELLED_MESSAGE as CONVERT_CANCELLED_MESSAGE
+from core.word_md_bridge import word_to_markdown, markdown_to_word, get_template_source, CANCELLED_MESSAGE
 
 
 # 深色主题配色
@@ -226,6 +230,43 @@ QSpinBox::up-button, QSpinBox::down-button {{
     border: none;
 }}
 
+/* 进度条样式 */
+QProgressBar {{
+    background-color: {colors['bg_secondary']};
+    border: 1px solid {colors['border_subtle']};
+    border-radius: 4px;
+    max-height: 8px;
+}}
+
+QProgressBar::chunk {{
+    background-color: {colors['accent_primary']};
+    border-radius: 4px;
+}}
+
+/* 表格样式 */
+QTableWidget {{
+    background-color: {colors['bg_card']};
+    border: 1px solid {colors['border_subtle']};
+    border-radius: 6px;
+    color: {colors['text_primary']};
+    gridline-color: {colors['border_subtle']};
+    font-size: 12px;
+}}
+
+QTableWidget::item:selected {{
+    background-color: {colors['accent_primary']};
+    color: white;
+}}
+
+QHeaderView::section {{
+    background-color: {colors['bg_secondary']};
+    color: {colors['text_secondary']};
+    border: none;
+    border-bottom: 1px solid {colors['border_subtle']};
+    padding: 4px 6px;
+    font-size: 12px;
+}}
+
 /* 消息框样式 */
 QMessageBox {{
     background-color: {colors['bg_card']};
@@ -255,6 +296,11 @@ class ConverterThread(QThread):
         self.output_file = output_file
         self.options = options
         self.converter = ConverterService()
+        self.handle = ConversionHandle()
+
+    def cancel(self):
+        """结束 Pandoc 子进程并中止后处理"""
+        self.handle.cancel()
 
     def run(self):
         try:
@@ -262,7 +308,8 @@ class ConverterThread(QThread):
             success, message = self.converter.convert(
                 self.input_file,
                 self.output_file,
-                self.options
+                self.options,
+                handle=self.handle
             )
             if success:
                 self.finished.emit(self.output_file)
@@ -272,6 +319,74 @@ class ConverterThread(QThread):
             self.error.emit(str(e))
 
 
+# Word ↔ Markdown 任务类型
+JOB_WORD_TO_MD = 'w2m'
+JOB_MD_TO_WORD = 'm2w'
+
+
+class BridgeThread(QThread):
+    """Word ↔ Markdown 异步队列线程，按顺序处理排队的任务"""
+    progress = pyqtSignal(int, int, str)        # 已完成, 总数, 描述
+    item_started = pyqtSignal(str, str, int)    # 任务类型, 输入文件, 剩余排队数
+    item_finished = pyqtSignal(str, str, str)   # 任务类型, 输出文件, 消息
+    item_failed = pyqtSignal(str, str, str)     # 任务类型, 输入文件, 错误信息
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = deque()
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def enqueue(self, kind, input_path, output_path, template_path=None):
+        """添加任务到队列（线程安全）"""
+        with self._lock:
+            self._jobs.append((kind, input_path, output_path, template_path))
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def cancel(self):
+        """取消当前任务并清空队列"""
+        with self._lock:
+            self._jobs.clear()
+            self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        while True:
+            with self._lock:
+                if not self._jobs:
+                    return
+                kind, input_path, output_path, template_path = self._jobs.popleft()
+                remaining = len(self._jobs)
+                self._cancelled = False
+
+            self.item_started.emit(kind, input_path, remaining)
+            try:
+                if kind == JOB_WORD_TO_MD:
+                    success, message = word_to_markdown(
+                        input_path, output_path,
+                        progress_callback=self.progress.emit,
+                        should_cancel=self.is_cancelled
+                    )
+                else:
+                    success, message = markdown_to_word(
+                        input_path, template_path, output_path,
+                        progress_callback=self.progress.emit,
+                        should_cancel=self.is_cancelled
+                    )
+            except Exception as e:
+                success, message = False, str(e)
+
+            if success:
+                self.item_finished.emit(kind, output_path, message)
+            else:
+                self.item_failed.emit(kind, input_path, message)
+
+
 class FileDropZone(QFrame):
     """通用拖拽区域组件"""
     file_dropped = pyqtSignal(str)
@@ -554,6 +669,338 @@ class ThemeToggleButton(QPushButton):
         self.update_icon()
 
 
+# 批量队列状态
+BATCH_PENDING = '等待'
+BATCH_QUEUED = '排队中'
+BATCH_RUNNING = '转换中'
+BATCH_DONE = '完成'
+BATCH_FAILED = '失败'
+BATCH_CANCELLED = '已取消'
+
+# 批量队列支持的 Markdown 扩展名
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+
+
+class BatchTaskSignals(QObject):
+    """批量任务信号（QRunnable 本身不能发信号）"""
+    started = pyqtSignal(int)                      # 行号
+    finished = pyqtSignal(int, bool, str, float)   # 行号, 是否成功, 消息, 耗时(秒)
+
+
+class BatchConvertTask(QRunnable):
+    """在线程池中执行的单个 Markdown → Word 转换"""
+
+    def __init__(self, row, input_file, output_file, options):
+        super().__init__()
+        self.row = row
+        self.input_file = input_file
+        self.output_file = output_file
+        self.options = options
+        self.handle = ConversionHandle()
+        self.signals = BatchTaskSignals()
+
+    def run(self):
+        # 排队期间已被取消
+        if self.handle.cancelled:
+            self.signals.finished.emit(self.row, False, CONVERT_CANCELLED_MESSAGE, 0.0)
+            return
+
+        self.signals.started.emit(self.row)
+        start = time.perf_counter()
+        try:
+            success, message = ConverterService().convert(
+                self.input_file, self.output_file, self.options, handle=self.handle)
+        except Exception as e:
+            success, message = False, str(e)
+        self.signals.finished.emit(self.row, success, message, time.perf_counter() - start)
+
+
+class BatchQueuePanel(QFrame):
+    """
+    批量转换队列面板
+    - 支持拖入多个文件或整个文件夹
+    - 线程池并发转换，可配置并发数
+    - 显示每项状态、耗时、输出大小，失败项可重试
+    """
+    COLUMNS = ['文件', '状态', '耗时', '大小']
+
+    def __init__(self, colors, options_provider, parent=None):
+        super().__init__(parent)
+        self.colors = colors
+        # 返回当前转换选项的回调
+        self.options_provider = options_provider
+        # [{'input': ..., 'output': ..., 'status': ..., 'message': ...}]
+        self.items = []
+        self.running_count = 0
+        # 已提交但未结束的任务 {行号: BatchConvertTask}
+        self.tasks = {}
+        self.pool = QThreadPool(self)
+        self.setAcceptDrops(True)
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.apply_normal_style()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(8)
+
+        header = QHBoxLayout()
+        header.setSpacing(8)
+        self.title_label = QLabel("批量队列 (拖入多个文件或文件夹)")
+        header.addWidget(self.title_label)
+        header.addStretch()
+        self.workers_label = QLabel("并发数")
+        header.addWidget(self.workers_label)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spin.setValue(min(4, self.workers_spin.maximum()))
+        self.workers_spin.setFixedWidth(60)
+        self.workers_spin.valueChanged.connect(self.pool.setMaxThreadCount)
+        self.pool.setMaxThreadCount(self.workers_spin.value())
+        header.addWidget(self.workers_spin)
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for col in range(1, len(self.COLUMNS)):
+            self.table.horizontalHeader().setSectionResizeMode(col, QHeaderView.ResizeToContents)
+        self.table.setMinimumHeight(140)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.setSpacing(8)
+        self.add_files_btn = SecondaryButton("添加文件...", self.colors)
+        self.add_files_btn.clicked.connect(self.on_add_files)
+        btn_layout.addWidget(self.add_files_btn)
+        self.add_folder_btn = SecondaryButton("添加文件夹...", self.colors)
+        self.add_folder_btn.clicked.connect(self.on_add_folder)
+        btn_layout.addWidget(self.add_folder_btn)
+        self.retry_btn = SecondaryButton("重试失败", self.colors)
+        self.retry_btn.clicked.connect(self.on_retry_failed)
+        btn_layout.addWidget(self.retry_btn)
+        self.cancel_btn = SecondaryButton("全部取消", self.colors)
+        self.cancel_btn.clicked.connect(self.on_cancel_all)
+        btn_layout.addWidget(self.cancel_btn)
+        self.clear_btn = SecondaryButton("清空", self.colors)
+        self.clear_btn.clicked.connect(self.on_clear)
+        btn_layout.addWidget(self.clear_btn)
+        layout.addLayout(btn_layout)
+
+        self.start_btn = GradientButton("开始批量转换", self.colors)
+        self.start_btn.clicked.connect(self.on_start)
+        layout.addWidget(self.start_btn)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.summary_label)
+
+        self.update_label_styles()
+        self.update_buttons()
+
+    def apply_normal_style(self):
+        self.setStyleSheet(f"""
+            BatchQueuePanel {{
+                background-color: {self.colors['bg_primary']};
+                border: 1px solid {self.colors['border_subtle']};
+                border-radius: 10px;
+            }}
+        """)
+
+    def apply_drag_style(self):
+        self.setStyleSheet(f"""
+            BatchQueuePanel {{
+                background-color: {self.colors['drag_bg']};
+                border: 1px dashed {self.colors['accent_primary']};
+                border-radius: 10px;
+            }}
+        """)
+
+    def update_label_styles(self):
+        self.title_label.setStyleSheet(f"""
+            color: {self.colors['text_primary']};
+            font-size: 14px;
+            font-weight: 600;
+            background: transparent;
+        """)
+        for label in [self.workers_label, self.summary_label]:
+            label.setStyleSheet(f"""
+                color: {self.colors['text_secondary']};
+                font-size: 13px;
+                background: transparent;
+            """)
+
+    def update_theme(self, colors):
+        self.colors = colors
+        self.apply_normal_style()
+        self.update_label_styles()
+        for btn in [self.add_files_btn, self.add_folder_btn, self.retry_btn, self.cancel_btn,
+                    self.clear_btn, self.start_btn]:
+            btn.update_theme(colors)
+
+    # ----- 添加文件 -----
+
+    def add_paths(self, paths):
+        """添加文件或文件夹（递归查找 Markdown 文件），已在队列中的文件忽略"""
+        existing = {os.path.normcase(os.path.abspath(item['input'])) for item in self.items}
+        for path in paths:
+            if os.path.isdir(path):
+                files = []
+                for root, dirs, filenames in os.walk(path):
+                    for filename in sorted(filenames):
+                        if filename.lower().endswith(MARKDOWN_EXTENSIONS) and not filename.startswith('_temp_processed'):
+                            files.append(os.path.join(root, filename))
+            elif path.lower().endswith(MARKDOWN_EXTENSIONS):
+                files = [path]
+            else:
+                files = []
+
+            for file_path in files:
+                key = os.path.normcase(os.path.abspath(file_path))
+                if key in existing:
+                    continue
+                existing.add(key)
+                self.add_item(file_path)
+        self.update_buttons()
+
+    def add_item(self, input_file):
+        row = len(self.items)
+        self.items.append({
+            'input': input_file,
+            'output': os.path.splitext(input_file)[0] + '.docx',
+            'status': BATCH_PENDING,
+            'message': '',
+        })
+        self.table.insertRow(row)
+        name_item = QTableWidgetItem(os.path.basename(input_file))
+        name_item.setToolTip(input_file)
+        self.table.setItem(row, 0, name_item)
+        for col in range(1, len(self.COLUMNS)):
+            self.table.setItem(row, col, QTableWidgetItem(''))
+        self.set_row_status(row, BATCH_PENDING)
+
+    def set_row_status(self, row, status, elapsed=None, size=None, message=''):
+        item = self.items[row]
+        item['status'] = status
+        item['message'] = message
+        status_item = self.table.item(row, 1)
+        status_item.setText(status)
+        status_item.setToolTip(message)
+        if status in (BATCH_FAILED, BATCH_CANCELLED):
+            status_item.setForeground(QColor(self.colors['error']))
+        elif status == BATCH_DONE:
+            status_item.setForeground(QColor(self.colors['success']))
+        else:
+            status_item.setForeground(QColor(self.colors['text_primary']))
+        self.table.item(row, 2).setText(f"{elapsed:.1f}s" if elapsed is not None else '')
+        self.table.item(row, 3).setText(f"{size / 1024:.1f} KB" if size is not None else '')
+
+    def on_add_files(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "选择 Markdown 文件", "",
+            "Markdown 文件 (*.md *.markdown);;所有文件 (*.*)"
+        )
+        if file_paths:
+            self.add_paths(file_paths)
+
+    def on_add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "选择文件夹")
+        if folder:
+            self.add_paths([folder])
+
+    def dragEnterEvent(self, event: QDragEnterEvent):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+            self.apply_drag_style()
+            return
+        event.ignore()
+
+    def dragLeaveEvent(self, event):
+        self.apply_normal_style()
+
+    def dropEvent(self, event: QDropEvent):
+        self.apply_normal_style()
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        if paths:
+            self.add_paths(paths)
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    # ----- 执行 -----
+
+    def submit(self, row):
+        item = self.items[row]
+        task = BatchConvertTask(row, item['input'], item['output'], self.options_provider())
+        task.signals.started.connect(self.on_task_started)
+        task.signals.finished.connect(self.on_task_finished)
+        self.tasks[row] = task
+        self.running_count += 1
+        self.pool.start(task)
+
+    def on_start(self):
+        rows = [row for row, item in enumerate(self.items) if item['status'] == BATCH_PENDING]
+        for row in rows:
+            self.set_row_status(row, BATCH_QUEUED)
+            self.submit(row)
+        self.update_buttons()
+
+    def on_retry_failed(self):
+        for row, item in enumerate(self.items):
+            if item['status'] in (BATCH_FAILED, BATCH_CANCELLED):
+                self.set_row_status(row, BATCH_QUEUED)
+                self.submit(row)
+        self.update_buttons()
+
+    def on_cancel_all(self):
+        """取消排队中和正在运行的任务（结束对应的 Pandoc 进程）"""
+        for task in self.tasks.values():
+            task.handle.cancel()
+
+    def on_clear(self):
+        """清空已结束的项（运行中的不受影响）"""
+        if self.running_count:
+            QMessageBox.warning(self, "警告", "队列运行中，请等待完成后再清空")
+            return
+        self.items = []
+        self.table.setRowCount(0)
+        self.summary_label.setText("")
+        self.update_buttons()
+
+    def on_task_started(self, row):
+        self.set_row_status(row, BATCH_RUNNING)
+
+    def on_task_finished(self, row, success, message, elapsed):
+        self.running_count -= 1
+        self.tasks.pop(row, None)
+        if success:
+            output = self.items[row]['output']
+            size = os.path.getsize(output) if os.path.exists(output) else None
+            self.set_row_status(row, BATCH_DONE, elapsed, size, message)
+        elif message == CONVERT_CANCELLED_MESSAGE:
+            self.set_row_status(row, BATCH_CANCELLED, elapsed, message=message)
+        else:
+            self.set_row_status(row, BATCH_FAILED, elapsed, message=message)
+        self.update_buttons()
+
+    def update_buttons(self):
+        statuses = [item['status'] for item in self.items]
+        self.start_btn.setEnabled(BATCH_PENDING in statuses)
+        self.retry_btn.setEnabled(BATCH_FAILED in statuses or BATCH_CANCELLED in statuses)
+        self.cancel_btn.setEnabled(self.running_count > 0)
+        self.clear_btn.setEnabled(bool(self.items) and self.running_count == 0)
+
+        if self.items:
+            done = statuses.count(BATCH_DONE)
+            failed = statuses.count(BATCH_FAILED) + statuses.count(BATCH_CANCELLED)
+            self.summary_label.setText(
+                f"共 {len(self.items)} 个: 完成 {done}, 失败/取消 {failed}, 运行/排队 {self.running_count}")
+
+
 class MainWindow(QMainWindow):
     """主窗口 - 支持主题切换和双标签页"""
 
@@ -564,6 +1011,13 @@ class MainWindow(QMainWindow):
         # Word转MD 相关
         self.word_template_path = None
         self.md_file_path = None
+        self.word_file_paths = []
+        self.md_file_paths = []
+        # Word ↔ MD 任务队列
+        self.bridge_thread = None
+        self.bridge_errors = []
+        self.bridge_cancel_requested = False
+        self.bridge_current_name = ''
 
         # 加载用户主题偏好
         self.settings = QSettings("MD2Word", "MarkdownToWord")
@@ -618,8 +1072,10 @@ class MainWindow(QMainWindow):
         self.drop_zone.update_theme(self.colors)
         self.select_btn.update_theme(self.colors)
         self.convert_btn.update_theme(self.colors)
+        self.cancel_convert_btn.update_theme(self.colors)
         self.open_file_btn.update_theme(self.colors)
         self.open_folder_btn.update_theme(self.colors)
+        self.batch_panel.update_theme(self.colors)
         self.theme_btn.set_dark_mode(self.is_dark_theme, self.colors)
 
         # 选项组
@@ -632,7 +1088,7 @@ class MainWindow(QMainWindow):
         """)
 
         # 标签
-        for label in [self.toc_depth_label, self.chinese_font_label, self.code_font_label, self.font_size_label, self.line_spacing_label, self.highlight_label]:
+        for label in [self.toc_depth_label, self.chinese_font_label, self.code_font_label, self.font_size_label, self.line_spacing_label, self.highlight_label, self.timeout_label, self.memory_limit_label]:
             label.setStyleSheet(f"""
                 color: {self.colors['text_secondary']};
                 font-size: 14px;
@@ -694,6 +1150,12 @@ class MainWindow(QMainWindow):
         self.w2m_open_folder_btn.update_theme(self.colors)
         self.m2w_open_file_btn.update_theme(self.colors)
         self.m2w_open_folder_btn.update_theme(self.colors)
+        self.bridge_cancel_btn.update_theme(self.colors)
+        self.bridge_status_label.setStyleSheet(f"""
+            color: {self.colors['text_muted']};
+            font-size: 13px;
+            background: transparent;
+        """)
 
         # Word转MD标签页标签更新
         for label in [self.word_to_md_label, self.md_to_word_label]:
@@ -764,7 +1226,12 @@ class MainWindow(QMainWindow):
         # 创建 MD转Word 标签页
         self.md_to_word_tab = QWidget()
         self.setup_md_to_word_tab()
-        self.tab_widget.addTab(self.md_to_word_tab, "MD转Word")
+        # 内容较多（含批量队列），放入滚动区域
+        self.md_to_word_scroll = QScrollArea()
+        self.md_to_word_scroll.setWidgetResizable(True)
+        self.md_to_word_scroll.setFrameShape(QFrame.NoFrame)
+        self.md_to_word_scroll.setWidget(self.md_to_word_tab)
+        self.tab_widget.addTab(self.md_to_word_scroll, "MD转Word")
 
         # 创建 Word转MD 标签页
         self.word_to_md_tab = QWidget()
@@ -869,6 +1336,29 @@ class MainWindow(QMainWindow):
         line_spacing_layout.addStretch()
         options_layout.addLayout(line_spacing_layout)
 
+        # 超时与内存上限（0 表示不限）
+        limits_layout = QHBoxLayout()
+        limits_layout.setSpacing(10)
+        self.timeout_label = QLabel("超时(秒)")
+        limits_layout.addWidget(self.timeout_label)
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(0, 3600)
+        self.timeout_spin.setValue(0)
+        self.timeout_spin.setSpecialValueText("不限")
+        self.timeout_spin.setFixedWidth(80)
+        limits_layout.addWidget(self.timeout_spin)
+        self.memory_limit_label = QLabel("内存上限(MB)")
+        limits_layout.addWidget(self.memory_limit_label)
+        self.memory_limit_spin = QSpinBox()
+        self.memory_limit_spin.setRange(0, 65536)
+        self.memory_limit_spin.setSingleStep(256)
+        self.memory_limit_spin.setValue(0)
+        self.memory_limit_spin.setSpecialValueText("不限")
+        self.memory_limit_spin.setFixedWidth(80)
+        limits_layout.addWidget(self.memory_limit_spin)
+        limits_layout.addStretch()
+        options_layout.addLayout(limits_layout)
+
         # 分割线2
         self.separator2 = QFrame()
         self.separator2.setFrameShape(QFrame.HLine)
@@ -908,6 +1398,12 @@ class MainWindow(QMainWindow):
         self.convert_btn.setEnabled(False)
         tab_layout.addWidget(self.convert_btn)
 
+        # 取消按钮（转换中显示）
+        self.cancel_convert_btn = SecondaryButton("取消转换", self.colors)
+        self.cancel_convert_btn.clicked.connect(self.on_cancel_convert)
+        self.cancel_convert_btn.hide()
+        tab_layout.addWidget(self.cancel_convert_btn)
+
         # 状态标签
         self.status_label = QLabel("")
         self.status_label.setAlignment(Qt.AlignCenter)
@@ -947,6 +1443,10 @@ class MainWindow(QMainWindow):
         self.result_frame.hide()
         tab_layout.addWidget(self.result_frame)
 
+        # 批量队列
+        self.batch_panel = BatchQueuePanel(self.colors, self.get_convert_options)
+        tab_layout.addWidget(self.batch_panel)
+
         tab_layout.addStretch()
 
     def setup_word_to_md_tab(self):
@@ -1093,6 +1593,24 @@ class MainWindow(QMainWindow):
         self.md_to_word_result_frame.hide()
         tab_layout.addWidget(self.md_to_word_result_frame)
 
+        # ========== 任务队列状态 ==========
+        self.bridge_status_label = QLabel("")
+        self.bridge_status_label.setAlignment(Qt.AlignCenter)
+        self.bridge_status_label.setWordWrap(True)
+        tab_layout.addWidget(self.bridge_status_label)
+
+        bridge_progress_layout = QHBoxLayout()
+        bridge_progress_layout.setSpacing(8)
+        self.bridge_progress = QProgressBar()
+        self.bridge_progress.setTextVisible(False)
+        self.bridge_progress.hide()
+        bridge_progress_layout.addWidget(self.bridge_progress)
+        self.bridge_cancel_btn = SecondaryButton("取消", self.colors)
+        self.bridge_cancel_btn.clicked.connect(self.on_cancel_bridge)
+        self.bridge_cancel_btn.hide()
+        bridge_progress_layout.addWidget(self.bridge_cancel_btn)
+        tab_layout.addLayout(bridge_progress_layout)
+
         tab_layout.addStretch()
 
     def on_toc_changed(self):
@@ -1149,6 +1667,20 @@ class MainWindow(QMainWindow):
             """)
             self.result_frame.hide()
 
+    def get_convert_options(self):
+        """当前界面上的转换选项"""
+        return {
+            'generate_toc': self.toc_checkbox.isChecked(),
+            'toc_depth': self.toc_depth_spin.value(),
+            'highlight_style': self.highlight_combo.currentText(),
+            'chinese_font': self.chinese_font_combo.currentText(),
+            'code_font': self.code_font_combo.currentText(),
+            'font_size': float(self.font_size_combo.currentText()),
+            'line_spacing': float(self.line_spacing_combo.currentText()),
+            'timeout': self.timeout_spin.value(),
+            'memory_limit_mb': self.memory_limit_spin.value()
+        }
+
     def on_convert(self):
         if not self.current_file:
             QMessageBox.warning(self, "警告", "请先选择要转换的文件")
@@ -1160,15 +1692,7 @@ class MainWindow(QMainWindow):
 
         output_file = os.path.splitext(self.current_file)[0] + '.docx'
 
-        options = {
-            'generate_toc': self.toc_checkbox.isChecked(),
-            'toc_depth': self.toc_depth_spin.value(),
-            'highlight_style': self.highlight_combo.currentText(),
-            'chinese_font': self.chinese_font_combo.currentText(),
-            'code_font': self.code_font_combo.currentText(),
-            'font_size': float(self.font_size_combo.currentText()),
-            'line_spacing': float(self.line_spacing_combo.currentText())
-        }
+        options = self.get_convert_options()
 
         self.convert_btn.setEnabled(False)
         self.convert_btn.setText("转换中...")
@@ -1180,12 +1704,22 @@ class MainWindow(QMainWindow):
         self.converter_thread.finished.connect(self.on_finished)
         self.converter_thread.error.connect(self.on_error)
         self.converter_thread.start()
+        self.cancel_convert_btn.setEnabled(True)
+        self.cancel_convert_btn.show()
+
+    def on_cancel_convert(self):
+        """结束正在运行的 Pandoc 进程"""
+        if self.converter_thread is not None and self.converter_thread.isRunning():
+            self.converter_thread.cancel()
+            self.cancel_convert_btn.setEnabled(False)
+            self.status_label.setText("正在取消...")
 
     def on_progress(self, message):
         self.status_label.setText(message)
 
     def on_finished(self, output_file):
         self.output_file = output_file
+        self.cancel_convert_btn.hide()
         self.convert_btn.setEnabled(True)
         self.convert_btn.setText("开始转换")
         self.status_label.setText("")
@@ -1193,8 +1727,12 @@ class MainWindow(QMainWindow):
         self.result_frame.show()
 
     def on_error(self, error_message):
+        self.cancel_convert_btn.hide()
         self.convert_btn.setEnabled(True)
         self.convert_btn.setText("开始转换")
+        if error_message == CONVERT_CANCELLED_MESSAGE:
+            self.status_label.setText("已取消")
+            return
         self.status_label.setText("转换失败")
         self.status_label.setStyleSheet(f"""
             color: {self.colors['error']};
@@ -1228,50 +1766,41 @@ class MainWindow(QMainWindow):
     def on_word_file_dropped(self, file_path):
         """Word 文件拖拽（用于转换为 MD）"""
         self.word_file_path = file_path
+        self.word_file_paths = [file_path]
         self.word_to_md_btn.setEnabled(True)
         self.word_to_md_result_frame.hide()
 
     def on_select_word_file(self):
-        """选择 Word 文件（用于转换为 MD）"""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """选择 Word 文件（用于转换为 MD），可多选"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, "选择 Word 文件", "",
             "Word 文件 (*.docx);;所有文件 (*.*)"
         )
-        if file_path:
-            self.word_file_path = file_path
-            self.word_drop_zone.set_file(file_path)
+        if file_paths:
+            self.word_file_path = file_paths[0]
+            self.word_file_paths = file_paths
+            self.word_drop_zone.set_file(file_paths[0])
+            if len(file_paths) > 1:
+                self.word_drop_zone.file_label.setText(
+                    f"{os.path.basename(file_paths[0])} 等 {len(file_paths)} 个文件")
             self.word_to_md_btn.setEnabled(True)
             self.word_to_md_result_frame.hide()
 
     def on_convert_word_to_md(self):
-        """将 Word 转换为 MD"""
-        if not hasattr(self, 'word_file_path') or not self.word_file_path:
+        """将 Word 转换为 MD（加入后台队列）"""
+        if not self.word_file_paths:
             QMessageBox.warning(self, "警告", "请先选择 Word 文件")
             return
 
-        if not os.path.exists(self.word_file_path):
+        file_paths = [path for path in self.word_file_paths if os.path.exists(path)]
+        if not file_paths:
             QMessageBox.warning(self, "警告", "Word 文件不存在")
             return
 
-        # 生成输出文件路径
-        base_name = os.path.splitext(self.word_file_path)[0]
-        output_path = base_name + '.md'
-
-        self.word_to_md_btn.setEnabled(False)
-        self.word_to_md_btn.setText("转换中...")
-
-        success, result = word_to_markdown(self.word_file_path, output_path)
-
-        self.word_to_md_btn.setEnabled(True)
-        self.word_to_md_btn.setText("转换为 MD")
-
-        if success:
-            self.w2m_output_file = output_path
-            self.w2m_result_label.setText(f"输出: {os.path.basename(output_path)}")
-            self.word_to_md_result_frame.show()
-            self._apply_success_style_w2m()
-        else:
-            QMessageBox.critical(self, "转换失败", result)
+        for file_path in file_paths:
+            # 生成输出文件路径
+            output_path = os.path.splitext(file_path)[0] + '.md'
+            self._enqueue_bridge_job(JOB_WORD_TO_MD, file_path, output_path)
 
     def _apply_success_style_w2m(self):
         """应用 Word→MD 成功样式"""
@@ -1326,60 +1855,134 @@ class MainWindow(QMainWindow):
     def on_md_file_dropped(self, file_path):
         """MD 文件拖拽（用于填充回 Word）"""
         self.md_file_path = file_path
+        self.md_file_paths = [file_path]
         self.md_to_word_btn.setEnabled(True)
         self.md_to_word_result_frame.hide()
 
     def on_select_md_file(self):
-        """选择填充好的 MD 文件"""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """选择填充好的 MD 文件，可多选"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, "选择 Markdown 文件", "",
             "Markdown 文件 (*.md);;所有文件 (*.*)"
         )
-        if file_path:
-            self.md_file_path = file_path
-            self.md_drop_zone.set_file(file_path)
+        if file_paths:
+            self.md_file_path = file_paths[0]
+            self.md_file_paths = file_paths
+            self.md_drop_zone.set_file(file_paths[0])
+            if len(file_paths) > 1:
+                self.md_drop_zone.file_label.setText(
+                    f"{os.path.basename(file_paths[0])} 等 {len(file_paths)} 个文件")
             self.md_to_word_btn.setEnabled(True)
             self.md_to_word_result_frame.hide()
 
     def on_convert_md_to_word(self):
-        """将 MD 内容填充回 Word"""
-        if not hasattr(self, 'md_file_path') or not self.md_file_path:
+        """将 MD 内容填充回 Word（加入后台队列）"""
+        if not self.md_file_paths:
             QMessageBox.warning(self, "警告", "请先选择 MD 文件")
             return
 
-        if not os.path.exists(self.md_file_path):
-            QMessageBox.warning(self, "警告", "MD 文件不存在")
-            return
+        problems = []
+        for md_path in self.md_file_paths:
+            name = os.path.basename(md_path)
+            if not os.path.exists(md_path):
+                problems.append(f"{name}: MD 文件不存在")
+                continue
+
+            # 从 MD 文件中获取源 Word 路径
+            source_path = get_template_source(md_path)
+            if not source_path:
+                problems.append(f"{name}: 没有找到源 Word 模板路径，请确保 MD 文件包含 <!-- source: ... --> 注释")
+                continue
+
+            if not os.path.exists(source_path):
+                problems.append(f"{name}: 源 Word 模板不存在 {source_path}")
+                continue
+
+            # 生成输出文件路径
+            output_path = os.path.splitext(source_path)[0] + '_filled.docx'
+            self._enqueue_bridge_job(JOB_MD_TO_WORD, md_path, output_path, source_path)
+
+        if problems:
+            QMessageBox.warning(self, "警告", "\n".join(problems))
+
+    # ----- Word ↔ MD 后台队列 -----
+
+    def _enqueue_bridge_job(self, kind, input_path, output_path, template_path=None):
+        """把任务加入后台队列，空闲时启动工作线程"""
+        if self.bridge_thread is None:
+            self.bridge_thread = BridgeThread(self)
+            self.bridge_thread.progress.connect(self.on_bridge_progress)
+            self.bridge_thread.item_started.connect(self.on_bridge_item_started)
+            self.bridge_thread.item_finished.connect(self.on_bridge_item_finished)
+            self.bridge_thread.item_failed.connect(self.on_bridge_item_failed)
+            self.bridge_thread.finished.connect(self.on_bridge_queue_drained)
+
+        self.bridge_thread.enqueue(kind, input_path, output_path, template_path)
+
+        if not self.bridge_thread.isRunning():
+            self.bridge_errors = []
+            self.bridge_cancel_requested = False
+            self.bridge_progress.setValue(0)
+            self.bridge_progress.show()
+            self.bridge_cancel_btn.setEnabled(True)
+            self.bridge_cancel_btn.show()
+            self.bridge_thread.start()
+        else:
+            self.bridge_status_label.setText(
+                f"已加入队列: {os.path.basename(input_path)} (排队 {self.bridge_thread.pending_count()} 个)")
+
+    def on_bridge_item_started(self, kind, input_path, remaining):
+        self.bridge_current_name = os.path.basename(input_path)
+        self.bridge_progress.setRange(0, 0)
+        suffix = f" (排队 {remaining} 个)" if remaining else ""
+        self.bridge_status_label.setText(f"正在处理: {self.bridge_current_name}{suffix}")
+
+    def on_bridge_progress(self, done, total, message):
+        self.bridge_progress.setRange(0, max(total, 1))
+        self.bridge_progress.setValue(done)
+        self.bridge_status_label.setText(f"正在处理: {self.bridge_current_name} - {message}")
+
+    def on_bridge_item_finished(self, kind, output_path, message):
+        if kind == JOB_WORD_TO_MD:
+            self.w2m_output_file = output_path
+            self.w2m_result_label.setText(f"输出: {os.path.basename(output_path)}")
+            self.word_to_md_result_frame.show()
+            self._apply_success_style_w2m()
+        else:
+            self.m2w_output_file = output_path
+            self.m2w_result_label.setText(f"输出: {os.path.basename(output_path)}\n{message}")
+            self.md_to_word_result_frame.show()
+            self._apply_success_style_m2w()
 
-        # 从 MD 文件中获取源 Word 路径
-        source_path = get_template_source(self.md_file_path)
-        if not source_path:
-            QMessageBox.warning(self, "警告", "MD 文件中没有找到源 Word 模板路径\n请确保 MD 文件包含 <!-- source: ... --> 注释")
-            return
+    def on_bridge_item_failed(self, kind, input_path, message):
+        if message != CANCELLED_MESSAGE:
+            self.bridge_errors.append(f"{os.path.basename(input_path)}: {message}")
 
-        if not os.path.exists(source_path):
-            QMessageBox.warning(self, "警告", f"源 Word 模板不存在:\n{source_path}")
+    def on_bridge_queue_drained(self):
+        # 线程退出前的瞬间可能又有任务入队
+        if self.bridge_thread.pending_count() > 0:
+            self.bridge_thread.start()
             return
 
-        # 生成输出文件路径
-        base_name = os.path.splitext(source_path)[0]
-        output_path = base_name + '_filled.docx'
-
-        self.md_to_word_btn.setEnabled(False)
-        self.md_to_word_btn.setText("填充中...")
-
-        success, result = markdown_to_word(self.md_file_path, source_path, output_path)
-
-        self.md_to_word_btn.setEnabled(True)
-        self.md_to_word_btn.setText("填充到 Word")
-
-        if success:
-            self.m2w_output_file = output_path
-            self.m2w_result_label.setText(f"输出: {os.path.basename(output_path)}\n{result}")
-            self.md_to_word_result_frame.show()
-            self._apply_success_style_m2w()
+        self.bridge_progress.hide()
+        self.bridge_cancel_btn.hide()
+        if self.bridge_cancel_requested:
+            self.bridge_status_label.setText("已取消")
+        elif self.bridge_errors:
+            self.bridge_status_label.setText(f"完成，{len(self.bridge_errors)} 个失败")
         else:
-            QMessageBox.critical(self, "填充失败", result)
+            self.bridge_status_label.setText("")
+
+        if self.bridge_errors:
+            QMessageBox.critical(self, "转换失败", "\n".join(self.bridge_errors))
+
+    def on_cancel_bridge(self):
+        """取消当前任务并清空队列"""
+        if self.bridge_thread is not None and self.bridge_thread.isRunning():
+            self.bridge_cancel_requested = True
+            self.bridge_thread.cancel()
+            self.bridge_cancel_btn.setEnabled(False)
+            self.bridge_status_label.setText("正在取消...")
 
     def _apply_success_style_m2w(self):
         """应用 MD→Word 成功样式"""
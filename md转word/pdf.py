@@ -2,75 +2,721 @@
 docx转pdf并按序号合并（通用版）
 
 用法:
-    python convert_and_merge.py [文件夹路径] [--keep|--delete]
+    python convert_and_merge.py [文件夹路径] [--keep|--delete] [-b auto|word|soffice] [-j 并发数] [--force] [--optimize]
+                                [--linearize] [--no-bookmarks] [--chunk N] [--report 报告.json]
 
     不指定路径则使用当前目录
     输出PDF以文件夹名称命名
     --keep   保留单独的PDF文件（默认）
     --delete 删除单独的PDF文件
+    -b       转换后端: word (Windows, Word COM) / soffice (LibreOffice headless)
+             默认 auto: Windows 且安装了 pywin32 时用 Word，否则用 LibreOffice
+    -j       并发转换数，每个并发使用独立的 Word 进程 / LibreOffice 用户配置目录
+             默认 Word 为 1，LibreOffice 为 CPU 核数
+    --force  忽略清单，重新转换所有 docx
+    --optimize 体积优化保存：合并各章节中相同的字体、图片等对象，清理无用对象并压缩流
+    --linearize 输出线性化 PDF（Fast Web View），浏览器无需下载完整文件即可显示首页
+    --no-bookmarks 不生成书签（默认按 docx 文件名和文档内标题生成书签目录）
+    --chunk N 分批合并：每追加 N 个 PDF 增量保存到磁盘并释放内存，
+             内存峰值与文件总数无关，适合合并成百上千个大文件（默认 0 = 全部在内存中合并）
+    --report 输出 JSON 报告：每个文件的转换耗时、页数、PDF 大小，以及合并与保存耗时
 
-需要安装: pip install pymupdf pywin32
+    退出码: 0 全部成功；1 部分文件转换失败（仍输出合并结果）；2 全部失败或出错（与参数错误相同）
+
+    文件夹中的 .pdf_manifest.json 记录每个 docx 的哈希与 mtime，
+    未修改且 PDF 仍在的文件直接复用，只转换新增或修改过的 docx
+    （使用 --delete 删除单独的 PDF 后，下次运行需要全部重新转换）
+
+需要安装: pip install pymupdf
+    Word 后端: pip install pywin32
+    LibreOffice 后端: 安装 LibreOffice，并确保 soffice 在 PATH 中
+    线性化: 新版 PyMuPDF 不再支持，需要 pip install pikepdf 或安装 qpdf
 """
 
 import os
 import sys
 import glob
+import json
+import queue
+import hashlib
+import shutil
+import signal
 import argparse
-import win32com.client
+import time
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
 import fitz  # PyMuPDF - 更好地保留PDF资源
 
+# 单个文件的 LibreOffice 转换超时 (秒)
+SOFFICE_TIMEOUT = 300
+# Windows 下 LibreOffice 的默认安装位置
+SOFFICE_WINDOWS_PATHS = [
+    r'C:\Program Files\LibreOffice\program\soffice.exe',
+    r'C:\Program Files (x86)\LibreOffice\program\soffice.exe',
+]
 
-def convert_docx_to_pdf(folder):
-    """使用 Word 将所有 docx 转换为 pdf"""
-    print("正在启动 Word...")
-    word = win32com.client.Dispatch("Word.Application")
-    word.Visible = False
+# 增量转换清单文件名
+MANIFEST_NAME = '.pdf_manifest.json'
+MANIFEST_VERSION = 1
+# 计算文件哈希时的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 体积优化保存参数：
+# garbage=4 清理未引用对象并合并内容相同的对象（各章重复嵌入的字体、图片、logo）
+# deflate* 压缩内容流、图片与字体，use_objstms 把小对象打包进对象流
+OPTIMIZE_SAVE_OPTIONS = {
+    'garbage': 4,
+    'clean': True,
+    'deflate': True,
+    'deflate_images': True,
+    'deflate_fonts': True,
+    'use_objstms': True,
+}
+
+# 退出码：2 与 argparse 的参数错误一致，表示没有得到合并结果
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_FAILED = 2
+
+# 多个转换线程同时输出时保证每行完整
+_print_lock = threading.Lock()
 
-    docx_files = sorted(glob.glob(os.path.join(folder, "*.docx")))
-    pdf_files = []
 
+def log(message):
+    """线程安全的 print"""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def kill_process_tree(process):
+    """
+    结束子进程及其所有子孙进程
+    POSIX 下结束整个进程组 (子进程需以 start_new_session=True 启动)，Windows 下用 taskkill /T
+    """
     try:
-        for docx_path in docx_files:
-            pdf_path = docx_path.replace(".docx", ".pdf")
-            print(f"  转换: {os.path.basename(docx_path)}")
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+            if process.poll() is None:
+                process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+class WordBackend:
+    """使用 Word COM 转换（仅 Windows），每个实例独占一个 Word 进程"""
+    name = 'word'
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.word = None
+
+    def start(self):
+        import pythoncom
+        import win32com.client
+
+        # 每个线程都需要初始化 COM
+        pythoncom.CoInitialize()
+        try:
+            # DispatchEx 总是启动新的 Word 进程，多个并发互不干扰
+            self.word = win32com.client.DispatchEx("Word.Application")
+            self.word.Visible = False
+        except BaseException:
+            # 启动失败时调用方不会再调用 close()，在这里退出 Word 并释放 COM
+            self.close()
+            raise
 
-            doc = word.Documents.Open(os.path.abspath(docx_path))
-            doc.SaveAs(os.path.abspath(pdf_path), FileFormat=17)  # 17 = PDF格式
+    def convert(self, docx_path, pdf_path):
+        doc = self.word.Documents.Open(os.path.abspath(docx_path))
+        try:
+            # 17 = wdExportFormatPDF；CreateBookmarks=1 按标题生成 PDF 书签
+            doc.ExportAsFixedFormat(
+                OutputFileName=os.path.abspath(pdf_path),
+                ExportFormat=17,
+                CreateBookmarks=1
+            )
+        finally:
             doc.Close()
-            pdf_files.append(pdf_path)
+
+    def close(self):
+        import pythoncom
+
+        try:
+            if self.word is not None:
+                self.word.Quit()
+        finally:
+            self.word = None
+            pythoncom.CoUninitialize()
+
+
+class LibreOfficeBackend:
+    """使用 LibreOffice headless 转换，每个实例使用独立的用户配置目录以支持并发"""
+    name = 'soffice'
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.soffice = find_soffice()
+        self.profile_dir = None
+
+    def start(self):
+        if not self.soffice:
+            raise RuntimeError("找不到 LibreOffice (soffice)")
+        self.profile_dir = tempfile.mkdtemp(prefix=f'soffice_profile_{self.worker_id}_')
+
+    def convert(self, docx_path, pdf_path):
+        out_dir = os.path.dirname(os.path.abspath(pdf_path))
+        cmd = [
+            self.soffice,
+            f'-env:UserInstallation={Path(self.profile_dir).as_uri()}',
+            '--headless', '--norestore', '--nologo',
+            '--convert-to', 'pdf',
+            '--outdir', out_dir,
+            os.path.abspath(docx_path),
+        ]
+        produced = os.path.join(out_dir, os.path.splitext(os.path.basename(docx_path))[0] + '.pdf')
+        # soffice 加载或转换失败时也常以 0 退出，先删除上次的 PDF，免得把旧文件当成本次的结果
+        for path in {produced, os.path.abspath(pdf_path)}:
+            if os.path.exists(path):
+                os.remove(path)
+
+        # soffice 只是启动 soffice.bin 的包装程序，超时时需要结束整个进程树
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   start_new_session=(os.name == 'posix'))
+        try:
+            stdout, stderr = process.communicate(timeout=SOFFICE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(process)
+            process.communicate()
+            if os.path.exists(produced):
+                os.remove(produced)
+            raise RuntimeError(f"LibreOffice 转换超时 (超过 {SOFFICE_TIMEOUT} 秒)")
+
+        if process.returncode != 0 or not os.path.exists(produced):
+            raise RuntimeError(f"LibreOffice 转换失败: {stderr.strip() or stdout.strip() or '未生成 PDF'}")
+        if os.path.abspath(produced) != os.path.abspath(pdf_path):
+            os.replace(produced, pdf_path)
+
+    def close(self):
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+
+BACKENDS = {
+    WordBackend.name: WordBackend,
+    LibreOfficeBackend.name: LibreOfficeBackend,
+}
+
+
+def find_soffice():
+    """查找 LibreOffice 可执行文件"""
+    for name in ('soffice', 'libreoffice'):
+        path = shutil.which(name)
+        if path:
+            return path
+    if sys.platform == 'win32':
+        for path in SOFFICE_WINDOWS_PATHS:
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def resolve_backend(name):
+    """解析后端名称，auto 时按平台选择"""
+    if name != 'auto':
+        return name
+    if sys.platform == 'win32':
+        try:
+            import win32com.client  # noqa: F401
+            return WordBackend.name
+        except ImportError:
+            pass
+    return LibreOfficeBackend.name
+
+
+def default_jobs(backend):
+    """默认并发数：Word 进程较重，默认单个；LibreOffice 按 CPU 核数"""
+    if backend == WordBackend.name:
+        return 1
+    return os.cpu_count() or 1
+
+
+def find_docx_files(folder):
+    """按文件名排序的 docx 列表（跳过 Word 临时锁文件 ~$xxx.docx）"""
+    return sorted(path for path in glob.glob(os.path.join(folder, "*.docx"))
+                  if not os.path.basename(path).startswith('~$'))
+
+
+def _conversion_worker(backend_cls, worker_id, tasks, results):
+    """转换线程：独占一个后端实例，从任务队列取文件直到队列为空"""
+    converter = backend_cls(worker_id)
+    try:
+        converter.start()
+    except Exception as e:
+        log(f"  错误: 后端启动失败 ({converter.name}) - {e}")
+        # 仍需把任务标记为失败，否则调用方会一直等待
+        converter = None
+
+    try:
+        while True:
+            try:
+                index, docx_path = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            pdf_path = os.path.splitext(docx_path)[0] + ".pdf"
+            if converter is None:
+                results.put((index, docx_path, None, 0.0, "后端启动失败"))
+                continue
+
+            log(f"  转换: {os.path.basename(docx_path)}")
+            start = time.perf_counter()
+            try:
+                converter.convert(docx_path, pdf_path)
+                results.put((index, docx_path, pdf_path, time.perf_counter() - start, None))
+            except Exception as e:
+                log(f"  错误: {os.path.basename(docx_path)} - {e}")
+                results.put((index, docx_path, None, time.perf_counter() - start, str(e)))
     finally:
-        word.Quit()
+        if converter is not None:
+            converter.close()
+
 
+def start_conversion(tasks_list, backend='auto', jobs=None, results=None):
+    """
+    启动并发转换，立即返回结果队列
+    tasks_list 为 [(序号, docx 路径), ...]
+    队列中依次产生 (序号, docx 路径, pdf 路径或 None, 转换耗时秒数, 错误信息或 None)，顺序为完成顺序
+    """
+    if results is None:
+        results = queue.Queue()
+    if not tasks_list:
+        return results
+
+    backend = resolve_backend(backend)
+    jobs = max(1, min(jobs or default_jobs(backend), len(tasks_list)))
+
+    tasks = queue.Queue()
+    for index, docx_path in tasks_list:
+        tasks.put((index, docx_path))
+
+    print(f"正在启动 {backend} (并发 {jobs})...")
+    for worker_id in range(jobs):
+        thread = threading.Thread(
+            target=_conversion_worker,
+            args=(BACKENDS[backend], worker_id, tasks, results),
+            daemon=True
+        )
+        thread.start()
+    return results
+
+
+def convert_docx_to_pdf(folder, backend='auto', jobs=None):
+    """将所有 docx 转换为 pdf，返回按文件名排序的 pdf 列表（失败的文件跳过）"""
+    docx_files = find_docx_files(folder)
+    if not docx_files:
+        return []
+
+    results = start_conversion(list(enumerate(docx_files)), backend, jobs)
+    pdf_by_index = {}
+    for _ in docx_files:
+        index, _, pdf_path, _, _ = results.get()
+        if pdf_path:
+            pdf_by_index[index] = pdf_path
+
+    pdf_files = [pdf_by_index[i] for i in sorted(pdf_by_index)]
     print(f"转换完成，共 {len(pdf_files)} 个文件\n")
     return pdf_files
 
 
-def merge_pdfs(pdf_files, output_path):
+def file_sha256(path):
+    """计算文件内容哈希"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_manifest(folder):
+    """读取增量清单 {docx 文件名: 记录}，不存在或格式不对时返回空清单"""
+    path = os.path.join(folder, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == MANIFEST_VERSION:
+            return data.get('files', {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_manifest(folder, entries):
+    """原子写入增量清单"""
+    path = os.path.join(folder, MANIFEST_NAME)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': entries}, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def is_up_to_date(docx_path, pdf_path, entry):
+    """
+    判断 docx 对应的 PDF 是否仍然有效：
+    PDF 存在且与记录一致；docx 的大小和 mtime 未变，或 mtime 变了但内容哈希相同
+    """
+    if not entry or not os.path.exists(pdf_path):
+        return False
+
+    pdf_stat = os.stat(pdf_path)
+    if pdf_stat.st_size != entry.get('pdf_size') or pdf_stat.st_mtime_ns != entry.get('pdf_mtime_ns'):
+        return False
+
+    docx_stat = os.stat(docx_path)
+    if docx_stat.st_size != entry.get('size'):
+        return False
+    if docx_stat.st_mtime_ns == entry.get('mtime_ns'):
+        return True
+    if file_sha256(docx_path) == entry.get('sha256'):
+        # 仅 mtime 变化（如复制、touch），更新记录即可
+        entry['mtime_ns'] = docx_stat.st_mtime_ns
+        return True
+    return False
+
+
+def make_manifest_entry(docx_path, pdf_path):
+    docx_stat = os.stat(docx_path)
+    pdf_stat = os.stat(pdf_path)
+    return {
+        'size': docx_stat.st_size,
+        'mtime_ns': docx_stat.st_mtime_ns,
+        'sha256': file_sha256(docx_path),
+        'pdf': os.path.basename(pdf_path),
+        'pdf_size': pdf_stat.st_size,
+        'pdf_mtime_ns': pdf_stat.st_mtime_ns,
+    }
+
+
+def linearize_pdf(src_path, dest_path):
+    """
+    把 src_path 线性化写入 dest_path
+    依次尝试 pikepdf、qpdf 命令行；都不可用时抛出 RuntimeError
+    """
+    try:
+        import pikepdf
+    except ImportError:
+        pikepdf = None
+
+    if pikepdf is not None:
+        with pikepdf.open(src_path) as pdf:
+            pdf.save(dest_path, linearize=True)
+        return
+
+    qpdf = shutil.which('qpdf')
+    if qpdf:
+        result = subprocess.run([qpdf, '--linearize', src_path, dest_path], capture_output=True, text=True)
+        # qpdf 返回 3 表示有警告但已成功输出
+        if result.returncode in (0, 3):
+            return
+        raise RuntimeError(f"qpdf 线性化失败: {result.stderr.strip()}")
+
+    raise RuntimeError("线性化需要 pikepdf (pip install pikepdf) 或 qpdf")
+
+
+def format_size(size):
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+class PdfMerger:
+    """
+    使用 PyMuPDF 逐个追加 PDF（完整保留所有资源）
+
+    chunk_size=0 时所有页面都留在内存中，最后一次性保存；
+    chunk_size>0 时每追加 chunk_size 个文件就把结果增量保存到 work_dir 下的工作文件
+    (saveIncr 只追加新对象)，再关闭重开，已写入的对象不再常驻内存
+    """
+
+    def __init__(self, optimize=False, linearize=False, bookmarks=True, chunk_size=0, work_dir=None):
+        self.result = fitz.open()
+        self.optimize = optimize
+        self.linearize = linearize
+        self.bookmarks = bookmarks
+        self.chunk_size = chunk_size
+        self.work_dir = work_dir
+        # 分批合并的工作文件，第一次落盘时创建
+        self.work_path = None
+        # 自上次落盘后追加的文件数
+        self.pending = 0
+        # 合并过程中累积的书签 [[级别, 标题, 页码], ...]
+        self.toc = []
+        # 输入 PDF 的大小总和，用于对比输出体积
+        self.input_size = 0
+        # 合并结果的页数与体积，save() 后有效
+        self.page_count = 0
+        self.output_size = 0
+
+    def append(self, pdf_path, title=None):
+        """
+        追加一个 PDF，返回其页数
+        书签：以 title（默认为文件名）作为一级书签，文档自带的标题书签降一级挂在其下
+        """
+        log(f"  添加: {os.path.basename(pdf_path)}")
+        self.input_size += os.path.getsize(pdf_path)
+        with fitz.open(pdf_path) as pdf:
+            page_offset = self.result.page_count
+            if self.bookmarks and pdf.page_count:
+                title = title or os.path.splitext(os.path.basename(pdf_path))[0]
+                self.toc.append([1, title, page_offset + 1])
+                for level, heading, page in pdf.get_toc(simple=True):
+                    # 无法解析目标页的书签指向本章首页
+                    target = page_offset + page if page >= 1 else page_offset + 1
+                    self.toc.append([level + 1, heading, target])
+            self.result.insert_pdf(pdf)
+            page_count = pdf.page_count
+
+        self.pending += 1
+        if self.chunk_size and self.pending >= self.chunk_size:
+            self._flush()
+        return page_count
+
+    def _flush(self):
+        """把已追加的页面写入工作文件，并重新打开以释放内存"""
+        if self.work_path is None:
+            fd, self.work_path = tempfile.mkstemp(suffix='.pdf', prefix='.merge_', dir=self.work_dir)
+            os.close(fd)
+            self.result.save(self.work_path)
+        else:
+            self.result.saveIncr()
+        self.result.close()
+        self.result = fitz.open(self.work_path)
+        self.pending = 0
+
+    def _save(self, output_path, **extra):
+        if not self.optimize:
+            self.result.save(output_path, **extra)
+            return
+        try:
+            self.result.save(output_path, **OPTIMIZE_SAVE_OPTIONS, **extra)
+        except TypeError:
+            # 旧版 PyMuPDF 不支持 use_objstms
+            options = dict(OPTIMIZE_SAVE_OPTIONS)
+            options.pop('use_objstms')
+            self.result.save(output_path, **options, **extra)
+
+    def save(self, output_path):
+        self.page_count = self.result.page_count
+        if self.toc:
+            self.result.set_toc(self.toc)
+
+        if self.work_path and not (self.optimize or self.linearize):
+            # 分批合并：最后一批同样增量写入，工作文件即为结果
+            self.result.saveIncr()
+            self.result.close()
+            os.replace(self.work_path, output_path)
+            self.work_path = None
+        elif self.linearize:
+            try:
+                # 旧版 PyMuPDF 可以直接输出线性化文件（1.24 起不再支持）
+                self._save(output_path, linear=True)
+            except Exception:
+                temp_path = output_path + '.tmp'
+                self._save(temp_path)
+                try:
+                    linearize_pdf(temp_path, output_path)
+                    os.remove(temp_path)
+                except Exception as e:
+                    os.replace(temp_path, output_path)
+                    print(f"  警告: 未能线性化 - {e}")
+            self.result.close()
+        else:
+            self._save(output_path)
+            self.result.close()
+
+        if self.work_path:
+            os.remove(self.work_path)
+
+        output_size = self.output_size = os.path.getsize(output_path)
+        print(f"\n合并完成: {output_path}")
+        if self.input_size:
+            ratio = (1 - output_size / self.input_size) * 100
+            print(f"体积: 输入合计 {format_size(self.input_size)} -> 输出 {format_size(output_size)} "
+                  f"({'减少' if ratio >= 0 else '增加'} {abs(ratio):.1f}%)")
+
+
+def merge_pdfs(pdf_files, output_path, optimize=False, linearize=False, bookmarks=True, chunk_size=0):
     """使用 PyMuPDF 合并 PDF（完整保留所有资源）"""
     print("正在合并 PDF...")
-    result = fitz.open()
+    merger = PdfMerger(optimize, linearize, bookmarks, chunk_size, os.path.dirname(os.path.abspath(output_path)))
 
     for pdf_path in pdf_files:
-        print(f"  添加: {os.path.basename(pdf_path)}")
-        with fitz.open(pdf_path) as pdf:
-            result.insert_pdf(pdf)
+        merger.append(pdf_path)
+
+    merger.save(output_path)
+
+
+def convert_and_merge(folder, output_path, backend='auto', jobs=None, force=False, optimize=False,
+                      linearize=False, bookmarks=True, chunk_size=0):
+    """
+    转换与合并流水线：
+    转换线程池按完成顺序产出 PDF，主线程按文件名顺序依次追加，
+    下一个序号的 PDF 一就绪就立即合并，不必等全部转换完成
+
+    增量：清单中未变化的 docx 直接复用已有 PDF，force=True 时全部重新转换
+    optimize=True 时以体积优化方式保存，linearize=True 时输出线性化 PDF
+    bookmarks=True 时在合并过程中按 docx 文件名和文档内标题生成书签
+    chunk_size>0 时每合并 chunk_size 个文件增量落盘一次，限制内存占用
+
+    返回 (按文件名排序的 pdf 列表（失败的文件跳过）, 报告)
+    报告为可直接写成 JSON 的字典，包含每个文件的状态、转换耗时、页数、PDF 大小，
+    以及合并（逐个追加）与最终保存的耗时
+    """
+    started = time.perf_counter()
+    report = {
+        'folder': folder,
+        'output': output_path,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'backend': resolve_backend(backend),
+    }
+
+    docx_files = find_docx_files(folder)
+    if not docx_files:
+        report['files'] = []
+        return [], report
+
+    manifest = {} if force else load_manifest(folder)
+    new_manifest = {}
+    results = queue.Queue()
+    tasks_list = []
+    reused = []
+
+    for index, docx_path in enumerate(docx_files):
+        name = os.path.basename(docx_path)
+        pdf_path = os.path.splitext(docx_path)[0] + ".pdf"
+        entry = manifest.get(name)
+        if is_up_to_date(docx_path, pdf_path, entry):
+            new_manifest[name] = entry
+            reused.append(name)
+            results.put((index, docx_path, pdf_path, 0.0, None))
+        else:
+            tasks_list.append((index, docx_path))
+
+    print(f"需要转换 {len(tasks_list)} 个，复用 {len(reused)} 个")
+    start_conversion(tasks_list, backend, jobs, results)
+    converted_indexes = {index for index, _ in tasks_list}
+    rebuilt = []
+    failed = []
+    merger = PdfMerger(optimize, linearize, bookmarks, chunk_size, os.path.dirname(os.path.abspath(output_path)))
+
+    file_reports = [None] * len(docx_files)
+    merge_seconds = 0.0
+    ready = {}        # 已转换但还没轮到合并的 {序号: pdf 路径或 None}
+    next_index = 0    # 下一个应合并的序号
+    pdf_files = []
 
-    result.save(output_path)
-    result.close()
-    print(f"\n合并完成: {output_path}")
+    for _ in docx_files:
+        index, docx_path, pdf_path, seconds, error = results.get()
+        ready[index] = pdf_path
+        name = os.path.basename(docx_path)
+
+        if index not in converted_indexes:
+            status = 'reused'
+        elif pdf_path:
+            new_manifest[name] = make_manifest_entry(docx_path, pdf_path)
+            rebuilt.append(name)
+            status = 'converted'
+        else:
+            failed.append(name)
+            status = 'failed'
+
+        file_reports[index] = {
+            'docx': name,
+            'pdf': os.path.basename(pdf_path) if pdf_path else None,
+            'status': status,
+            'convert_seconds': round(seconds, 3),
+            'pages': None,
+            'size': os.path.getsize(pdf_path) if pdf_path else None,
+            'error': error,
+        }
+
+        while next_index in ready:
+            pdf_path = ready.pop(next_index)
+            if pdf_path:
+                title = os.path.splitext(os.path.basename(docx_files[next_index]))[0]
+                append_start = time.perf_counter()
+                file_reports[next_index]['pages'] = merger.append(pdf_path, title)
+                merge_seconds += time.perf_counter() - append_start
+                pdf_files.append(pdf_path)
+            next_index += 1
+
+    save_manifest(folder, new_manifest)
+
+    print(f"转换完成，共 {len(pdf_files)} 个文件")
+    print(f"  重新转换 ({len(rebuilt)}): {', '.join(sorted(rebuilt)) or '无'}")
+    print(f"  复用 ({len(reused)}): {', '.join(reused) or '无'}")
+    if failed:
+        print(f"  失败 ({len(failed)}): {', '.join(sorted(failed))}")
+
+    save_seconds = 0.0
+    if pdf_files:
+        save_start = time.perf_counter()
+        merger.save(output_path)
+        save_seconds = time.perf_counter() - save_start
+
+    report.update({
+        'jobs': max(1, min(jobs or default_jobs(report['backend']), len(tasks_list))) if tasks_list else 0,
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'merge_seconds': round(merge_seconds, 3),
+        'save_seconds': round(save_seconds, 3),
+        'converted': len(rebuilt),
+        'reused': len(reused),
+        'failed': len(failed),
+        'output_pages': merger.page_count if pdf_files else 0,
+        'output_size': merger.output_size if pdf_files else 0,
+        'files': file_reports,
+    })
+    return pdf_files, report
+
+
+def write_report(report, path):
+    """写出 JSON 报告"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已写入: {path}")
 
 
 def main():
     parser = argparse.ArgumentParser(description="DOCX 转 PDF 并合并工具")
     parser.add_argument("folder", nargs="?", default=os.getcwd(), help="目标文件夹路径")
     parser.add_argument("--delete", action="store_true", help="删除单独的PDF文件")
+    parser.add_argument("-b", "--backend", choices=['auto'] + list(BACKENDS), default='auto',
+                        help="转换后端 (默认: auto)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="并发转换数 (默认: Word 为 1, LibreOffice 为 CPU 核数)")
+    parser.add_argument("--force", action="store_true", help="忽略增量清单，重新转换所有 docx")
+    parser.add_argument("--optimize", action="store_true",
+                        help="体积优化保存（合并重复字体/图片、清理无用对象、压缩流）")
+    parser.add_argument("--linearize", action="store_true", help="输出线性化 PDF (Fast Web View)")
+    parser.add_argument("--no-bookmarks", dest="bookmarks", action="store_false",
+                        help="不生成书签目录")
+    parser.add_argument("--chunk", type=int, default=0, metavar="N",
+                        help="每合并 N 个文件增量保存一次以限制内存 (默认: 0 = 全部在内存中合并)")
+    parser.add_argument("--report", metavar="PATH", help="输出 JSON 报告（耗时、页数、大小）")
     args = parser.parse_args()
 
     folder = os.path.abspath(args.folder)
 
     if not os.path.isdir(folder):
         print(f"错误: 文件夹不存在 - {folder}")
-        sys.exit(1)
+        sys.exit(EXIT_FAILED)
 
     # 输出文件名 = 文件夹名称.pdf
     folder_name = os.path.basename(folder.rstrip(os.sep))
@@ -82,15 +728,20 @@ def main():
     print(f"目标文件夹: {folder}")
     print(f"输出文件: {folder_name}.pdf\n")
 
-    # 转换
-    pdf_files = convert_docx_to_pdf(folder)
+    # 转换并合并（流水线）
+    pdf_files, report = convert_and_merge(folder, output_file, args.backend, args.jobs, args.force,
+                                          args.optimize, args.linearize, args.bookmarks, args.chunk)
 
-    if not pdf_files:
+    if args.report:
+        write_report(report, args.report)
+
+    if not report['files']:
         print("未找到 docx 文件")
         return
 
-    # 合并
-    merge_pdfs(pdf_files, output_file)
+    if not pdf_files:
+        print("\n所有 docx 转换失败，未生成合并文件")
+        sys.exit(EXIT_FAILED)
 
     # 删除中间文件
     if args.delete:
@@ -101,6 +752,9 @@ def main():
     else:
         print("\n单独的 PDF 文件已保留（使用 --delete 可删除）")
 
+    if report['failed']:
+        sys.exit(EXIT_PARTIAL)
+
 
 if __name__ == "__main__":
     main()
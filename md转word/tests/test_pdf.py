@@ -0,0 +1,189 @@
+"""pdf.py 转换与合并流水线的单元测试 (用假后端生成小 PDF，不需要 Word / LibreOffice)"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+fitz = pytest.importorskip('fitz')
+
+import pdf
+
+
+class FakeBackend:
+    """假后端: 把 docx 的文件名写成一页 PDF；名称含 bad 时失败，含 slow 时延迟完成"""
+    name = 'fake'
+    converted = []
+    lock = threading.Lock()
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+
+    def start(self):
+        pass
+
+    def convert(self, docx_path, pdf_path):
+        stem = os.path.splitext(os.path.basename(docx_path))[0]
+        if 'slow' in stem:
+            time.sleep(0.2)
+        if 'bad' in stem:
+            raise RuntimeError('无法转换')
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), stem)
+        doc.set_toc([[1, f'{stem} 标题', 1]])
+        doc.save(pdf_path)
+        doc.close()
+        with self.lock:
+            self.converted.append(stem)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    FakeBackend.converted = []
+    monkeypatch.setitem(pdf.BACKENDS, FakeBackend.name, FakeBackend)
+    return FakeBackend
+
+
+def make_folder(tmp_path, names):
+    folder = tmp_path / 'handbook'
+    folder.mkdir(parents=True)
+    for name in names:
+        (folder / f'{name}.docx').write_bytes(name.encode('utf-8'))
+    return folder
+
+
+def run(folder, **kwargs):
+    output = str(folder / 'handbook.pdf')
+    pdf_files, report = pdf.convert_and_merge(str(folder), output, backend='fake', **kwargs)
+    return pdf_files, report, output
+
+
+def page_texts(path):
+    with fitz.open(path) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+def test_merge_preserves_file_order(tmp_path, backend):
+    # 前面的文件转换得最慢，完成顺序与文件名顺序相反
+    names = ['01_slow', '02_slow', '03', '04', '05']
+    folder = make_folder(tmp_path, names)
+    pdf_files, report, output = run(folder, jobs=3)
+    assert [os.path.basename(p) for p in pdf_files] == [f'{n}.pdf' for n in names]
+    assert page_texts(output) == names
+    with fitz.open(output) as doc:
+        assert [(level, title) for level, title, _ in doc.get_toc()][:3] == \
+            [(1, '01_slow'), (2, '01_slow 标题'), (1, '02_slow')]
+    assert [f['docx'] for f in report['files']] == [f'{n}.docx' for n in names]
+    assert all(f['status'] == 'converted' and f['pages'] == 1 for f in report['files'])
+
+
+@pytest.mark.parametrize('options', [{'chunk_size': 2}, {'optimize': True}, {'bookmarks': False}])
+def test_merge_options_keep_pages(tmp_path, backend, options):
+    names = ['a', 'b', 'c', 'd', 'e']
+    folder = make_folder(tmp_path, names)
+    _, report, output = run(folder, jobs=2, **options)
+    assert page_texts(output) == names
+    assert report['output_pages'] == 5
+    assert not [f for f in os.listdir(folder) if f.startswith('.merge_')]
+    with fitz.open(output) as doc:
+        assert bool(doc.get_toc()) == options.get('bookmarks', True)
+
+
+def test_linearize_falls_back_to_plain_output(tmp_path, backend, monkeypatch):
+    def fail(src_path, dest_path):
+        raise RuntimeError('no linearizer')
+
+    monkeypatch.setattr(pdf, 'linearize_pdf', fail)
+    folder = make_folder(tmp_path, ['a', 'b'])
+    _, _, output = run(folder, linearize=True)
+    assert page_texts(output) == ['a', 'b']
+    assert not os.path.exists(output + '.tmp')
+
+
+def test_manifest_skip_and_invalidation(tmp_path, backend):
+    folder = make_folder(tmp_path, ['a', 'b', 'c'])
+    run(folder)
+    assert sorted(backend.converted) == ['a', 'b', 'c']
+
+    # 没有变化: 全部复用
+    backend.converted.clear()
+    _, report, output = run(folder)
+    assert backend.converted == []
+    assert [f['status'] for f in report['files']] == ['reused'] * 3
+    assert page_texts(output) == ['a', 'b', 'c']
+
+    # 只改 mtime: 哈希相同，仍然复用
+    stat = os.stat(folder / 'a.docx')
+    os.utime(folder / 'a.docx', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    run(folder)
+    assert backend.converted == []
+
+    # 修改内容、删除 PDF: 只重新转换这两个
+    (folder / 'b.docx').write_bytes(b'changed')
+    os.remove(folder / 'c.pdf')
+    _, report, _ = run(folder)
+    assert sorted(backend.converted) == ['b', 'c']
+    assert [f['status'] for f in report['files']] == ['reused', 'converted', 'converted']
+
+    # force: 忽略清单
+    backend.converted.clear()
+    run(folder, force=True)
+    assert sorted(backend.converted) == ['a', 'b', 'c']
+
+    with open(folder / pdf.MANIFEST_NAME, encoding='utf-8') as f:
+        assert set(json.load(f)['files']) == {'a.docx', 'b.docx', 'c.docx'}
+
+
+def run_main(monkeypatch, folder, *args):
+    monkeypatch.setattr(sys, 'argv', ['pdf.py', str(folder), '-b', 'fake', *args])
+    with pytest.raises(SystemExit) as exc:
+        pdf.main()
+        raise SystemExit(pdf.EXIT_OK)
+    return exc.value.code
+
+
+def test_exit_codes_and_report(tmp_path, backend, monkeypatch):
+    folder = make_folder(tmp_path, ['a', 'b'])
+    assert run_main(monkeypatch, folder) == 0
+
+    (folder / 'c_bad.docx').write_bytes(b'bad')
+    report_path = tmp_path / 'report.json'
+    assert run_main(monkeypatch, folder, '--report', str(report_path)) == 1
+    report = json.loads(report_path.read_text(encoding='utf-8'))
+    assert (report['converted'], report['reused'], report['failed']) == (0, 2, 1)
+    assert report['files'][2]['status'] == 'failed' and report['files'][2]['error'] == '无法转换'
+    assert page_texts(folder / 'handbook.pdf') == ['a', 'b']
+
+    empty = make_folder(tmp_path / 'x', [])
+    assert run_main(monkeypatch, empty) == 0
+    bad = make_folder(tmp_path / 'y', ['bad'])
+    assert run_main(monkeypatch, bad) == 2
+    assert run_main(monkeypatch, tmp_path / 'missing') == 2
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='假 soffice 为 shell 脚本')
+def test_soffice_stale_pdf_is_not_reused(tmp_path, backend, monkeypatch):
+    folder = make_folder(tmp_path, ['a', 'b'])
+    run(folder)
+
+    # soffice 加载失败但以 0 退出、不生成 PDF
+    soffice = tmp_path / 'soffice'
+    soffice.write_text('#!/bin/sh\nexit 0\n')
+    soffice.chmod(0o755)
+    monkeypatch.setattr(pdf, 'find_soffice', lambda: str(soffice))
+    (folder / 'b.docx').write_bytes(b'changed')
+
+    output = str(folder / 'handbook.pdf')
+    pdf_files, report = pdf.convert_and_merge(str(folder), output, backend='soffice', jobs=1)
+    assert [f['status'] for f in report['files']] == ['reused', 'failed']
+    assert [os.path.basename(p) for p in pdf_files] == ['a.pdf']
+    assert not (folder / 'b.pdf').exists()
+    assert page_texts(output) == ['a']
+    with open(folder / pdf.MANIFEST_NAME, encoding='utf-8') as f:
+        assert set(json.load(f)['files']) == {'a.docx'}
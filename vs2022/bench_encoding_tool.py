@@ -0,0 +1,440 @@
+"""
+encoding_tool 基准
+
+生成可配置规模与组成的 C++ 源码树 (纯 ASCII、UTF-8 中文注释、GBK、带 BOM 的 UTF-8、大文件)，
+分别测量 convert / deploy 在顺序、并行与增量模式下的吞吐量、系统调用次数与内存峰值。
+每个场景在独立子进程中运行，准备工作 (复制源码树、预先部署) 不计入结果
+
+用法:
+    python bench_encoding_tool.py [-n 5000] [--mix ascii=40,utf8=40,gbk=10,bom=10]
+                                  [--large 2 --large-mb 20] [-j 4] [--touch 1] [--stream-mb 1024]
+                                  [--dir 目录] [--keep]
+
+    -n          普通源文件数，默认 5000
+    --lines     普通源文件的平均行数，默认 200
+    --mix       各类文件的比例，默认 ascii=40,utf8=40,gbk=10,bom=10
+    --large     大文件 (UTF-8 中文) 个数与大小，默认 2 个 x 20 MB
+    -j          并行场景的进程数，默认 CPU 核数
+    --touch     增量场景中修改的文件比例 (%)，默认 1
+    --stream-mb 额外测量单个日志式大文件 (UTF-8 中文) 的流式转换吞吐量与内存峰值，
+                大小为指定 MB，默认 0 不测；--stream-mb 1024 即 1 GB 日志
+    --dir       工作目录，默认临时目录；参数相同时复用已生成的源码树，
+                结束时只删除各场景的中间目录，源码树保留
+    --strace    用 strace -f -c 统计全部系统调用 (需要安装 strace，会额外运行一遍)
+    --json      把结果写入 JSON 文件
+    --keep      保留临时工作目录与各场景的中间目录
+
+系统调用: 默认读取 /proc/self/io 的 syscr / syscw (读写类系统调用，含已回收的工作进程)
+内存峰值: Linux/macOS 用 resource，Windows 需要 pip install psutil
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import encoding_tool
+
+# 普通源文件的代码行与中文注释
+CODE_LINES = [
+    'int value_{i} = compute({i}, {i} + 1);',
+    'for (int k = 0; k < {i}; ++k) {{ total += data[k]; }}',
+    'std::vector<int> items_{i}(count, 0);',
+    'if (state == State::Ready) {{ return process(items, {i}); }}',
+    'auto name_{i} = std::string("item_") + std::to_string({i});',
+    'static_assert(sizeof(int) == 4, "int must be 32-bit");',
+    '}}',
+    '',
+]
+CHINESE_COMMENTS = [
+    '// 初始化配置并检查参数',
+    '// 计算结果，失败时返回错误码',
+    '/* 处理用户输入的数据，注意边界条件 */',
+    '// 注意：这里需要加锁，避免多线程同时修改',
+    '// 读取文件内容到缓冲区',
+    '// 把中文字符串转换为宽字符',
+]
+# 文件类型: (是否含中文注释, 编码, BOM)
+KINDS = {
+    'ascii': (False, 'ascii', b''),
+    'utf8': (True, 'utf-8', b''),
+    'gbk': (True, 'gbk', b''),
+    'bom': (True, 'utf-8', b'\xef\xbb\xbf'),
+}
+DEFAULT_MIX = 'ascii=40,utf8=40,gbk=10,bom=10'
+# 每个目录中的文件数
+FILES_PER_DIR = 100
+# 所有场景的编码设置: 源文件混有 UTF-8 与 GBK，逐个识别
+FROM_ENC = encoding_tool.AUTO
+TO_ENC = 'gbk'
+# 各场景在工作目录中使用的中间目录/文件，结束时清理
+SCRATCH_NAMES = ['convert_src', 'deploy_dest', 'incr_src', 'incr_dest', 'stream_out.log', 'strace.txt']
+# 日志式大文件的行模板
+LOG_LEVELS = ['INFO', 'INFO', 'INFO', 'DEBUG', 'WARN', 'ERROR']
+LOG_MESSAGES = [
+    '用户 {i} 登录成功',
+    'request id={i} 处理完成，耗时 {ms} ms',
+    '读取配置文件 config_{i}.ini',
+    '连接数据库失败，{ms} ms 后重试',
+    'cache miss for key item_{i}',
+    '任务 {i} 已加入队列',
+]
+
+
+def parse_mix(text):
+    """'ascii=40,utf8=40' -> {'ascii': 40.0, 'utf8': 40.0}"""
+    mix = {}
+    for item in text.split(','):
+        kind, _, weight = item.partition('=')
+        if kind not in KINDS:
+            raise ValueError(f"未知的文件类型: {kind} (可用: {', '.join(KINDS)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def make_source(rng, lines, chinese):
+    """生成一个 C++ 源文件的文本 (CRLF 换行，与 VS 一致)"""
+    out = ['#include <string>', '#include <vector>', '']
+    for i in range(lines):
+        if chinese and rng.random() < 0.2:
+            out.append(rng.choice(CHINESE_COMMENTS))
+        else:
+            out.append(rng.choice(CODE_LINES).format(i=i))
+    return '\r\n'.join(out) + '\r\n'
+
+
+def generate_tree(root, params):
+    """
+    按 params 生成源码树，返回 {类型: 文件数}
+    参数与已有源码树一致时直接复用
+    """
+    params_path = root + '.json'
+    if os.path.isdir(root) and os.path.exists(params_path):
+        with open(params_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('params') == params:
+            return saved['counts']
+    shutil.rmtree(root, ignore_errors=True)
+
+    rng = random.Random(params['seed'])
+    mix = parse_mix(params['mix'])
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=params['files'])
+    counts = {}
+    for i, kind in enumerate(kinds):
+        chinese, encoding, bom = KINDS[kind]
+        lines = rng.randint(params['lines'] // 2, params['lines'] * 3 // 2)
+        folder = os.path.join(root, f"module_{i // FILES_PER_DIR:03d}")
+        os.makedirs(folder, exist_ok=True)
+        ext = '.h' if i % 3 == 0 else '.cpp'
+        with open(os.path.join(folder, f"file_{i:05d}{ext}"), 'wb') as f:
+            f.write(bom + make_source(rng, lines, chinese).encode(encoding))
+        counts[kind] = counts.get(kind, 0) + 1
+
+    # 大文件: UTF-8 中文，重复同一段内容直到达到指定大小
+    os.makedirs(os.path.join(root, 'large'), exist_ok=True)
+    block = make_source(rng, 2000, True).encode('utf-8')
+    for i in range(params['large']):
+        target = params['large_mb'] * 1024 * 1024
+        with open(os.path.join(root, 'large', f"generated_{i}.cpp"), 'wb') as f:
+            written = 0
+            while written < target:
+                f.write(block)
+                written += len(block)
+    if params['large']:
+        counts['large'] = params['large']
+
+    with open(params_path, 'w', encoding='utf-8') as f:
+        json.dump({'params': params, 'counts': counts}, f)
+    return counts
+
+
+def generate_log(path, size_mb, seed):
+    """
+    生成约 size_mb MB 的 UTF-8 日志 (每行时间戳 + 级别 + 中英文混合消息)，
+    参数与已有文件一致时直接复用
+    """
+    params = {'size_mb': size_mb, 'seed': seed}
+    params_path = path + '.json'
+    if os.path.exists(path) and os.path.exists(params_path):
+        with open(params_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == params:
+                return
+    rng = random.Random(seed)
+    lines = []
+    for i in range(20000):
+        message = rng.choice(LOG_MESSAGES).format(i=i, ms=rng.randint(1, 999))
+        lines.append(f"2024-01-01 12:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d} "
+                     f"[{rng.choice(LOG_LEVELS):<5}] {message}\n")
+    block = ''.join(lines).encode('utf-8')
+    target = size_mb * 1024 * 1024
+    with open(path, 'wb') as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+    with open(params_path, 'w', encoding='utf-8') as f:
+        json.dump(params, f)
+
+
+def tree_stats(root):
+    """源码树的文件数与总字节数"""
+    count = size = 0
+    for folder, _, files in os.walk(root):
+        for name in files:
+            count += 1
+            size += os.path.getsize(os.path.join(folder, name))
+    return count, size
+
+
+def touch_files(root, percent, seed):
+    """修改 percent% 的文件 (追加一行注释)，模拟一次普通的代码改动"""
+    files = sorted(os.path.join(folder, name) for folder, _, names in os.walk(root) for name in names)
+    rng = random.Random(seed)
+    chosen = rng.sample(files, max(1, int(len(files) * percent / 100)))
+    for path in chosen:
+        with open(path, 'ab') as f:
+            f.write(b'// touched\r\n')
+    return len(chosen)
+
+
+def peak_memory_mb(children=False):
+    """内存峰值 (MB)；children=True 时取已回收的子进程 (工作进程) 中的最大值"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        if children:
+            return 0.0
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def read_proc_io():
+    """Linux /proc/self/io 计数 (含已回收的子进程)；其他平台返回空字典"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            return {key: int(value) for key, value in (line.split(':') for line in f if ':' in line)}
+    except OSError:
+        return {}
+
+
+def run_child(spec):
+    """子进程: 按 spec 调用 encoding_tool 的库接口，输出 JSON 结果"""
+    before = read_proc_io()
+    start = time.perf_counter()
+    if spec['command'] == 'transcode':
+        # 单个大文件直接走流式转换，源编码固定为 UTF-8
+        bytes_in = encoding_tool.transcode(spec['src'], spec['dest'], 'utf-8', TO_ENC)
+        result = encoding_tool.RunResult([encoding_tool.FileResult(spec['src'], encoding_tool.ACTION_CONVERTED,
+                                                                   bytes_in=bytes_in)])
+    elif spec['command'] == 'convert':
+        result = encoding_tool.convert(spec['src'], FROM_ENC, TO_ENC, recursive=True, jobs=spec['jobs'])
+    else:
+        result = encoding_tool.deploy(spec['src'], spec['dest'], FROM_ENC, TO_ENC, recursive=True,
+                                      jobs=spec['jobs'], full=spec.get('full', False))
+    elapsed = time.perf_counter() - start
+    after = read_proc_io()
+
+    print(json.dumps({
+        'seconds': elapsed,
+        'processed': len(result.files),
+        'unchanged': result.unchanged,
+        'failed': len(result.failed),
+        'bytes_in': result.bytes_in,
+        'peak_mb': peak_memory_mb(),
+        'worker_peak_mb': peak_memory_mb(children=True),
+        'syscr': after.get('syscr', 0) - before.get('syscr', 0) if after else None,
+        'syscw': after.get('syscw', 0) - before.get('syscw', 0) if after else None,
+    }))
+
+
+def measure(spec, strace=False, work_dir=None):
+    """在子进程中运行一个场景；strace=True 时在 strace -f -c 下运行并返回系统调用统计"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', json.dumps(spec)]
+    if strace:
+        summary_path = os.path.join(work_dir, 'strace.txt')
+        cmd = ['strace', '-f', '-c', '-o', summary_path, '--'] + cmd
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    if strace:
+        stats['strace'] = parse_strace_summary(summary_path)
+    return stats
+
+
+def parse_strace_summary(path):
+    """解析 strace -c 的汇总表，返回 {'total': 总次数, 'top': [(系统调用, 次数), ...]}"""
+    calls = []
+    total = 0
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            # % time, seconds, usecs/call, calls, [errors], syscall
+            if len(fields) < 5 or not fields[3].isdigit():
+                continue
+            if fields[-1] == 'total':
+                total = int(fields[3])
+            else:
+                calls.append((fields[-1], int(fields[3])))
+    calls.sort(key=lambda item: -item[1])
+    return {'total': total, 'top': calls[:3]}
+
+
+def build_scenarios(tree, work, jobs, touch, stream_log=None):
+    """
+    场景列表: (名称, 准备函数, spec)
+    准备函数在父进程中执行，每次测量前调用，保证 strace 重跑时状态相同
+    stream_log 为日志式大文件路径时追加单文件流式转换场景
+    """
+    convert_src = os.path.join(work, 'convert_src')
+    deploy_dest = os.path.join(work, 'deploy_dest')
+    incr_src = os.path.join(work, 'incr_src')
+    incr_dest = os.path.join(work, 'incr_dest')
+
+    def fresh_copy():
+        shutil.rmtree(convert_src, ignore_errors=True)
+        shutil.copytree(tree, convert_src)
+
+    def empty_dest():
+        shutil.rmtree(deploy_dest, ignore_errors=True)
+
+    def deployed(percent):
+        def prepare():
+            shutil.rmtree(incr_src, ignore_errors=True)
+            shutil.rmtree(incr_dest, ignore_errors=True)
+            shutil.copytree(tree, incr_src)
+            encoding_tool.deploy(incr_src, incr_dest, FROM_ENC, TO_ENC, recursive=True, jobs=jobs)
+            if percent:
+                touch_files(incr_src, percent, seed=1)
+        return prepare
+
+    scenarios = []
+    for n in sorted({1, jobs}):
+        scenarios.append((f"convert -j{n}", fresh_copy,
+                          {'command': 'convert', 'src': convert_src, 'jobs': n}))
+    for n in sorted({1, jobs}):
+        scenarios.append((f"deploy -j{n} 全量", empty_dest,
+                          {'command': 'deploy', 'src': tree, 'dest': deploy_dest, 'jobs': n, 'full': True}))
+    scenarios.append(("deploy 增量 (无变化)", deployed(0),
+                      {'command': 'deploy', 'src': incr_src, 'dest': incr_dest, 'jobs': 1}))
+    scenarios.append((f"deploy -j{jobs} 增量 (改 {touch:g}%)", deployed(touch),
+                      {'command': 'deploy', 'src': incr_src, 'dest': incr_dest, 'jobs': jobs}))
+    if stream_log:
+        stream_out = os.path.join(work, 'stream_out.log')
+        size_mb = os.path.getsize(stream_log) / 1024 / 1024
+        scenarios.append((f"单文件流式 ({size_mb:.0f} MB)", lambda: None,
+                          {'command': 'transcode', 'src': stream_log, 'dest': stream_out, 'files': 1}))
+    return scenarios
+
+
+def remove_scratch(work):
+    """删除工作目录中的场景中间目录，保留源码树以便下次复用"""
+    for name in SCRATCH_NAMES:
+        path = os.path.join(work, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def format_syscalls(stats):
+    if 'strace' in stats:
+        top = ', '.join(f"{name} {count}" for name, count in stats['strace']['top'])
+        return f"{stats['strace']['total']} ({top})"
+    if stats.get('syscr') is None:
+        return '-'
+    return f"r {stats['syscr']} / w {stats['syscw']}"
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        run_child(json.loads(sys.argv[2]))
+        return
+
+    parser = argparse.ArgumentParser(description="encoding_tool 基准")
+    parser.add_argument("-n", "--files", type=int, default=5000, help="普通源文件数 (默认: 5000)")
+    parser.add_argument("--lines", type=int, default=200, help="普通源文件的平均行数 (默认: 200)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"各类文件的比例 (默认: {DEFAULT_MIX})")
+    parser.add_argument("--large", type=int, default=2, help="大文件个数 (默认: 2)")
+    parser.add_argument("--large-mb", type=int, default=20, help="每个大文件的大小 MB (默认: 20)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="并行场景的进程数 (默认: CPU 核数)")
+    parser.add_argument("--touch", type=float, default=1, help="增量场景中修改的文件比例 %% (默认: 1)")
+    parser.add_argument("--stream-mb", type=int, default=0,
+                        help="单文件流式转换场景的日志大小 MB (默认: 0 = 不测)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子 (默认: 0)")
+    parser.add_argument("--dir", help="工作目录 (默认: 临时目录)")
+    parser.add_argument("--strace", action="store_true", help="用 strace -f -c 统计全部系统调用")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录与中间目录")
+    args = parser.parse_args()
+
+    if args.strace and not shutil.which('strace'):
+        parser.error("未找到 strace")
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 只删除本脚本创建的临时目录，--dir 指定的目录不能整个删除
+    created = not args.dir
+    work = tempfile.mkdtemp(prefix='bench_encoding_') if created else os.path.abspath(args.dir)
+    os.makedirs(work, exist_ok=True)
+    tree = os.path.join(work, 'tree')
+    params = {'files': args.files, 'lines': args.lines, 'mix': args.mix, 'large': args.large,
+              'large_mb': args.large_mb, 'seed': args.seed}
+
+    print(f"生成源码树 -> {tree}")
+    counts = generate_tree(tree, params)
+    file_count, total_size = tree_stats(tree)
+    print(f"  {file_count} 个文件, {total_size / 1024 / 1024:.1f} MB: "
+          + ", ".join(f"{kind} {n}" for kind, n in counts.items()))
+    print(f"  编码: {FROM_ENC} -> {TO_ENC}, CPU 核数 {os.cpu_count()}, Python {sys.version.split()[0]}")
+    stream_log = None
+    if args.stream_mb:
+        stream_log = os.path.join(work, 'stream.log')
+        print(f"生成日志 ({args.stream_mb} MB) -> {stream_log}")
+        generate_log(stream_log, args.stream_mb, args.seed)
+        params['stream_mb'] = args.stream_mb
+
+    results = []
+    print(f"\n{'场景':<24} {'处理':>6} {'耗时(s)':>8} {'文件/s':>9} {'MB/s':>8} "
+          f"{'峰值(MB)':>9} {'工作进程(MB)':>12}  系统调用")
+    try:
+        for name, prepare, spec in build_scenarios(tree, work, max(1, args.jobs), args.touch, stream_log):
+            prepare()
+            stats = measure(spec)
+            if args.strace:
+                prepare()
+                stats['strace'] = measure(spec, strace=True, work_dir=work)['strace']
+            # 文件/s 按整棵源码树计算 (增量场景中包含未变化而跳过的文件)，MB/s 按实际处理的字节计算
+            seconds = max(stats['seconds'], 1e-9)
+            files = spec.get('files', file_count)
+            print(f"{name:<24} {stats['processed']:>6} {stats['seconds']:>8.2f} {files / seconds:>9.0f} "
+                  f"{stats['bytes_in'] / 1024 / 1024 / seconds:>8.1f} {stats['peak_mb']:>9.1f} "
+                  f"{stats['worker_peak_mb']:>12.1f}  {format_syscalls(stats)}")
+            if stats['failed']:
+                print(f"  警告: {stats['failed']} 个文件失败")
+            results.append({'scenario': name, **stats})
+    finally:
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({'params': params, 'files': file_count, 'bytes': total_size,
+                           'cpu_count': os.cpu_count(), 'python': sys.version.split()[0],
+                           'results': results}, f, ensure_ascii=False, indent=2)
+        if not args.keep:
+            if created:
+                shutil.rmtree(work, ignore_errors=True)
+            else:
+                remove_scratch(work)
+
+
+if __name__ == "__main__":
+    main()
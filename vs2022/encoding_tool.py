@@ -1,131 +1,1407 @@
 """
 通用编码转换工具
+
+命令行: python encoding_tool.py convert|deploy|watch|detect|check ... (见 -h)
+作为库使用时各函数不输出，返回结构化结果:
+    from encoding_tool import deploy
+    result = deploy('src', 'dest', 'utf-8', 'gbk', recursive=True, jobs=0,
+                    progress=lambda file, done, total: ...)
+    for file in result.failed:
+        print(file.path, file.error)
 """
 import sys
 import os
+import time
+import json
+import re
+import glob
+import codecs
+import shutil
+import hashlib
+import copy
+import functools
+import threading
 import argparse
-
-sys.stdout.reconfigure(encoding='utf-8')
+import tempfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Optional, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
 
 # 支持的编码
 ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'utf-16', 'ascii', 'latin-1']
+# 源编码为 auto 时逐个文件自动识别
+AUTO = 'auto'
 # 支持的文件扩展名
 EXTENSIONS = ['.cpp', '.h', '.hpp', '.c', '.cc', '.cxx', '.txt', '.py', '.java', '.cs']
+# 默认排除的目录: 版本库、VS 缓存、构建输出、依赖
+DEFAULT_EXCLUDES = ['.git/', '.vs/', 'build/', 'x64/', 'Debug/', 'Release/', 'node_modules/']
+# 工程模式: 解决方案/项目文件扩展名，以及要处理的项目项类型
+SOLUTION_EXTENSIONS = ('.sln', '.slnx')
+PROJECT_EXTENSIONS = ('.vcxproj',)
+PROJECT_ITEM_TYPES = ('ClCompile', 'ClInclude')
+# 流式转换时每次读取的字节数
+CHUNK_SIZE = 1024 * 1024
+# os.copy_file_range 单次调用复制的最大字节数
+COPY_RANGE_SIZE = 64 * 1024 * 1024
+# 自动识别编码时读取的样本大小
+DETECT_SAMPLE_SIZE = 16 * 1024
+
+# 字节序标记
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+# 增量部署清单（保存在目标目录中）
+MANIFEST_NAME = '.encoding_manifest.json'
+MANIFEST_VERSION = 1
+
+# watch: 轮询间隔、防抖延迟与主循环检查间隔 (秒)
+POLL_INTERVAL = 0.3
+DEBOUNCE_DELAY = 0.15
+WATCH_TICK = 0.05
+
+# 判断编码是否兼容 ASCII 时使用的探测文本
+ASCII_PROBE = 'int main() { return 0; }\r\n'
+
+# 无法用目标编码表示的字符的处理方式 -> codecs 错误处理器
+# strict: 报错跳过该文件; replace: 替换为 ?; ignore: 删除; ucn: 写成 C/C++ 通用字符名 \uXXXX
+ERROR_POLICIES = {
+    'strict': 'strict',
+    'replace': 'replace',
+    'ignore': 'ignore',
+    'ucn': 'encoding_tool.ucn',
+}
+# check: 每个文件最多列出的问题字符数
+CHECK_REPORT_LIMIT = 100
+
+# 单个文件的处理结果 (FileResult.status)
+ACTION_CONVERTED = 'converted'
+ACTION_COPIED = 'copied'
+ACTION_LINKED = 'linked'
+ACTION_SKIPPED = 'skipped'
+ACTION_DETECTED = 'detected'
+ACTION_FAILED = 'failed'
+ACTION_LABELS = {
+    ACTION_CONVERTED: '转换',
+    ACTION_COPIED: '复制',
+    ACTION_LINKED: '硬链接',
+    ACTION_SKIPPED: '跳过',
+    ACTION_DETECTED: '识别',
+    ACTION_FAILED: '失败',
+}
+
+# 命令行进度条: 宽度与最短刷新间隔 (秒)
+PROGRESS_WIDTH = 30
+PROGRESS_INTERVAL = 0.1
+
+# 部署时每个文件的处理方式: 转换编码 / 原样复制 / 硬链接 (后两者用于镜像部署中的非文本文件)
+METHOD_TRANSCODE = 'transcode'
+METHOD_COPY = 'copy'
+METHOD_LINK = 'link'
+
+# 用 bytes.translate 删除这些字节后按剩余长度计数
+ASCII_BYTES = bytes(range(0x80))
+# GB2312 区 (常用汉字与全角符号) 的双字节均在 0xA1-0xFE；
+# GBK 扩展区的首/尾字节落在 0x81-0xA0，正常中文文本中较少出现
+NON_GB2312_BYTES = bytes(range(0xa1)) + b'\xff'
+
+@dataclass
+class FileResult:
+    """单个文件的处理结果"""
+    path: str                           # 相对路径 (单个文件时为文件名)
+    status: str                         # ACTION_* 之一
+    bytes_in: int = 0                   # 源文件字节数
+    bytes_out: int = 0                  # 写入目标的字节数，未写入时为 0
+    encoding: Optional[str] = None      # 实际使用的源编码
+    confidence: Optional[float] = None  # 自动识别的置信度，指定源编码时为 None
+    duration: float = 0.0               # 处理耗时 (秒)
+    error: Optional[str] = None
+    entry: Optional[dict] = field(default=None, repr=False)  # 部署清单记录
+
+    @property
+    def detected(self):
+        """自动识别结果的显示文本，未自动识别时为 None"""
+        return format_detected(self.encoding, self.confidence) if self.confidence is not None else None
 
-def convert_file(file_path, from_enc, to_enc):
-    """转换单个文件的编码"""
+    def __bool__(self):
+        """兼容以前返回 bool 的 convert_file / copy_and_convert: 失败时为假"""
+        return self.status != ACTION_FAILED
+
+@dataclass
+class RunResult:
+    """一次 convert / deploy 的结果"""
+    files: List[FileResult] = field(default_factory=list)  # 本次处理的文件，按遍历顺序
+    elapsed: float = 0.0
+    unchanged: int = 0                                      # 增量部署中未变化而跳过的文件数
+    removed: List[str] = field(default_factory=list)       # 增量部署中从目标目录删除的文件
+
+    @property
+    def failed(self):
+        return [r for r in self.files if r.status == ACTION_FAILED]
+
+    @property
+    def bytes_in(self):
+        return sum(r.bytes_in for r in self.files)
+
+    @property
+    def bytes_out(self):
+        return sum(r.bytes_out for r in self.files)
+
+    def count(self, status):
+        return sum(1 for r in self.files if r.status == status)
+
+@dataclass
+class CheckResult:
+    """check 中单个文件的结果"""
+    path: str
+    encoding: Optional[str] = None
+    confidence: Optional[float] = None
+    count: int = 0                      # 无法用目标编码表示的字符总数
+    problems: List[Tuple[int, int, str]] = field(default_factory=list)  # [(行, 列, 字符)]，最多 CHECK_REPORT_LIMIT 个
+    error: Optional[str] = None         # 无法读取或无法按源编码解码
+
+def _ucn_replace(error):
+    """编码错误处理器: 把无法编码的字符写成 C/C++ 通用字符名 (\\uXXXX / \\UXXXXXXXX)"""
+    if not isinstance(error, UnicodeEncodeError):
+        raise error
+    chars = error.object[error.start:error.end]
+    return ''.join(f'\\u{ord(c):04X}' if ord(c) <= 0xFFFF else f'\\U{ord(c):08X}' for c in chars), error.end
+
+codecs.register_error(ERROR_POLICIES['ucn'], _ucn_replace)
+
+def transcode(src_path, dest_path, from_enc, to_enc, chunk_size=CHUNK_SIZE, errors='strict'):
+    """
+    流式转换编码: 以固定大小的块读取，增量解码/编码后写入同目录的临时文件，
+    成功后原子替换 dest_path；失败时删除临时文件，目标（原地转换时即源文件）保持不变
+    按字节处理，换行符原样保留；内存占用与文件大小无关
+    errors 为 ERROR_POLICIES 中的策略，决定无法用目标编码表示的字符如何处理
+    返回读取的字节数
+    """
+    decoder = codecs.getincrementaldecoder(from_enc)()
+    encoder = codecs.getincrementalencoder(to_enc)(ERROR_POLICIES[errors])
+    dest_dir = os.path.dirname(os.path.abspath(dest_path))
+    fd, temp_path = tempfile.mkstemp(prefix='.transcode_', dir=dest_dir)
+    total = 0
     try:
-        with open(file_path, 'r', encoding=from_enc) as f:
-            content = f.read()
-        with open(file_path, 'w', encoding=to_enc) as f:
-            f.write(content)
-        return True
-    except Exception as e:
-        print(f"  错误: {e}")
+        with open(src_path, 'rb') as src, os.fdopen(fd, 'wb') as dest:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                total += len(chunk)
+                dest.write(encoder.encode(decoder.decode(chunk)))
+            dest.write(encoder.encode(decoder.decode(b'', final=True), final=True))
+        shutil.copymode(src_path, temp_path)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return total
+
+def detect_encoding(data, truncated=False):
+    """
+    按字节特征识别编码，返回 (编码, 置信度 0~1)；无法识别时编码为 None
+    依次检查: BOM -> 纯 ASCII -> 无 BOM 的 UTF-16 -> UTF-8 校验 -> GBK/GB18030 双字节评分
+    truncated=True 表示 data 只是文件开头的样本，末尾可能截断了多字节字符；
+    此时纯 ASCII 样本不能说明整个文件是 ASCII，按 UTF-8 处理
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding, 1.0
+
+    # 无 BOM 的 UTF-16: 英文/代码为主的文本中，每个字符的高字节大多为 0
+    # (0 也是 ASCII 字节，需在 ASCII 判断之前检查)
+    half = len(data) // 2
+    if half and 0 in data:
+        zeros_even = data[0::2].count(0) / half
+        zeros_odd = data[1::2].count(0) / half
+        if zeros_odd > 0.3 and zeros_even < 0.05:
+            return 'utf-16-le', min(0.99, 0.5 + zeros_odd)
+        if zeros_even > 0.3 and zeros_odd < 0.05:
+            return 'utf-16-be', min(0.99, 0.5 + zeros_even)
+
+    if data.isascii() and not truncated:
+        return 'ascii', 1.0
+
+    # UTF-8 校验，遇到第一个非法字节即停止
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(data, final=not truncated)
+        # GBK 文本极少能通过 UTF-8 校验，非 ASCII 字节越多越可信
+        non_ascii = len(data.translate(None, ASCII_BYTES))
+        return 'utf-8', min(0.99, 0.8 + 0.02 * non_ascii)
+    except UnicodeDecodeError:
+        pass
+
+    # GBK / GB18030: 校验后按落在 GB2312 区的高位字节比例评分
+    for encoding in ('gbk', 'gb18030'):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(data, final=not truncated)
+        except UnicodeDecodeError:
+            continue
+        non_ascii = len(data.translate(None, ASCII_BYTES))
+        common = len(data.translate(None, NON_GB2312_BYTES))
+        return encoding, round(0.5 + 0.49 * common / non_ascii, 2)
+
+    return None, 0.0
+
+def detect_file_encoding(file_path, sample_size=DETECT_SAMPLE_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    读取文件开头的样本识别编码，返回 (编码, 置信度)
+    样本为纯 ASCII 时继续向后扫描，以第一个非 ASCII 字节起的片段识别编码；
+    读到文件末尾仍为纯 ASCII 时才判定为 ascii
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read(sample_size + 1)
+        truncated = len(data) > sample_size
+        sample = data[:sample_size]
+        encoding, confidence = detect_encoding(sample, truncated)
+        if not (truncated and encoding == 'utf-8' and sample.isascii()):
+            return encoding, confidence
+
+        data = data[sample_size:]
+        while data.isascii():
+            data = f.read(chunk_size)
+            if not data:
+                return 'ascii', 1.0
+        # 非 ASCII 字节一定是字符的首字节，从这里开始的样本不会截断多字节字符
+        data = data.lstrip(ASCII_BYTES)
+        if len(data) <= sample_size:
+            data += f.read(sample_size + 1 - len(data))
+    truncated = len(data) > sample_size
+    return detect_encoding(data[:sample_size], truncated)
+
+def resolve_encoding(file_path, from_enc):
+    """
+    源编码为 auto 时识别文件编码，返回 (编码, 置信度)；否则原样返回 (from_enc, None)
+    无法识别时抛出 ValueError
+    """
+    if from_enc != AUTO:
+        return from_enc, None
+    encoding, confidence = detect_file_encoding(file_path)
+    if encoding is None:
+        raise ValueError("无法识别编码")
+    return encoding, confidence
+
+def format_detected(encoding, confidence):
+    return f"[{encoding}, 置信度 {confidence:.2f}]"
+
+def normalize_encoding(encoding):
+    """编码的规范名称，如 GBK / cp936 -> gbk，UTF8 -> utf-8"""
+    return codecs.lookup(encoding).name
+
+@functools.lru_cache(maxsize=None)
+def is_ascii_compatible(encoding):
+    """ASCII 文本在该编码下字节完全相同（无 BOM、单字节 ASCII）"""
+    try:
+        return ASCII_PROBE.encode(encoding) == ASCII_PROBE.encode('ascii')
+    except LookupError:
         return False
 
-def copy_and_convert(src_path, dest_path, from_enc, to_enc):
-    """复制文件并转换编码"""
+def is_ascii_file(file_path, chunk_size=CHUNK_SIZE):
+    """文件是否只含 ASCII 字节，遇到第一个非 ASCII 块即返回"""
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return True
+            if not chunk.isascii():
+                return False
+
+def is_valid_encoding(file_path, encoding, chunk_size=CHUNK_SIZE):
+    """文件能否按 encoding 完整解码，遇到第一个非法字节即返回"""
+    decoder = codecs.getincrementaldecoder(encoding)()
     try:
-        with open(src_path, 'r', encoding=from_enc) as f:
-            content = f.read()
-        with open(dest_path, 'w', encoding=to_enc) as f:
-            f.write(content)
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    decoder.decode(b'', final=True)
+                    return True
+                decoder.decode(chunk)
+    except UnicodeDecodeError:
+        return False
+
+def is_unchanged(file_path, encoding, to_enc):
+    """
+    按 encoding 读取的文件转换到 to_enc 后字节不变、无需转换:
+    已经是目标编码，或只含 ASCII 且两种编码都兼容 ASCII
+    process_file 与 check 共用这一判断，保证检查结果与实际转换一致
+    """
+    if normalize_encoding(encoding) == normalize_encoding(to_enc):
         return True
-    except Exception as e:
-        print(f"  错误: {e}")
+    return is_ascii_compatible(encoding) and is_ascii_compatible(to_enc) and is_ascii_file(file_path)
+
+def copy_file(src_path, dest_path):
+    """
+    按字节原样复制到 dest_path（部署目标是生成的副本，直接覆盖写入，省去临时文件）
+    优先使用 os.copy_file_range 在内核中复制，不支持时退回 shutil.copyfile
+    (其内部在各平台使用 sendfile / fcopyfile / CopyFile 等快速路径)
+    返回复制的字节数
+    """
+    # 目标可能是之前部署时创建的硬链接，直接覆盖写入会改掉源文件
+    if os.path.exists(dest_path) and os.path.samefile(src_path, dest_path):
+        os.remove(dest_path)
+    if hasattr(os, 'copy_file_range'):
+        with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+            try:
+                while os.copy_file_range(src.fileno(), dest.fileno(), COPY_RANGE_SIZE) > 0:
+                    pass
+            except OSError:
+                # 跨文件系统等情况下不支持，从头改用普通复制
+                src.seek(0)
+                dest.seek(0)
+                dest.truncate()
+                shutil.copyfileobj(src, dest)
+            size = dest.tell()
+    else:
+        shutil.copyfile(src_path, dest_path)
+        size = os.path.getsize(dest_path)
+    shutil.copymode(src_path, dest_path)
+    return size
+
+def mirror_file(src_path, dest_path, hardlink=False):
+    """
+    镜像部署中的非文本文件: 原样复制并保留 mtime，数据只经过内核 (见 copy_file)
+    hardlink=True 时创建硬链接，不支持 (跨文件系统、FAT 等) 时退回复制
+    返回 (动作, 文件字节数)
+    """
+    if hardlink:
+        try:
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+            os.link(src_path, dest_path)
+            return ACTION_LINKED, os.path.getsize(dest_path)
+        except OSError:
+            pass
+    size = copy_file(src_path, dest_path)
+    src_stat = os.stat(src_path)
+    os.utime(dest_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return ACTION_COPIED, size
+
+def process_file(src_path, dest_path, from_enc, to_enc, errors='strict'):
+    """
+    处理单个文件，dest_path 为 None 表示原地转换
+    先做廉价的预检查 (is_unchanged):
+    - 只含 ASCII 且源/目标编码都兼容 ASCII: 字节不变，部署时直接复制，原地转换时跳过
+    - 已经是目标编码: 同上
+    其余文件流式转换；单个文件失败时抛出异常
+    返回 FileResult (path 为 src_path，不含耗时)
+    """
+    encoding, confidence = resolve_encoding(src_path, from_enc)
+    result = FileResult(src_path, ACTION_SKIPPED, encoding=encoding, confidence=confidence)
+
+    if not is_unchanged(src_path, encoding, to_enc):
+        try:
+            result.bytes_in = transcode(src_path, dest_path or src_path, encoding, to_enc, errors=errors)
+            result.status = ACTION_CONVERTED
+            result.bytes_out = os.path.getsize(dest_path or src_path)
+            return result
+        except UnicodeDecodeError:
+            # 按源编码无法解码，但已经是目标编码的文件保持原样
+            if not is_valid_encoding(src_path, to_enc):
+                raise
+
+    if dest_path is None:
+        result.bytes_in = os.path.getsize(src_path)
+    else:
+        result.status = ACTION_COPIED
+        result.bytes_in = result.bytes_out = copy_file(src_path, dest_path)
+    return result
+
+def convert_file(file_path, from_enc, to_enc, errors='strict'):
+    """转换单个文件的编码 (原地)，返回 FileResult，失败时 status 为 ACTION_FAILED (布尔值为假)"""
+    return _transcode_task((file_path, None, os.path.basename(file_path), from_enc, to_enc, errors,
+                            METHOD_TRANSCODE))
+
+def copy_and_convert(src_path, dest_path, from_enc, to_enc, errors='strict'):
+    """复制文件并转换编码，返回 FileResult，失败时 status 为 ACTION_FAILED (布尔值为假)"""
+    return _transcode_task((src_path, dest_path, os.path.basename(src_path), from_enc, to_enc, errors,
+                            METHOD_TRANSCODE))
+
+def find_unencodable(file_path, from_enc, to_enc, limit=CHECK_REPORT_LIMIT, chunk_size=CHUNK_SIZE):
+    """
+    找出文件中无法用目标编码表示的字符，不写入任何文件
+    逐块解码：整块能编码时只统计换行；失败的块再逐行、逐字符定位
+    返回 (问题字符总数, [(行, 列, 字符), ...] 最多 limit 个)，行列从 1 开始，列按字符计
+    源编码无法解码时抛出 UnicodeDecodeError，start 为文件中的字节偏移
+    """
+    decoder = codecs.getincrementaldecoder(from_enc)()
+    count = 0
+    problems = []
+    line, column = 1, 0  # column: 当前行已经过的字符数
+    offset = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            pending = decoder.getstate()[0]
+            try:
+                text = decoder.decode(chunk, final=not chunk)
+            except UnicodeDecodeError as e:
+                e.start += offset - len(pending)
+                raise
+            offset += len(chunk)
+
+            try:
+                text.encode(to_enc)
+                newlines = text.count('\n')
+                if newlines:
+                    line += newlines
+                    column = len(text) - text.rfind('\n') - 1
+                else:
+                    column += len(text)
+            except UnicodeEncodeError:
+                for i, segment in enumerate(text.split('\n')):
+                    if i:
+                        line += 1
+                        column = 0
+                    try:
+                        segment.encode(to_enc)
+                    except UnicodeEncodeError:
+                        for j, char in enumerate(segment):
+                            try:
+                                char.encode(to_enc)
+                            except UnicodeEncodeError:
+                                count += 1
+                                if len(problems) < limit:
+                                    problems.append((line, column + j + 1, char))
+                    column += len(segment)
+
+            if not chunk:
+                break
+    return count, problems
+
+def _translate_pattern(pattern):
+    """把一条 gitignore 模式 (已去掉 ! 与结尾的 /) 转为正则，匹配以 / 分隔的相对路径"""
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+            continue
+        if c == '*':
+            regex += '[^/]*'
+        elif c == '?':
+            regex += '[^/]'
+        elif c == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex += f'[{body}]'
+            i = end
+        else:
+            regex += re.escape(c)
+        i += 1
+    # 不含 / 的模式匹配任意层级的文件名/目录名
+    prefix = '' if anchored else '(?:.*/)?'
+    return re.compile(f'^{prefix}{regex}$')
+
+class IgnoreRules:
+    """
+    gitignore 风格的排除规则:
+    # 注释、! 取反、结尾 / 只匹配目录、含 / 的模式相对根目录、* ? [] ** 通配
+    后面的规则优先；目录被排除时整个子树都不再遍历
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern):
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith('#'):
+            return
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        if pattern:
+            self.rules.append((_translate_pattern(pattern), negate, dir_only))
+
+    def add_file(self, file_path):
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                self.add(line)
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """rel_path 为以 / 分隔的相对路径"""
+        ignored = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+class SourceFilter:
+    """
+    要处理的文件: 扩展名集合 + 排除规则
+    files 不为 None 时为工程模式: 只处理其中列出的相对路径 (以 / 分隔)，不再遍历目录，
+    此时默认不按扩展名过滤
+    """
+
+    def __init__(self, extensions=None, ignore=None, files=None):
+        if extensions is None and files is None:
+            extensions = EXTENSIONS
+        self.extensions = frozenset(ext.lower() for ext in extensions) if extensions is not None else None
+        self.ignore = ignore if ignore is not None else IgnoreRules(DEFAULT_EXCLUDES)
+        self.files = sorted(files) if files is not None else None
+        # 工程文件中的路径大小写可能与磁盘不一致，比较时按平台规则规范化
+        self._file_keys = frozenset(os.path.normcase(f) for f in files) if files is not None else None
+
+    def mirror(self):
+        """排除规则相同、但接受所有文件的副本 (镜像部署时遍历用)"""
+        mirror = copy.copy(self)
+        mirror.extensions = None
+        mirror.files = mirror._file_keys = None
+        return mirror
+
+    def accepts_dir(self, rel_path):
+        return not self.ignore.is_ignored(rel_path, True)
+
+    def accepts_file(self, name, rel_path):
+        if self._file_keys is not None and os.path.normcase(rel_path) not in self._file_keys:
+            return False
+        if self.extensions is not None and os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        return not self.ignore.is_ignored(rel_path)
+
+    def accepts_path(self, rel_path):
+        """检查文件及其所有上级目录（用于文件事件，路径不经过遍历）"""
+        parts = rel_path.replace(os.sep, '/').split('/')
+        for i in range(1, len(parts)):
+            if not self.accepts_dir('/'.join(parts[:i])):
+                return False
+        return self.accepts_file(parts[-1], '/'.join(parts))
+
+def iter_source_files(root_dir, recursive=False, file_filter=None):
+    """
+    遍历目录中要处理的文件，产生 (完整路径, 相对路径)
+    基于 os.scandir，直接使用目录项中缓存的类型信息，不再逐个 stat；
+    被排除的目录在进入前剪掉，遍历开销只与相关文件数有关
+    """
+    file_filter = file_filter or SourceFilter()
+    if file_filter.files is not None:
+        for rel_path in file_filter.files:
+            file_path = os.path.join(root_dir, rel_path.replace('/', os.sep))
+            if os.path.isfile(file_path) and file_filter.accepts_path(rel_path):
+                yield file_path, rel_path.replace('/', os.sep)
+        return
+
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root_dir, rel_dir) if rel_dir else root_dir) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if recursive and file_filter.accepts_dir(rel_path):
+                    subdirs.append(rel_path)
+            elif entry.is_file() and file_filter.accepts_file(entry.name, rel_path):
+                yield entry.path, rel_path.replace('/', os.sep)
+        stack.extend(reversed(subdirs))
+
+def is_project_file(path):
+    return os.path.isfile(path) and path.lower().endswith(SOLUTION_EXTENSIONS + PROJECT_EXTENSIONS)
+
+def _project_path(base_dir, path):
+    """工程文件中的路径统一使用反斜杠，转换为本机路径"""
+    return os.path.normpath(os.path.join(base_dir, path.replace('\\', os.sep)))
+
+def parse_solution(sln_path):
+    """解析 .sln / .slnx，返回其中 C++ 项目 (.vcxproj) 的完整路径"""
+    sln_dir = os.path.dirname(os.path.abspath(sln_path))
+    if sln_path.lower().endswith('.slnx'):
+        paths = [elem.get('Path') for elem in ET.parse(sln_path).iter() if elem.tag == 'Project']
+    else:
+        with open(sln_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            paths = re.findall(r'^Project\("[^"]*"\)\s*=\s*"[^"]*"\s*,\s*"([^"]+)"', f.read(), re.M)
+    return [_project_path(sln_dir, path) for path in paths
+            if path and path.lower().endswith(PROJECT_EXTENSIONS)]
+
+def parse_project_items(proj_path, solution_dir=None, item_types=PROJECT_ITEM_TYPES, notes=None):
+    """
+    读取 .vcxproj (及同名 .vcxproj.filters) 中指定类型项目项的 Include，返回完整路径集合
+    支持 ; 分隔的多个路径、通配符、$(ProjectDir) / $(SolutionDir)；
+    含其他 MSBuild 宏的项无法静态求值，跳过并在 notes 列表中记录
+    """
+    proj_dir = os.path.dirname(os.path.abspath(proj_path))
+    macros = {
+        '$(ProjectDir)': proj_dir + os.sep,
+        '$(MSBuildProjectDirectory)': proj_dir,
+        '$(MSBuildThisFileDirectory)': proj_dir + os.sep,
+        '$(SolutionDir)': (solution_dir or proj_dir) + os.sep,
+    }
+    files = set()
+    for xml_path in (proj_path, proj_path + '.filters'):
+        if not os.path.isfile(xml_path):
+            continue
+        for elem in ET.parse(xml_path).iter():
+            # 去掉 MSBuild 命名空间；ItemDefinitionGroup 中的同名元素没有 Include，自然被忽略
+            if elem.tag.rsplit('}', 1)[-1] not in item_types or not elem.get('Include'):
+                continue
+            for include in elem.get('Include').split(';'):
+                include = include.strip()
+                for macro, value in macros.items():
+                    include = include.replace(macro, value)
+                if not include:
+                    continue
+                if '$(' in include or '%(' in include or '@(' in include:
+                    if notes is not None:
+                        notes.append(f"无法解析的项目项，已跳过: {include} ({os.path.basename(xml_path)})")
+                    continue
+                path = _project_path(proj_dir, include)
+                if '*' in include or '?' in include:
+                    files.update(glob.glob(path, recursive=True))
+                else:
+                    files.add(path)
+    return files
+
+def load_project_files(project_path):
+    """
+    解析解决方案或项目文件，返回 (根目录, 相对路径集合, 项目数, 提示信息列表)
+    根目录为 .sln / .vcxproj 所在目录；根目录之外的文件无法映射到部署目标，跳过并提示
+    """
+    project_path = os.path.abspath(project_path)
+    root_dir = os.path.dirname(project_path)
+    if project_path.lower().endswith(SOLUTION_EXTENSIONS):
+        projects = parse_solution(project_path)
+        solution_dir = root_dir
+    else:
+        projects = [project_path]
+        solution_dir = None
+
+    files = set()
+    notes = []
+    for proj_path in projects:
+        if not os.path.isfile(proj_path):
+            notes.append(f"项目文件不存在: {proj_path}")
+            continue
+        for path in parse_project_items(proj_path, solution_dir, notes=notes):
+            rel_path = os.path.relpath(path, root_dir)
+            if rel_path.startswith('..') or os.path.isabs(rel_path):
+                notes.append(f"文件不在 {root_dir} 下，已跳过: {path}")
+                continue
+            files.add(rel_path.replace(os.sep, '/'))
+    return root_dir, files, len(projects), notes
+
+def build_file_filter(args, path, report=None):
+    """
+    根据命令行参数构造 (根目录, SourceFilter)
+    path 为 .sln / .slnx / .vcxproj 时进入工程模式，根目录为其所在目录；
+    解析工程时的警告与汇总逐行交给 report(line)
+    """
+    files = None
+    root_dir = path
+    if is_project_file(path):
+        root_dir, files, project_count, notes = load_project_files(path)
+        if report:
+            for note in notes:
+                report(f"  警告: {note}")
+            report(f"工程: {os.path.basename(path)} ({project_count} 个项目, {len(files)} 个文件)")
+        # 文件集合由工程决定，不受 -r 限制
+        args.recursive = True
+
+    ignore = IgnoreRules([] if args.no_default_excludes else DEFAULT_EXCLUDES)
+    if args.gitignore:
+        gitignore = os.path.join(root_dir, '.gitignore')
+        if os.path.isfile(gitignore):
+            ignore.add_file(gitignore)
+    if args.exclude_from:
+        ignore.add_file(args.exclude_from)
+    for pattern in args.exclude:
+        ignore.add(pattern)
+    extensions = None
+    if args.ext:
+        extensions = [ext if ext.startswith('.') else '.' + ext for ext in args.ext.split(',') if ext]
+    return root_dir, SourceFilter(extensions, ignore, files)
+
+def add_errors_argument(parser):
+    parser.add_argument('--errors', choices=list(ERROR_POLICIES), default='strict',
+                        help='无法用目标编码表示的字符: strict 跳过该文件, replace 替换为 ?, ignore 删除, '
+                             'ucn 写成 \\uXXXX (默认: strict)')
+
+def add_mirror_arguments(parser):
+    parser.add_argument('--mirror', action='store_true',
+                        help='完整镜像源目录: 文本文件转换编码, 其他文件 (资源、.rc、.sln 等) 原样复制并保留 mtime')
+    parser.add_argument('--hardlink', action='store_true', help='镜像时其他文件使用硬链接代替复制')
+
+def add_filter_arguments(parser):
+    parser.add_argument('-x', '--exclude', action='append', default=[], metavar='PATTERN',
+                        help='排除规则, gitignore 语法, 可多次指定')
+    parser.add_argument('--exclude-from', metavar='FILE', help='从文件读取排除规则')
+    parser.add_argument('--gitignore', action='store_true', help='同时使用源目录下 .gitignore 的规则')
+    parser.add_argument('--no-default-excludes', action='store_true',
+                        help=f'不使用默认排除 ({" ".join(DEFAULT_EXCLUDES)})')
+    parser.add_argument('--ext', help='要处理的扩展名, 逗号分隔 (默认: 内置列表)')
+
+def file_sha256(file_path):
+    """计算文件内容哈希"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def make_manifest_entry(src_stat, src_hash, dest_path, method=METHOD_TRANSCODE):
+    dest_stat = os.stat(dest_path)
+    return {
+        'size': src_stat.st_size,
+        'mtime_ns': src_stat.st_mtime_ns,
+        'sha256': src_hash,
+        'dest_size': dest_stat.st_size,
+        'dest_mtime_ns': dest_stat.st_mtime_ns,
+        'method': method,
+    }
+
+def read_manifest(dest_dir):
+    """读取目标目录中的部署清单原始内容，不存在或格式不对时返回 {}"""
+    path = os.path.join(dest_dir, MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def manifest_files(data):
+    """清单中记录的全部相对路径 (不检查编码设置)，用于清理源目录中已删除的文件"""
+    files = data.get('files')
+    return set(files) if isinstance(files, dict) else set()
+
+def load_manifest(dest_dir, from_enc, to_enc, errors='strict', data=None):
+    """
+    读取目标目录中的部署清单 {相对路径: 记录}；data 为已读取的 read_manifest 结果时不再读文件
+    清单不存在、格式不对或编码设置 (含错误处理策略) 不同时返回空清单（全部重新部署）
+    """
+    if data is None:
+        data = read_manifest(dest_dir)
+    if (data.get('version') != MANIFEST_VERSION
+            or data.get('from') != from_enc or data.get('to') != to_enc
+            or data.get('errors', 'strict') != errors):
+        return {}
+    return data.get('files', {})
+
+def save_manifest(dest_dir, from_enc, to_enc, entries, errors='strict'):
+    """原子写入部署清单"""
+    path = os.path.join(dest_dir, MANIFEST_NAME)
+    temp_path = path + '.tmp'
+    # json.dumps 使用 C 实现的编码器；json.dump 逐段写入走纯 Python 路径，几万条记录时慢一个数量级
+    data = json.dumps({'version': MANIFEST_VERSION, 'from': from_enc, 'to': to_enc, 'errors': errors,
+                       'files': entries}, ensure_ascii=False)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def is_up_to_date(src_path, dest_path, entry, method=METHOD_TRANSCODE):
+    """
+    源文件对应的目标文件是否仍然有效：
+    目标文件存在且与记录一致、处理方式相同；源文件大小和 mtime 未变，或 mtime 变了但内容哈希相同
+    (原样镜像的文件不记录哈希，mtime 变化即重新复制)
+    """
+    if not entry or entry.get('method', METHOD_TRANSCODE) != method:
         return False
+    try:
+        dest_stat = os.stat(dest_path)
+    except OSError:
+        return False
+    if dest_stat.st_size != entry.get('dest_size') or dest_stat.st_mtime_ns != entry.get('dest_mtime_ns'):
+        return False
+
+    src_stat = os.stat(src_path)
+    if src_stat.st_size != entry.get('size'):
+        return False
+    if src_stat.st_mtime_ns == entry.get('mtime_ns'):
+        return True
+    if entry.get('sha256') and file_sha256(src_path) == entry['sha256']:
+        # 仅 mtime 变化（如切换分支、touch），更新记录即可
+        entry['mtime_ns'] = src_stat.st_mtime_ns
+        return True
+    return False
+
+def remove_stale_file(dest_dir, rel_path):
+    """删除源目录中已不存在的文件，并清理因此变空的子目录（不删除 dest_dir 本身）"""
+    dest_path = os.path.join(dest_dir, rel_path)
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    root = os.path.abspath(dest_dir)
+    parent = os.path.dirname(os.path.abspath(dest_path))
+    while parent != root and parent.startswith(root):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+def _transcode_task(task):
+    """
+    工作进程中执行的单个任务: (源路径, 目标路径, 相对路径, 源编码, 目标编码, 错误处理策略, 处理方式)
+    目标路径为 None 表示原地转换，源编码为 auto 时逐个识别；
+    处理方式为 METHOD_COPY / METHOD_LINK 时原样镜像，不读取内容
+    返回 FileResult；单个文件失败不影响其他文件 (status 为 ACTION_FAILED)，部署 (有目标路径) 时附带清单记录
+    """
+    src_path, dest_path, rel_path, from_enc, to_enc, errors, method = task
+    start = time.perf_counter()
+    try:
+        # 先取源文件状态：处理期间源文件被修改时，下次部署仍会重新处理
+        src_stat = os.stat(src_path) if dest_path else None
+        if method != METHOD_TRANSCODE:
+            action, size = mirror_file(src_path, dest_path, method == METHOD_LINK)
+            result = FileResult(rel_path, action, size, size if action == ACTION_COPIED else 0,
+                                entry=make_manifest_entry(src_stat, None, dest_path, method))
+        else:
+            result = process_file(src_path, dest_path, from_enc, to_enc, errors)
+            result.path = rel_path
+            if dest_path:
+                result.entry = make_manifest_entry(src_stat, file_sha256(src_path), dest_path)
+    except Exception as e:
+        result = FileResult(rel_path, ACTION_FAILED, error=str(e))
+    result.duration = time.perf_counter() - start
+    return result
+
+def map_tasks(func, tasks, jobs=1):
+    """
+    依次产生 func(task) 的结果 (按任务顺序)
+    jobs > 1 时使用进程池，func 必须是模块级函数
+    """
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # 小文件很多时按批分发，减少进程间通信
+            chunksize = max(1, min(256, len(tasks) // (jobs * 8)))
+            yield from executor.map(func, tasks, chunksize=chunksize)
+    else:
+        yield from map(func, tasks)
+
+def run_tasks(tasks, jobs=1, progress=None):
+    """
+    执行转换任务，jobs > 1 时使用进程池
+    每完成一个文件 (按任务顺序) 调用 progress(FileResult, 已完成数, 总数)
+    返回 [FileResult]
+    """
+    results = []
+    total = len(tasks)
+    for result in map_tasks(_transcode_task, tasks, jobs):
+        results.append(result)
+        if progress:
+            progress(result, len(results), total)
+    return results
+
+def resolve_jobs(jobs):
+    """并发数: 0 表示 CPU 核数"""
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return max(1, jobs)
+
+def list_files(path, recursive=False, file_filter=None):
+    """path 为文件时只处理该文件，为目录时遍历；返回 [(完整路径, 相对路径)]，路径不存在时抛出 FileNotFoundError"""
+    if os.path.isfile(path):
+        return [(path, os.path.basename(path))]
+    if os.path.isdir(path):
+        return list(iter_source_files(path, recursive, file_filter))
+    raise FileNotFoundError(f"路径不存在: {path}")
+
+def deploy_method(file_filter, rel_path, mirror=False, hardlink=False):
+    """部署时文件的处理方式: 符合规则的文本文件转换编码，镜像部署中的其他文件原样复制或硬链接"""
+    if not mirror or file_filter.accepts_file(os.path.basename(rel_path), rel_path.replace(os.sep, '/')):
+        return METHOD_TRANSCODE
+    return METHOD_LINK if hardlink else METHOD_COPY
+
+def deploy(src_dir, dest_dir, from_enc='utf-8', to_enc='gbk', recursive=False, jobs=1, full=False,
+           file_filter=None, errors='strict', mirror=False, hardlink=False, progress=None):
+    """
+    部署: 复制目录并转换编码
+    增量: 目标目录中的清单记录每个源文件的大小、mtime 与哈希，
+    未变化的文件跳过，源目录中已删除的文件从目标目录删除；full=True 时全部重新处理
+    mirror=True 时完整镜像源目录 (排除规则仍然生效): 其余文件原样复制并保留 mtime，
+    hardlink=True 时改为硬链接
+    返回 RunResult (files 只含本次处理的文件)；源目录不存在时抛出 FileNotFoundError
+    """
+    if not os.path.isdir(src_dir):
+        raise FileNotFoundError(f"源目录不存在: {src_dir}")
+    start = time.perf_counter()
+    file_filter = file_filter or SourceFilter()
+    walk_filter = file_filter.mirror() if mirror else file_filter
+    os.makedirs(dest_dir, exist_ok=True)
+
+    previous = read_manifest(dest_dir)
+    manifest = {} if full else load_manifest(dest_dir, from_enc, to_enc, errors, previous)
+    new_manifest = {}
+
+    # 目标子目录在主进程中预先创建
+    tasks = []
+    created_dirs = set()
+    seen = set()
+    for src_path, rel_path in iter_source_files(src_dir, recursive, walk_filter):
+        seen.add(rel_path)
+        dest_path = os.path.join(dest_dir, rel_path)
+        entry = manifest.get(rel_path)
+        method = deploy_method(file_filter, rel_path, mirror, hardlink)
+        if is_up_to_date(src_path, dest_path, entry, method):
+            new_manifest[rel_path] = entry
+            continue
+
+        dest_root = os.path.dirname(dest_path)
+        if dest_root not in created_dirs:
+            os.makedirs(dest_root, exist_ok=True)
+            created_dirs.add(dest_root)
+        tasks.append((src_path, dest_path, rel_path, from_enc, to_enc, errors, method))
+
+    result = RunResult(unchanged=len(new_manifest))
+    # 按上次清单中的全部文件清理: --full 或编码设置变化只让记录失效 (重新处理)，
+    # 源目录中已删除的文件仍要从目标目录删除
+    result.removed = sorted(rel_path for rel_path in manifest_files(previous) if rel_path not in seen)
+    for rel_path in result.removed:
+        remove_stale_file(dest_dir, rel_path)
+
+    result.files = run_tasks(tasks, resolve_jobs(jobs), progress)
+    new_manifest.update((r.path, r.entry) for r in result.files if r.status != ACTION_FAILED)
+    save_manifest(dest_dir, from_enc, to_enc, new_manifest, errors)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def convert(path, from_enc, to_enc, recursive=False, jobs=1, file_filter=None, errors='strict', progress=None):
+    """
+    转换文件或目录的编码 (原地转换)
+    返回 RunResult；路径不存在时抛出 FileNotFoundError
+    """
+    start = time.perf_counter()
+    tasks = [(file_path, None, rel_path, from_enc, to_enc, errors, METHOD_TRANSCODE)
+             for file_path, rel_path in list_files(path, recursive, file_filter)]
+    files = run_tasks(tasks, resolve_jobs(jobs), progress)
+    return RunResult(files, time.perf_counter() - start)
+
+def detect(path, recursive=False, file_filter=None, progress=None):
+    """
+    识别文件或目录中各文件的编码 (只读取开头的样本)
+    返回 [FileResult]，status 为 ACTION_DETECTED，无法识别时 encoding 为 None
+    """
+    files = list_files(path, recursive, file_filter)
+    results = []
+    for file_path, rel_path in files:
+        start = time.perf_counter()
+        try:
+            encoding, confidence = detect_file_encoding(file_path)
+            result = FileResult(rel_path, ACTION_DETECTED, encoding=encoding, confidence=confidence)
+        except OSError as e:
+            result = FileResult(rel_path, ACTION_FAILED, error=str(e))
+        result.duration = time.perf_counter() - start
+        results.append(result)
+        if progress:
+            progress(result, len(results), len(files))
+    return results
+
+def _check_task(task):
+    """工作进程中执行的检查任务: (源路径, 相对路径, 源编码, 目标编码)，返回 CheckResult"""
+    src_path, rel_path, from_enc, to_enc = task
+    result = CheckResult(rel_path)
+    try:
+        result.encoding, result.confidence = resolve_encoding(src_path, from_enc)
+        # 与 process_file 相同的预检查: 这些文件不会被转换
+        if is_unchanged(src_path, result.encoding, to_enc):
+            return result
+        try:
+            result.count, result.problems = find_unencodable(src_path, result.encoding, to_enc)
+        except UnicodeDecodeError as e:
+            if not is_valid_encoding(src_path, to_enc):
+                result.error = f"无法按 {result.encoding} 解码 (字节偏移 {e.start})"
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+def check(path, from_enc, to_enc, recursive=False, jobs=1, file_filter=None, progress=None):
+    """
+    预检查: 找出无法用目标编码表示的字符，不写入任何文件
+    返回 [CheckResult]；progress(CheckResult, 已完成数, 总数)；路径不存在时抛出 FileNotFoundError
+    """
+    tasks = [(file_path, rel_path, from_enc, to_enc)
+             for file_path, rel_path in list_files(path, recursive, file_filter)]
+    results = []
+    for result in map_tasks(_check_task, tasks, resolve_jobs(jobs)):
+        results.append(result)
+        if progress:
+            progress(result, len(results), len(tasks))
+    return results
+
+class ChangeCollector:
+    """
+    收集变化的文件 (相对路径)，并做防抖：
+    最后一次变化之后 debounce 秒内没有新的变化，才把这一批交给部署
+    编辑器保存时常见的 "写临时文件 -> 重命名 -> 修改属性" 会合并为一次处理
+    """
+
+    def __init__(self, debounce):
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.last_change = 0.0
+
+    def add(self, rel_path):
+        with self.lock:
+            self.pending.add(rel_path)
+            self.last_change = time.monotonic()
+
+    def pop_ready(self):
+        """返回已稳定的一批变化，没有时返回空集合"""
+        with self.lock:
+            if not self.pending or time.monotonic() - self.last_change < self.debounce:
+                return set()
+            batch, self.pending = self.pending, set()
+            return batch
+
+def snapshot(src_dir, recursive, file_filter=None):
+    """源目录快照 {相对路径: (mtime_ns, 大小)}"""
+    result = {}
+    for file_path, rel_path in iter_source_files(src_dir, recursive, file_filter):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        result[rel_path] = (st.st_mtime_ns, st.st_size)
+    return result
+
+def poll_changes(src_dir, recursive, collector, interval, stop_event, file_filter=None):
+    """轮询监视: 每隔 interval 秒对比一次快照"""
+    previous = snapshot(src_dir, recursive, file_filter)
+    while not stop_event.wait(interval):
+        current = snapshot(src_dir, recursive, file_filter)
+        for rel_path in current.keys() | previous.keys():
+            if current.get(rel_path) != previous.get(rel_path):
+                collector.add(rel_path)
+        previous = current
+
+def start_watchdog(src_dir, recursive, collector, file_filter=None):
+    """
+    使用 watchdog (inotify / ReadDirectoryChangesW / FSEvents) 监视，返回 observer
+    未安装 watchdog 时返回 None
+    """
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    root = os.path.abspath(src_dir)
+    file_filter = file_filter or SourceFilter()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            for path in (event.src_path, getattr(event, 'dest_path', '')):
+                if not path:
+                    continue
+                rel_path = os.path.relpath(os.path.abspath(path), root)
+                if rel_path.startswith('..') or (not recursive and os.sep in rel_path):
+                    continue
+                if not file_filter.accepts_path(rel_path):
+                    continue
+                collector.add(rel_path)
+
+    observer = Observer()
+    observer.schedule(Handler(), root, recursive=recursive)
+    observer.start()
+    return observer
+
+def deploy_changes(src_dir, dest_dir, batch, from_enc, to_enc, manifest, errors='strict',
+                   file_filter=None, mirror=False, hardlink=False):
+    """把一批变化的文件部署到目标目录，并更新清单，返回 RunResult"""
+    start = time.perf_counter()
+    result = RunResult()
+    for rel_path in sorted(batch):
+        src_path = os.path.join(src_dir, rel_path)
+        dest_path = os.path.join(dest_dir, rel_path)
+
+        if not os.path.isfile(src_path):
+            if rel_path in manifest:
+                remove_stale_file(dest_dir, rel_path)
+                del manifest[rel_path]
+                result.removed.append(rel_path)
+            continue
+
+        method = deploy_method(file_filter or SourceFilter(), rel_path, mirror, hardlink)
+        if is_up_to_date(src_path, dest_path, manifest.get(rel_path), method):
+            result.unchanged += 1
+            continue
 
-def deploy(src_dir, dest_dir, from_enc='utf-8', to_enc='gbk', recursive=False):
-    """部署: 复制目录并转换编码"""
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        file_result = _transcode_task((src_path, dest_path, rel_path, from_enc, to_enc, errors, method))
+        result.files.append(file_result)
+        if file_result.status != ACTION_FAILED:
+            manifest[rel_path] = file_result.entry
+
+    save_manifest(dest_dir, from_enc, to_enc, manifest, errors)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def watch(src_dir, dest_dir, from_enc='utf-8', to_enc='gbk', recursive=False,
+          interval=POLL_INTERVAL, debounce=DEBOUNCE_DELAY, polling=False, file_filter=None, errors='strict',
+          mirror=False, hardlink=False, progress=None, on_ready=None, on_batch=None):
+    """
+    监视源目录，保存后自动把变化的文件转换部署到目标目录，按 Ctrl+C (KeyboardInterrupt) 后返回
+    启动时先做一次增量部署 (progress 同 deploy)，完成后调用 on_ready(RunResult, 监视方式)；
+    之后每部署一批变化的文件调用 on_batch(RunResult)
+    安装了 watchdog 时使用系统文件事件，否则每 interval 秒轮询
+    """
+    file_filter = file_filter or SourceFilter()
+    result = deploy(src_dir, dest_dir, from_enc, to_enc, recursive, file_filter=file_filter, errors=errors,
+                    mirror=mirror, hardlink=hardlink, progress=progress)
+    manifest = load_manifest(dest_dir, from_enc, to_enc, errors)
+
+    walk_filter = file_filter.mirror() if mirror else file_filter
+    collector = ChangeCollector(debounce)
+    stop_event = threading.Event()
+    observer = None if polling else start_watchdog(src_dir, recursive, collector, walk_filter)
+    if observer is None:
+        threading.Thread(target=poll_changes,
+                         args=(src_dir, recursive, collector, interval, stop_event, walk_filter),
+                         daemon=True).start()
+        mode = f"轮询 (每 {interval}s)"
+    else:
+        mode = "文件系统事件 (watchdog)"
+
+    if on_ready:
+        on_ready(result, mode)
+    try:
+        while True:
+            batch = collector.pop_ready()
+            if batch:
+                result = deploy_changes(src_dir, dest_dir, batch, from_enc, to_enc, manifest, errors,
+                                        file_filter, mirror, hardlink)
+                if on_batch and (result.files or result.removed):
+                    on_batch(result)
+            time.sleep(WATCH_TICK)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+class ProgressBar:
+    """
+    命令行进度条: 在同一行刷新，限制刷新频率；输出不是终端时不显示
+    write() 在进度条上方输出一行 (如失败的文件)
+    """
+
+    def __init__(self, stream=None, width=PROGRESS_WIDTH, interval=PROGRESS_INTERVAL):
+        self.stream = stream or sys.stdout
+        self.enabled = self.stream.isatty()
+        self.width = width
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last = 0.0
+        self.shown = 0  # 当前显示的进度条宽度 (终端列数)
+
+    def update(self, done, total):
+        now = time.perf_counter()
+        if not self.enabled or (done < total and now - self.last < self.interval):
+            return
+        self.last = now
+        filled = self.width * done // total if total else self.width
+        rate = done / (now - self.start) if now > self.start else 0.0
+        digits = len(str(total))
+        text = (f"\r[{'#' * filled}{'-' * (self.width - filled)}] {done:>{digits}}/{total} "
+                f"{done * 100 // max(total, 1):3d}% {rate:8.0f} 文件/s")
+        self.stream.write(text)
+        self.stream.flush()
+        # 中文字符占两列
+        self.shown = len(text) - 1 + sum(1 for c in text if ord(c) > 0x7F)
+
+    def clear(self):
+        if self.shown:
+            self.stream.write('\r' + ' ' * self.shown + '\r')
+            self.stream.flush()
+            self.shown = 0
+
+    def write(self, line):
+        self.clear()
+        print(line, file=self.stream)
+
+def format_file_result(result):
+    """单个文件结果的输出行"""
+    if result.status == ACTION_FAILED:
+        return f"  {result.path}  错误: {result.error}"
+    detected = f" {result.detected}" if result.detected else ""
+    note = f" ({ACTION_LABELS[result.status]})" if result.status != ACTION_CONVERTED else ""
+    return f"  {result.path}{detected}{note}"
+
+def make_progress(verbose=False):
+    """命令行的 progress 回调: 默认只显示进度条与失败的文件，verbose 时逐个文件输出"""
+    bar = ProgressBar()
+
+    def progress(result, done, total):
+        if verbose or result.status == ACTION_FAILED:
+            bar.write(format_file_result(result))
+        bar.update(done, total)
+
+    return bar, progress
+
+def print_run_result(result):
+    """输出 convert / deploy 的汇总"""
+    failed = len(result.failed)
+    count = len(result.files) - failed
+    bytes_in = sum(r.bytes_in for r in result.files if r.status != ACTION_FAILED)
+    print()
+    print(f"完成! 共处理 {count} 个文件" + (f", 失败 {failed} 个" if failed else ""))
+    print(f"  转换 {result.count(ACTION_CONVERTED)} 个, 直接复制 {result.count(ACTION_COPIED)} 个, "
+          + (f"硬链接 {result.count(ACTION_LINKED)} 个, " if result.count(ACTION_LINKED) else "")
+          + f"跳过 {result.count(ACTION_SKIPPED)} 个 (纯 ASCII 或已是目标编码)")
+    if result.elapsed > 0:
+        print(f"耗时 {result.elapsed:.2f}s, {count / result.elapsed:.1f} 文件/s, "
+              f"{bytes_in / 1024 / 1024 / result.elapsed:.2f} MB/s")
+
+def print_deploy_header(src_dir, dest_dir, from_enc, to_enc, mirror=False, hardlink=False):
     print(f"源目录: {src_dir}")
     print(f"目标目录: {dest_dir}")
     print(f"编码转换: {from_enc} -> {to_enc}")
+    if mirror:
+        print(f"镜像部署: 其他文件{'硬链接' if hardlink else '原样复制'}")
     print()
 
-    if not os.path.exists(src_dir):
-        print("错误: 源目录不存在!")
-        return 0
+def print_deploy_result(result, full=False):
+    for rel_path in result.removed:
+        print(f"  删除: {rel_path}")
+    if not full:
+        print(f"增量部署: 未变化 {result.unchanged} 个, 处理 {len(result.files)} 个, "
+              f"删除 {len(result.removed)} 个")
+    print_run_result(result)
 
-    if not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
+def command_convert(args):
+    root_dir, file_filter = build_file_filter(args, args.path, print)
+    single = os.path.isfile(root_dir)
+    print(f"{'文件' if single else '目录'}: {root_dir}")
+    print(f"转换: {args.from_enc} -> {args.to_enc}")
+    print()
+    bar, progress = make_progress(args.verbose or single)
+    try:
+        result = convert(root_dir, args.from_enc, args.to_enc, args.recursive, args.jobs, file_filter,
+                         args.errors, progress)
+    finally:
+        bar.clear()
+    print_run_result(result)
+    return 1 if result.failed else 0
 
-    count = 0
+def command_deploy(args):
+    root_dir, file_filter = build_file_filter(args, args.src, print)
+    print_deploy_header(root_dir, args.dest, args.from_enc, args.to_enc, args.mirror, args.hardlink)
+    bar, progress = make_progress(args.verbose)
+    try:
+        result = deploy(root_dir, args.dest, args.from_enc, args.to_enc, args.recursive, args.jobs, args.full,
+                        file_filter, args.errors, args.mirror, args.hardlink, progress)
+    finally:
+        bar.clear()
+    print_deploy_result(result, args.full)
+    return 1 if result.failed else 0
 
-    if recursive:
-        for root, dirs, files in os.walk(src_dir):
-            rel_path = os.path.relpath(root, src_dir)
-            dest_root = os.path.join(dest_dir, rel_path) if rel_path != '.' else dest_dir
-
-            if not os.path.exists(dest_root):
-                os.makedirs(dest_root)
-
-            for filename in files:
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in EXTENSIONS:
-                    src_path = os.path.join(root, filename)
-                    dest_path = os.path.join(dest_root, filename)
-                    rel_file = os.path.relpath(src_path, src_dir)
-                    print(f"  {rel_file}")
-                    if copy_and_convert(src_path, dest_path, from_enc, to_enc):
-                        count += 1
-    else:
-        for filename in os.listdir(src_dir):
-            src_path = os.path.join(src_dir, filename)
-            if os.path.isfile(src_path):
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in EXTENSIONS:
-                    dest_path = os.path.join(dest_dir, filename)
-                    print(f"  {filename}")
-                    if copy_and_convert(src_path, dest_path, from_enc, to_enc):
-                        count += 1
+def command_watch(args):
+    root_dir, file_filter = build_file_filter(args, args.src, print)
+    print_deploy_header(root_dir, args.dest, args.from_enc, args.to_enc, args.mirror, args.hardlink)
+    bar, progress = make_progress(args.verbose)
 
-    print()
-    print(f"完成! 共处理 {count} 个文件")
-    return count
+    def on_ready(result, mode):
+        bar.clear()
+        print_deploy_result(result)
+        print()
+        print(f"正在监视: {root_dir} [{mode}]，按 Ctrl+C 退出")
 
-def convert(path, from_enc, to_enc, recursive=False):
-    """转换文件或目录的编码 (原地转换)"""
-    if os.path.isfile(path):
-        print(f"文件: {path}")
-        print(f"转换: {from_enc} -> {to_enc}")
-        if convert_file(path, from_enc, to_enc):
-            print("完成!")
-        return
+    def on_batch(result):
+        stamp = time.strftime('%H:%M:%S')
+        for rel_path in result.removed:
+            print(f"[{stamp}] 删除: {rel_path}")
+        for file in result.files:
+            if file.status == ACTION_FAILED:
+                print(f"[{stamp}] {file.path}  错误: {file.error}")
+                continue
+            detail = f" {file.detected}" if file.detected else ""
+            print(f"[{stamp}] {file.path}{detail} ({ACTION_LABELS[file.status]}, {file.duration * 1000:.0f} ms)")
 
-    if os.path.isdir(path):
-        print(f"目录: {path}")
-        print(f"转换: {from_enc} -> {to_enc}")
-        print()
+    try:
+        watch(root_dir, args.dest, args.from_enc, args.to_enc, args.recursive,
+              args.interval, args.debounce, args.polling, file_filter, args.errors,
+              args.mirror, args.hardlink, progress, on_ready, on_batch)
+    finally:
+        bar.clear()
+    print("\n已停止监视")
+    return 0
 
-        count = 0
-        if recursive:
-            for root, dirs, files in os.walk(path):
-                for filename in files:
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext in EXTENSIONS:
-                        file_path = os.path.join(root, filename)
-                        rel_file = os.path.relpath(file_path, path)
-                        print(f"  {rel_file}")
-                        if convert_file(file_path, from_enc, to_enc):
-                            count += 1
-        else:
-            for filename in os.listdir(path):
-                file_path = os.path.join(path, filename)
-                if os.path.isfile(file_path):
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext in EXTENSIONS:
-                        print(f"  {filename}")
-                        if convert_file(file_path, from_enc, to_enc):
-                            count += 1
+def command_detect(args):
+    root_dir, file_filter = build_file_filter(args, args.path, print)
+    results = detect(root_dir, args.recursive, file_filter)
+    counts = {}
+    elapsed = 0.0
+    for result in results:
+        if result.status == ACTION_FAILED:
+            print(f"  {result.path}  错误: {result.error}")
+            continue
+        elapsed += result.duration
+        name = result.encoding or '未知'
+        counts[name] = counts.get(name, 0) + 1
+        print(f"  {result.path}  {name}  {result.confidence:.2f}")
 
-        print()
-        print(f"完成! 共处理 {count} 个文件")
-        return
+    print()
+    print(f"共 {len(results)} 个文件: " + ", ".join(f"{name} {n}" for name, n in sorted(counts.items())))
+    if results:
+        print(f"平均每个文件识别耗时 {elapsed / len(results) * 1e6:.1f} µs (含读取样本)")
+    return 0
 
-    print(f"错误: 路径不存在: {path}")
+def command_check(args):
+    root_dir, file_filter = build_file_filter(args, args.path, print)
+    print(f"检查: {args.from_enc} -> {args.to_enc}")
+    print()
+    bar = ProgressBar()
+
+    def progress(result, done, total):
+        if result.error:
+            bar.write(f"{result.path}: 错误: {result.error}")
+        for line, column, char in result.problems:
+            bar.write(f"{result.path}:{line}:{column}: U+{ord(char):04X} {char!r} 无法用 {args.to_enc} 表示")
+        if result.count > len(result.problems):
+            bar.write(f"{result.path}: ... 另有 {result.count - len(result.problems)} 处")
+        bar.update(done, total)
+
+    start = time.perf_counter()
+    try:
+        results = check(root_dir, args.from_enc, args.to_enc, args.recursive, args.jobs, file_filter, progress)
+    finally:
+        bar.clear()
+    elapsed = time.perf_counter() - start
+
+    bad_files = sum(1 for r in results if r.count or r.error)
+    total = sum(r.count for r in results)
+    print()
+    print(f"检查 {len(results)} 个文件 ({elapsed:.2f}s): "
+          + (f"{bad_files} 个文件有问题, 共 {total} 个字符无法表示" if bad_files else "全部可以转换"))
+    if bad_files:
+        print("可用 --errors replace/ignore/ucn 指定转换时的处理方式")
+    return 1 if bad_files else 0
 
 def main():
+    sys.stdout.reconfigure(encoding='utf-8')
     parser = argparse.ArgumentParser(
         description='通用编码转换工具',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -136,8 +1412,23 @@ def main():
   %(prog)s convert src/ -f utf-8 -t gbk -r            # 递归转换
   %(prog)s deploy src/ dest/ -f utf-8 -t gbk          # 复制并转换
   %(prog)s deploy src/ dest/ -f utf-8 -t gbk -r       # 递归复制并转换
+  %(prog)s deploy src/ dest/ -r -j 8                  # 8 个进程并行转换
+  %(prog)s deploy src/ dest/ -r --full                # 忽略清单，全部重新部署
+  %(prog)s watch src/ dest/ -r                        # 监视源目录，保存后自动部署
+  %(prog)s convert src/ -f auto -t utf-8 -r           # 自动识别源编码
+  %(prog)s detect src/ -r                             # 只识别编码
+  %(prog)s check src/ -t gbk -r -j 0                  # 列出无法转换的字符 (文件:行:列), 不写入
+  %(prog)s deploy src/ dest/ -r --errors ucn          # 无法表示的字符写成 \\uXXXX
+  %(prog)s deploy src/ dest/ -r --mirror              # 完整镜像, 其他文件原样复制
+  %(prog)s deploy src/ dest/ -r --mirror --hardlink   # 其他文件使用硬链接
+  %(prog)s deploy src/ dest/ -r -x 'third_party/' -x '*.pb.h'   # 排除目录与文件
+  %(prog)s convert src/ -r --gitignore --ext .cpp,.h  # 使用 .gitignore, 只处理指定扩展名
+  %(prog)s deploy MultiFile.sln dest/ -t gbk          # 只处理解决方案中各项目的源文件与头文件
 
 支持的编码: utf-8, gbk, gb2312, gb18030, utf-16, ascii, latin-1
+源编码可用 auto: 按 BOM / UTF-8 校验 / GBK 双字节特征逐个文件识别
+路径为 .sln / .slnx / .vcxproj 时只处理其中的 ClCompile / ClInclude 文件, 不扫描目录
+默认排除 .git/ .vs/ build/ x64/ Debug/ Release/ node_modules/, 用 --no-default-excludes 关闭
 '''
     )
 
@@ -145,27 +1436,78 @@ def main():
 
     # convert 命令
     p_convert = subparsers.add_parser('convert', help='原地转换编码')
-    p_convert.add_argument('path', help='文件或目录路径')
-    p_convert.add_argument('-f', '--from', dest='from_enc', default='utf-8', help='源编码 (默认: utf-8)')
+    p_convert.add_argument('path', help='文件、目录或 .sln/.vcxproj 路径')
+    p_convert.add_argument('-f', '--from', dest='from_enc', default='utf-8', help='源编码, auto 为自动识别 (默认: utf-8)')
     p_convert.add_argument('-t', '--to', dest='to_enc', default='gbk', help='目标编码 (默认: gbk)')
     p_convert.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
+    p_convert.add_argument('-j', '--jobs', type=int, default=1, help='并行进程数 (默认: 1, 0 表示 CPU 核数)')
+    add_errors_argument(p_convert)
+    p_convert.add_argument('-v', '--verbose', action='store_true', help='逐个文件输出结果 (默认只显示进度条)')
+    add_filter_arguments(p_convert)
 
     # deploy 命令
     p_deploy = subparsers.add_parser('deploy', help='复制并转换编码')
-    p_deploy.add_argument('src', help='源目录')
+    p_deploy.add_argument('src', help='源目录或 .sln/.vcxproj')
     p_deploy.add_argument('dest', help='目标目录')
-    p_deploy.add_argument('-f', '--from', dest='from_enc', default='utf-8', help='源编码 (默认: utf-8)')
+    p_deploy.add_argument('-f', '--from', dest='from_enc', default='utf-8', help='源编码, auto 为自动识别 (默认: utf-8)')
     p_deploy.add_argument('-t', '--to', dest='to_enc', default='gbk', help='目标编码 (默认: gbk)')
     p_deploy.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
+    p_deploy.add_argument('-j', '--jobs', type=int, default=1, help='并行进程数 (默认: 1, 0 表示 CPU 核数)')
+    p_deploy.add_argument('--full', action='store_true', help='忽略增量清单，重新处理所有文件')
+    add_errors_argument(p_deploy)
+    p_deploy.add_argument('-v', '--verbose', action='store_true', help='逐个文件输出结果 (默认只显示进度条)')
+    add_mirror_arguments(p_deploy)
+    add_filter_arguments(p_deploy)
+
+    # watch 命令
+    p_watch = subparsers.add_parser('watch', help='监视源目录并持续部署')
+    p_watch.add_argument('src', help='源目录或 .sln/.vcxproj')
+    p_watch.add_argument('dest', help='目标目录')
+    p_watch.add_argument('-f', '--from', dest='from_enc', default='utf-8', help='源编码, auto 为自动识别 (默认: utf-8)')
+    p_watch.add_argument('-t', '--to', dest='to_enc', default='gbk', help='目标编码 (默认: gbk)')
+    p_watch.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
+    p_watch.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                         help=f'轮询间隔秒数 (默认: {POLL_INTERVAL})')
+    p_watch.add_argument('--debounce', type=float, default=DEBOUNCE_DELAY,
+                         help=f'防抖延迟秒数 (默认: {DEBOUNCE_DELAY})')
+    p_watch.add_argument('--polling', action='store_true', help='强制使用轮询 (不使用 watchdog)')
+    add_errors_argument(p_watch)
+    p_watch.add_argument('-v', '--verbose', action='store_true', help='逐个文件输出结果 (默认只显示进度条)')
+    add_mirror_arguments(p_watch)
+    add_filter_arguments(p_watch)
+
+    # detect 命令
+    p_detect = subparsers.add_parser('detect', help='识别编码')
+    p_detect.add_argument('path', help='文件、目录或 .sln/.vcxproj 路径')
+    p_detect.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
+    add_filter_arguments(p_detect)
+
+    # check 命令
+    p_check = subparsers.add_parser('check', help='检查能否转换 (只读)')
+    p_check.add_argument('path', help='文件、目录或 .sln/.vcxproj 路径')
+    p_check.add_argument('-f', '--from', dest='from_enc', default='utf-8', help='源编码, auto 为自动识别 (默认: utf-8)')
+    p_check.add_argument('-t', '--to', dest='to_enc', default='gbk', help='目标编码 (默认: gbk)')
+    p_check.add_argument('-r', '--recursive', action='store_true', help='递归处理子目录')
+    p_check.add_argument('-j', '--jobs', type=int, default=1, help='并行进程数 (默认: 1, 0 表示 CPU 核数)')
+    add_filter_arguments(p_check)
 
     args = parser.parse_args()
 
-    if args.command == 'convert':
-        convert(args.path, args.from_enc, args.to_enc, args.recursive)
-    elif args.command == 'deploy':
-        deploy(args.src, args.dest, args.from_enc, args.to_enc, args.recursive)
-    else:
+    commands = {
+        'convert': command_convert,
+        'deploy': command_deploy,
+        'watch': command_watch,
+        'detect': command_detect,
+        'check': command_check,
+    }
+    if args.command not in commands:
         parser.print_help()
+        return
+    try:
+        sys.exit(commands[args.command](args))
+    except FileNotFoundError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
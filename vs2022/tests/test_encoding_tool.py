@@ -0,0 +1,346 @@
+"""encoding_tool 的单元测试"""
+
+import os
+
+import pytest
+
+import encoding_tool
+
+
+PREFIX = b'// header\r\n' * (encoding_tool.DETECT_SAMPLE_SIZE // 10)
+
+
+def test_detect_ascii_file(tmp_path):
+    path = tmp_path / 'a.cpp'
+    path.write_bytes(PREFIX)
+    assert encoding_tool.detect_file_encoding(str(path)) == ('ascii', 1.0)
+
+
+def test_detect_truncated_ascii_sample_is_not_ascii():
+    encoding, _ = encoding_tool.detect_encoding(b'int x;\n' * 10, truncated=True)
+    assert encoding == 'utf-8'
+
+
+def test_detect_utf8_tail_after_ascii_prefix(tmp_path):
+    path = tmp_path / 'a.cpp'
+    path.write_bytes(PREFIX + '// 中文注释\r\n'.encode('utf-8'))
+    encoding, _ = encoding_tool.detect_file_encoding(str(path))
+    assert encoding == 'utf-8'
+
+
+def test_detect_gbk_tail_after_ascii_prefix(tmp_path):
+    path = tmp_path / 'a.cpp'
+    path.write_bytes(PREFIX + '// 中文注释\r\n'.encode('gbk'))
+    encoding, _ = encoding_tool.detect_file_encoding(str(path))
+    assert encoding == 'gbk'
+
+
+def test_detect_tail_beyond_first_chunk(tmp_path):
+    path = tmp_path / 'a.cpp'
+    path.write_bytes(PREFIX + b'x' * 100 + '// 中文注释\r\n'.encode('gbk'))
+    encoding, _ = encoding_tool.detect_file_encoding(str(path), chunk_size=64)
+    assert encoding == 'gbk'
+
+
+def test_deploy_auto_with_ascii_prefix(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'a.cpp').write_bytes(PREFIX + '// 中文注释\r\n'.encode('utf-8'))
+    dest = tmp_path / 'dest'
+    result = encoding_tool.deploy(str(src), str(dest), encoding_tool.AUTO, 'gbk')
+    assert not result.failed
+    assert (dest / 'a.cpp').read_bytes() == PREFIX + '// 中文注释\r\n'.encode('gbk')
+
+
+def test_process_file_trusts_declared_encoding(tmp_path):
+    # UTF-8 的 "你好" 同时也是合法的 GBK 字节，声明为 GBK 时必须按 GBK 转换
+    data = '你好'.encode('utf-8')
+    path = tmp_path / 'a.cpp'
+    path.write_bytes(data)
+    result = encoding_tool.process_file(str(path), None, 'gbk', 'utf-8')
+    assert result.status == encoding_tool.ACTION_CONVERTED
+    assert path.read_bytes() == data.decode('gbk').encode('utf-8')
+
+
+def test_process_file_skips_ascii(tmp_path):
+    path = tmp_path / 'a.cpp'
+    path.write_bytes(b'int main() { return 0; }\n')
+    result = encoding_tool.process_file(str(path), None, 'gbk', 'utf-8')
+    assert result.status == encoding_tool.ACTION_SKIPPED
+
+
+def test_is_unchanged(tmp_path):
+    ascii_path = tmp_path / 'a.cpp'
+    ascii_path.write_bytes(b'int x;\n')
+    chinese_path = tmp_path / 'b.cpp'
+    chinese_path.write_bytes('// 你好\n'.encode('utf-8'))
+    assert encoding_tool.is_unchanged(str(ascii_path), 'utf-8', 'gbk')
+    assert not encoding_tool.is_unchanged(str(ascii_path), 'utf-16', 'gbk')
+    assert encoding_tool.is_unchanged(str(chinese_path), 'UTF8', 'utf-8')
+    assert not encoding_tool.is_unchanged(str(chinese_path), 'gbk', 'utf-8')
+
+
+def test_ucn_error_handler():
+    handler = encoding_tool.ERROR_POLICIES['ucn']
+    assert '© 😀 中'.encode('gbk', handler) == b'\\u00A9 \\U0001F600 ' + '中'.encode('gbk')
+
+
+def test_transcode_with_ucn(tmp_path):
+    src = tmp_path / 'a.cpp'
+    src.write_bytes('auto s = "中😀";\n'.encode('utf-8'))
+    dest = tmp_path / 'b.cpp'
+    encoding_tool.transcode(str(src), str(dest), 'utf-8', 'gbk', errors='ucn')
+    assert dest.read_bytes() == 'auto s = "中'.encode('gbk') + b'\\U0001F600";\n'
+
+
+def test_check_reports_unencodable(tmp_path):
+    (tmp_path / 'a.cpp').write_bytes('int a;\n// 😀\n'.encode('utf-8'))
+    (tmp_path / 'b.cpp').write_bytes(b'int b;\n')
+    results = {r.path: r for r in encoding_tool.check(str(tmp_path), 'utf-8', 'gbk')}
+    assert results['a.cpp'].count == 1
+    assert results['a.cpp'].problems == [(2, 4, '😀')]
+    assert results['b.cpp'].count == 0
+
+
+def test_deploy_changes_returns_result(tmp_path, capsys):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'a.cpp').write_bytes('// 中文\n'.encode('utf-8'))
+    (src / 'b.cpp').write_bytes(b'int b;\n')
+    dest = tmp_path / 'dest'
+    encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk')
+    manifest = encoding_tool.load_manifest(str(dest), 'utf-8', 'gbk')
+
+    (src / 'a.cpp').write_bytes('// 改动\n'.encode('utf-8'))
+    (src / 'b.cpp').unlink()
+    result = encoding_tool.deploy_changes(str(src), str(dest), {'a.cpp', 'b.cpp'}, 'utf-8', 'gbk', manifest)
+    assert [r.path for r in result.files] == ['a.cpp']
+    assert result.removed == ['b.cpp']
+    assert not (dest / 'b.cpp').exists()
+    assert capsys.readouterr().out == ''
+
+
+def test_ignore_rules_patterns():
+    rules = encoding_tool.IgnoreRules([
+        '# 注释',
+        'build/',
+        '*.gen.cpp',
+        '/third_party',
+        'docs/**/draft?.txt',
+        '!keep.gen.cpp',
+    ])
+    assert rules.is_ignored('build', is_dir=True)
+    assert rules.is_ignored('src/build', is_dir=True)
+    assert not rules.is_ignored('build')  # 结尾 / 只匹配目录
+    assert rules.is_ignored('a.gen.cpp')
+    assert rules.is_ignored('src/sub/b.gen.cpp')
+    assert not rules.is_ignored('src/keep.gen.cpp')  # 后面的 ! 规则优先
+    assert rules.is_ignored('third_party', is_dir=True)
+    assert not rules.is_ignored('src/third_party', is_dir=True)  # 含 / 的模式相对根目录
+    assert rules.is_ignored('docs/draft1.txt')
+    assert rules.is_ignored('docs/a/b/draft2.txt')
+    assert not rules.is_ignored('docs/draft10.txt')
+
+
+def test_ignore_rules_character_class(tmp_path):
+    path = tmp_path / '.gitignore'
+    path.write_text('tmp[0-9].cpp\nlog[!a].txt\n', encoding='utf-8')
+    rules = encoding_tool.IgnoreRules()
+    rules.add_file(str(path))
+    assert rules.is_ignored('tmp3.cpp')
+    assert not rules.is_ignored('tmpx.cpp')
+    assert rules.is_ignored('logb.txt')
+    assert not rules.is_ignored('loga.txt')
+
+
+def test_source_filter_skips_excluded_dirs(tmp_path):
+    for rel in ['a.cpp', 'b.txt.bak', 'build/c.cpp', 'src/d.h', 'src/.vs/e.cpp', 'src/f.gen.cpp']:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'int x;\n')
+    ignore = encoding_tool.IgnoreRules(encoding_tool.DEFAULT_EXCLUDES + ['*.gen.cpp'])
+    file_filter = encoding_tool.SourceFilter(ignore=ignore)
+    found = encoding_tool.list_files(str(tmp_path), recursive=True, file_filter=file_filter)
+    assert sorted(rel_path.replace(os.sep, '/') for _, rel_path in found) == ['a.cpp', 'src/d.h']
+    assert not file_filter.accepts_path('build/c.cpp')
+    assert file_filter.accepts_path('src/d.h')
+
+
+VCXPROJ = '''<?xml version="1.0" encoding="utf-8"?>
+<Project DefaultTargets="Build" xmlns="http://schemas.microsoft.com/developer/msbuild/2003">
+  <ItemDefinitionGroup>
+    <ClCompile><WarningLevel>Level3</WarningLevel></ClCompile>
+  </ItemDefinitionGroup>
+  <ItemGroup>
+    <ClCompile Include="main.cpp;$(ProjectDir)util\\util.cpp" />
+    <ClCompile Include="gen\\*.cpp" />
+    <ClCompile Include="$(SolutionDir)shared\\common.cpp" />
+    <ClCompile Include="$(IntDir)moc.cpp" />
+    <ClInclude Include="util\\util.h;..\\shared\\common.h" />
+    <None Include="readme.txt" />
+  </ItemGroup>
+</Project>
+'''
+
+FILTERS = '''<?xml version="1.0" encoding="utf-8"?>
+<Project xmlns="http://schemas.microsoft.com/developer/msbuild/2003">
+  <ItemGroup>
+    <ClInclude Include="extra.h"><Filter>Header Files</Filter></ClInclude>
+  </ItemGroup>
+</Project>
+'''
+
+SLN = '''Microsoft Visual Studio Solution File, Format Version 12.00
+Project("{8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942}") = "App", "App\\App.vcxproj", "{11111111-1111-1111-1111-111111111111}"
+EndProject
+Project("{2150E333-8FDC-42A3-9474-1A3956D46DE8}") = "Docs", "Docs", "{22222222-2222-2222-2222-222222222222}"
+EndProject
+Project("{8BC9CEB8-8B4A-11D0-8D11-00A0C91BC942}") = "Missing", "Missing\\Missing.vcxproj", "{33333333-3333-3333-3333-333333333333}"
+EndProject
+'''
+
+
+def make_solution(root):
+    app = root / 'App'
+    for rel in ['main.cpp', 'util/util.cpp', 'util/util.h', 'gen/a.cpp', 'gen/b.cpp', 'extra.h', 'readme.txt']:
+        path = app / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'int x;\n')
+    (root / 'shared').mkdir()
+    (root / 'shared' / 'common.cpp').write_bytes(b'int y;\n')
+    (root / 'shared' / 'common.h').write_bytes(b'int y;\n')
+    (app / 'App.vcxproj').write_text(VCXPROJ, encoding='utf-8')
+    (app / 'App.vcxproj.filters').write_text(FILTERS, encoding='utf-8')
+    (root / 'All.sln').write_text(SLN, encoding='utf-8-sig')
+
+
+def test_parse_solution(tmp_path):
+    make_solution(tmp_path)
+    projects = encoding_tool.parse_solution(str(tmp_path / 'All.sln'))
+    assert projects == [str(tmp_path / 'App' / 'App.vcxproj'), str(tmp_path / 'Missing' / 'Missing.vcxproj')]
+
+
+def test_parse_slnx(tmp_path):
+    (tmp_path / 'All.slnx').write_text(
+        '<Solution>\n  <Folder Name="/src/">\n    <Project Path="App/App.vcxproj" />\n  </Folder>\n'
+        '  <Project Path="Tool/Tool.csproj" />\n</Solution>\n', encoding='utf-8')
+    assert encoding_tool.parse_solution(str(tmp_path / 'All.slnx')) == [str(tmp_path / 'App' / 'App.vcxproj')]
+
+
+def test_parse_project_items(tmp_path):
+    make_solution(tmp_path)
+    notes = []
+    files = encoding_tool.parse_project_items(str(tmp_path / 'App' / 'App.vcxproj'), str(tmp_path), notes=notes)
+    app = tmp_path / 'App'
+    assert files == {str(app / 'main.cpp'), str(app / 'util' / 'util.cpp'), str(app / 'util' / 'util.h'),
+                     str(app / 'gen' / 'a.cpp'), str(app / 'gen' / 'b.cpp'), str(app / 'extra.h'),
+                     str(tmp_path / 'shared' / 'common.cpp'), str(tmp_path / 'shared' / 'common.h')}
+    assert len(notes) == 1 and '$(IntDir)moc.cpp' in notes[0]
+
+
+def test_load_project_files(tmp_path):
+    make_solution(tmp_path)
+    root_dir, files, project_count, notes = encoding_tool.load_project_files(str(tmp_path / 'All.sln'))
+    assert root_dir == str(tmp_path)
+    assert project_count == 2
+    assert files == {'App/main.cpp', 'App/util/util.cpp', 'App/util/util.h', 'App/gen/a.cpp', 'App/gen/b.cpp',
+                     'App/extra.h', 'shared/common.cpp', 'shared/common.h'}
+    assert any('Missing.vcxproj' in note for note in notes)
+
+    # 单个项目: 根目录为项目所在目录，目录之外的文件跳过
+    root_dir, files, project_count, notes = encoding_tool.load_project_files(str(tmp_path / 'App' / 'App.vcxproj'))
+    assert root_dir == str(tmp_path / 'App')
+    assert 'main.cpp' in files and not any('common.h' in f for f in files)
+    assert any('common.h' in note for note in notes)
+
+
+def make_tree(root, files):
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def test_incremental_deploy(tmp_path):
+    src = tmp_path / 'src'
+    dest = tmp_path / 'dest'
+    make_tree(src, {'a.cpp': '// 中文\n'.encode('utf-8'), 'b.cpp': b'int b;\n', 'sub/c.h': b'int c;\n'})
+
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk', recursive=True)
+    assert sorted(r.path.replace(os.sep, '/') for r in result.files) == ['a.cpp', 'b.cpp', 'sub/c.h']
+    assert (dest / 'a.cpp').read_bytes() == '// 中文\n'.encode('gbk')
+
+    # 没有变化: 全部跳过
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk', recursive=True)
+    assert result.files == [] and result.unchanged == 3
+
+    # 只改 mtime、内容不变: 比较哈希后跳过，并更新记录中的 mtime
+    stat = os.stat(src / 'b.cpp')
+    os.utime(src / 'b.cpp', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk', recursive=True)
+    assert result.files == [] and result.unchanged == 3
+    manifest = encoding_tool.load_manifest(str(dest), 'utf-8', 'gbk')
+    assert manifest['b.cpp']['mtime_ns'] == stat.st_mtime_ns + 10 ** 9
+
+    # 修改内容与删除文件
+    (src / 'a.cpp').write_bytes('// 改动后的注释\n'.encode('utf-8'))
+    (src / 'sub' / 'c.h').unlink()
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk', recursive=True)
+    assert [r.path for r in result.files] == ['a.cpp']
+    assert [rel.replace(os.sep, '/') for rel in result.removed] == ['sub/c.h']
+    assert (dest / 'a.cpp').read_bytes() == '// 改动后的注释\n'.encode('gbk')
+    assert not (dest / 'sub').exists()
+
+
+def test_deploy_redoes_modified_dest(tmp_path):
+    src = tmp_path / 'src'
+    dest = tmp_path / 'dest'
+    make_tree(src, {'a.cpp': '// 中文\n'.encode('utf-8')})
+    encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk')
+    (dest / 'a.cpp').write_bytes(b'broken')
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk')
+    assert [r.path for r in result.files] == ['a.cpp']
+    assert (dest / 'a.cpp').read_bytes() == '// 中文\n'.encode('gbk')
+
+
+@pytest.mark.parametrize('options', [{'full': True}, {'to_enc': 'gb18030'}, {'errors': 'replace'}])
+def test_deploy_removes_deleted_files_when_manifest_invalidated(tmp_path, options):
+    src = tmp_path / 'src'
+    dest = tmp_path / 'dest'
+    make_tree(src, {'a.cpp': b'int a;\n', 'sub/b.cpp': b'int b;\n'})
+    encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk', recursive=True)
+
+    (src / 'sub' / 'b.cpp').unlink()
+    kwargs = {'to_enc': 'gbk', **options}
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', recursive=True, **kwargs)
+    assert [r.path for r in result.files] == ['a.cpp']
+    assert [rel.replace(os.sep, '/') for rel in result.removed] == ['sub/b.cpp']
+    assert not (dest / 'sub').exists()
+    assert set(encoding_tool.read_manifest(str(dest))['files']) == {'a.cpp'}
+
+
+def test_manifest_depends_on_settings(tmp_path):
+    src = tmp_path / 'src'
+    dest = tmp_path / 'dest'
+    make_tree(src, {'a.cpp': b'int a;\n'})
+    encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk')
+    assert set(encoding_tool.load_manifest(str(dest), 'utf-8', 'gbk')) == {'a.cpp'}
+    # 编码设置或错误处理策略变化时清单失效，全部重新部署
+    assert encoding_tool.load_manifest(str(dest), 'utf-8', 'gb18030') == {}
+    assert encoding_tool.load_manifest(str(dest), 'utf-8', 'gbk', 'replace') == {}
+    result = encoding_tool.deploy(str(src), str(dest), 'utf-8', 'gbk', errors='replace')
+    assert len(result.files) == 1
+
+    (dest / encoding_tool.MANIFEST_NAME).write_text('not json', encoding='utf-8')
+    assert encoding_tool.load_manifest(str(dest), 'utf-8', 'gbk', 'replace') == {}
+
+
+def test_convert_file_result_is_falsy_on_failure(tmp_path):
+    good = tmp_path / 'good.cpp'
+    good.write_bytes('// 中文\n'.encode('utf-8'))
+    bad = tmp_path / 'bad.cpp'
+    bad.write_bytes(b'\xff\xfe\xfa broken \x80\n')
+    assert encoding_tool.convert_file(str(good), 'utf-8', 'gbk')
+    result = encoding_tool.copy_and_convert(str(bad), str(tmp_path / 'out.cpp'), 'utf-8', 'gbk')
+    assert result.status == encoding_tool.ACTION_FAILED
+    assert not result